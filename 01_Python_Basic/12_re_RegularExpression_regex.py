@@ -668,4 +668,28 @@ x = re.search(pattern, pos_nucleotide_3)
 print(x.groups())  # Output: ('100', 'A')
 print(x.group(1))  # Output: '100'
 print(x.group(2))  # Output: 'A'
-print(x.group())   # Output: '100A'
\ No newline at end of file
+print(x.group())   # Output: '100A'
+
+#----------------------------------------------------------------------------------------------#
+#-------------------------- 25. re.compile() and many patterns in one pass --------------------#
+#----------------------------------------------------------------------------------------------#
+
+# re.compile() turns a pattern into a Pattern object once, to reuse it on many strings
+import re
+
+pattern_score = re.compile(r"Math:\s*(\d+\.\d+)")
+print(pattern_score.search("Math:   2.00   Literature:   5.50").group(1)) # 2.00
+
+
+# Searching many patterns means one scan of the text per pattern.
+# regex_scan.py (same directory) caches the compiled patterns (bounded LRU cache: cached_compile()),
+# and searches many patterns {field: pattern} through one object (single_pass=True: ONE pattern of alternatives,
+# scanned once, but where the first field matching at a position hides the others)
+from regex_scan import MultiPattern, KeyValuePattern
+
+contact = MultiPattern({"email": r"[\w.]+@[\w.]+", "phone": r"\+?\d[\d -]{7,}\d"})
+print(contact.findall("Contact: ann@mail.com, +84 912 345 678")) # {'email': ['ann@mail.com'], 'phone': ['+84 912 345 678']}
+
+# Fields written as "<key><value>": one pattern "(Math|Literature|English):\s*(\d+\.\d+)"
+scores = KeyValuePattern(["Math", "Literature", "English"], r":\s*(\d+\.\d+)")
+print(scores.extract("Math:   2.00   Literature:   5.50")) # {'Math': '2.00', 'Literature': '5.50', 'English': None}
@@ -14,6 +14,8 @@
    + Convert between timezones
    + Normalize timezone
    + Get tzinfo (timezone information)
+
+6. Millions of timestamps: vectorized parsing and timezone conversion (bulk_datetime.py)
 '''
 
 # https://www.programiz.com/python-programming/datetime
@@ -393,3 +395,34 @@ print(naive_dt.tzinfo) # None
 localized_dt = pytz.timezone('Asia/Seoul').localize(naive_dt) # Localized datetime object
 print(localized_dt.tzinfo) # Asia/Seoul
 
+
+#-----------------------------------------------------------------------------------------------------------------------#
+#------------------------ 6. Millions of timestamps: vectorized parsing and timezone conversion ------------------------#
+#-----------------------------------------------------------------------------------------------------------------------#
+
+# strptime(), localize() and astimezone() create and convert ONE datetime object at a time.
+# bulk_datetime.py (same directory) parses and converts whole arrays of timestamps as int64 epochs with NumPy
+# (fixed-width formats decoded all at once, offsets looked up in the transition table of pytz),
+# and only builds datetime objects at the end, if they are needed.
+from bulk_datetime import parse_datetimes, local_to_utc, utc_to_local, to_datetimes
+
+timestamps = ["10/03/2024 01:30:00", "10/03/2024 03:30:00", "18/06/2024 12:00:00"] # Wall clock times in New York
+local_epochs = parse_datetimes(timestamps, "%d/%m/%Y %H:%M:%S") # Seconds since 1970-01-01 (as if the times were UTC)
+
+utc_epochs = local_to_utc(local_epochs, 'US/Eastern') # Like pytz.timezone('US/Eastern').localize() for every timestamp
+print(to_datetimes(utc_epochs, 'Asia/Seoul')) # Like .astimezone(pytz.timezone('Asia/Seoul')) for every timestamp
+# [datetime.datetime(2024, 3, 10, 15, 30, tzinfo=<DstTzInfo 'Asia/Seoul' KST+9:00:00 STD>),
+#  datetime.datetime(2024, 3, 10, 16, 30, tzinfo=<DstTzInfo 'Asia/Seoul' KST+9:00:00 STD>),
+#  datetime.datetime(2024, 6, 19, 1, 0, tzinfo=<DstTzInfo 'Asia/Seoul' KST+9:00:00 STD>)]
+
+seoul_epochs = utc_to_local(utc_epochs, 'Asia/Seoul') # Or stay in NumPy: int64 epochs of the wall clock times in Seoul
+
+'''
+200,000 strings:
+- strptime() + localize() + astimezone(), per object: ~10 s
+- parse_datetimes() + local_to_utc() + utc_to_local(): ~0.1 s
+
+local_to_utc(..., is_dst=False) resolves the ambiguous (fall back) and non-existent (spring forward) times
+exactly like localize(..., is_dst=False); with is_dst=None it raises the same pytz exceptions.
+'''
+
@@ -137,6 +137,21 @@ with open(file=f'{parent_dir}/ADream.txt', mode='r') as file_pointer:
         print(line.strip())
 
 
+################################################################
+## Random access to the lines of a (very large) file: mmap    ##
+################################################################
+
+# Reading line by line always starts from the beginning of the file.
+# txt_line_index.py (same directory) maps the file in memory and indexes the byte offset of every line,
+# so that any line, the last lines, or random lines are read directly (the index is cached next to the file)
+from txt_line_index import LineIndexedFile
+
+with LineIndexedFile(f'{parent_dir}/StudentScores.txt', use_cache=False) as scores:
+    print(len(scores))      # 7 (number of lines)
+    print(scores[3])        # Hannah: 93 (the line 3, counted from 0)
+    print(scores.tail(2))   # ['Jack: 91', 'Kathy: 84']
+
+
 #---------------------------------------------------------------------------------------------#
 #---------------------------------- Write to a file ------------------------------------------#
 #---------------------------------------------------------------------------------------------#
@@ -138,10 +138,13 @@ with open(file=f"{parent_dir}/medals.csv", mode="r", newline="", encoding="utf-8
 
 import csv
 
-def process_csv_chunks(file_path, chunk_size=1000):
+def process_csv_chunks(file_path, chunk_size=1000, delimiter=None):
     """Generator function to process CSV file in chunks."""
     with open(file=file_path, mode="r", newline="", encoding="utf-8") as file_pointer:
-        reader = csv.DictReader(file_pointer, delimiter="\t")
+        if delimiter is None: # Guess the delimiter ("," for .csv, "\t" for .tsv...) from the beginning of the file
+            delimiter = csv.Sniffer().sniff(file_pointer.read(64 * 1024), delimiters=",\t;|").delimiter
+            file_pointer.seek(0)
+        reader = csv.DictReader(file_pointer, delimiter=delimiter)
         chunk = []
         for row in reader:
             chunk.append(row)
@@ -162,6 +165,14 @@ for chunk in process_csv_chunks(f"{parent_dir}/weather.tsv", chunk_size=chunk_si
     for row in chunk:
         print(row)  # Or whatever processing you need
 
+# For very large files, csv_chunk_reader.py (same directory) reads the chunks IN PARALLEL (worker processes),
+# as columns {column: values} instead of lists of row dictionaries:
+from csv_chunk_reader import read_csv_chunks
+
+if __name__ == '__main__': # The worker processes import this file again, they must not start their own workers (see 43_multi_processing.py)
+    for chunk in read_csv_chunks(f"{parent_dir}/weather.tsv", chunk_bytes=4096, workers=2, dtypes={"MaxTemp": "float64"}):
+        print(f"Processing chunk with {len(chunk['MaxTemp'])} rows, mean MaxTemp = {chunk['MaxTemp'].mean():.1f}")
+
 
 #--------------------------------------------------------------------------------#
 #----------------------- Write .csv and .tsv files ------------------------------#
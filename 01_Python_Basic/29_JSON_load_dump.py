@@ -140,6 +140,22 @@ with open(f"{parent_dir}/new_written_jsondump.json", "w") as json_pointer:
 
 
 
+#-----------------------------------------------------------------#
+#------------ Large files: streaming read and write --------------#
+#-----------------------------------------------------------------#
+
+# json.load() reads the WHOLE file into memory, and json.dump(..., indent=4) is slow for large data.
+# json_stream.py (same directory) reads the records of a JSON array (or NDJSON: one record per line) one at a time,
+# and writes them one at a time, compactly
+from json_stream import iter_json_records, JSONRecordWriter
+
+with JSONRecordWriter(f"{parent_dir}/old_trees.ndjson") as writer:
+    for tree in iter_json_records(f"{parent_dir}/large_100_age_1000.json", keys=["Tree", "age"]):
+        if tree["age"] > 1500:
+            writer.write(tree) # {"Tree":"1","age":1673}
+
+
+
 #---------------------------------------------#
 #------------ data conversion ----------------#
 #---------------------------------------------#
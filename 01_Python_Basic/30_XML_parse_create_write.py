@@ -128,6 +128,28 @@ def summarize_xml_structure(element, level=0):
 summarize_xml_structure(root_food)
 
 
+#####################################################
+## Large XML files: streaming with ET.iterparse() ##
+#####################################################
+
+# summarize_xml_structure() prints ONE LINE PER ELEMENT, needs the whole tree in memory (ET.parse),
+# and its recursion fails on very deep documents (RecursionError).
+# xml_stream.py (same directory) reads the file piece by piece with ET.iterparse(), removing each element once processed:
+from xml_stream import summarize_structure, print_structure, iter_xml_records, read_xml_table
+
+print_structure(summarize_structure(f'{parent_dir}/music_cd.xml')) # One line per tag path, with its count:
+# CATALOG (1)
+#   CD (26)
+#     TITLE (26)
+#     ...
+
+for food in iter_xml_records(f'{parent_dir}/food.xml'): # One <food> record at a time, as a dictionary
+    print(food["name"], food["calories"]) # Belgian Waffles 650 ...
+
+cds = read_xml_table(f'{parent_dir}/music_cd.xml', dtypes={"PRICE": "float64"}) # Column-oriented: {"TITLE": [...], "PRICE": array([...])}
+print(cds["PRICE"].mean()) # 9.115384615384615
+
+
 #-----------------------------------------------#
 #-------------- Navigate XML tree --------------#
 #-----------------------------------------------#
@@ -155,6 +155,26 @@ shutil.unpack_archive('./demo_archive.zip',  # source archive file to extract
                       'zip')  # format (optional, inferred from the filename)
 
 
+#############################################################
+## Large directories: parallel archive, extract, copytree ##
+#############################################################
+
+# shutil.make_archive(), shutil.unpack_archive() and shutil.copytree() handle one file at a time, on one CPU core.
+# parallel_archive.py (same directory) compresses the .tar.gz in a thread pool (independent gzip members, readable by tar),
+# extracts .zip members in parallel (.tar streamed), and copies the files of a tree in parallel (optionally as hard links)
+from parallel_archive import make_archive, extract_archive, copytree, print_progress
+
+archive_path = make_archive('/home/longdpt/Documents/Academic/DataScience_MachineLearning/data_backup',  # base name (.tar.gz is added)
+                            './05_Pandas_DataR_dataframe/data',  # root directory to archive
+                            progress=print_progress)  # 2.5 / 2.5 MB (100.0%)
+
+extract_archive(archive_path, './extracted_data_backup')  # (also for .zip archives)
+
+copytree('./05_Pandas_DataR_dataframe/data',
+         '/home/longdpt/Documents/Academic/DataScience_MachineLearning/data_copy',
+         link='hard')  # Hard links: no data copied (files shared with the source), falls back to a copy if impossible
+
+
 #--------------------------------------------------------------------------------------------------------------------#
 #------------------------------------- 6. Disk usage and Cmd Location -----------------------------------------------#
 #--------------------------------------------------------------------------------------------------------------------#
@@ -450,4 +450,24 @@ for dirpath, dirnames, filenames in Path(target_path).joinpath("01_Python_Basic"
 # File: 05_Casting_Convert_Datatypes.py
 # File: 06_Operators.py
 # File: 07_input_eval.py
-# File: 10_String_methods_Cell.py
\ No newline at end of file
+# File: 10_String_methods_Cell.py
+
+#--------------------------------------------------------------------------------------------------------------#
+#------------------------------------- 5. Large trees: parallel search with cache -----------------------------#
+#--------------------------------------------------------------------------------------------------------------#
+
+# rglob() and walk() list one directory at a time, and counting the matches needs one more loop.
+# file_search.py (same directory) lists the directories with os.scandir() in a thread pool,
+# applies the glob pattern and the regular expression in the same pass, and counts without building lists.
+# The listings are cached (keyed on the modification time of each directory): repeating a search is much faster.
+import sys
+sys.path.append(str(Path(target_path).joinpath("01_Python_Basic")))
+from file_search import search_files, count_files, count_by_pattern
+
+print(count_files(target_path, glob="*.py")) # 202 (same as sum(1 for _ in Path.cwd().rglob("*.py")))
+print(count_files(target_path, glob="*.py", regex=r"^1\d_")) # glob AND regex in one pass
+
+for path in search_files(demo_path, glob="*.xml"): # Paths as strings, in no particular order
+    print(path)
+
+print(count_by_pattern(target_path, {"python": "*.py", "json": "*.json", "xml": "*.xml"})) # One walk for several patterns
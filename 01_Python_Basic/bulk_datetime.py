@@ -0,0 +1,318 @@
+#--------------------------------------------------------------------------------#
+#---------------- Vectorized date parsing and timezone conversion ---------------#
+#--------------------------------------------------------------------------------#
+
+# 13_datetime_timedelta_pytz.py converts ONE datetime object at a time: datetime.strptime(), tz.localize(), .astimezone().
+# For millions of timestamps (e.g. logs), this module works on NumPy arrays of int64 epochs (seconds since 1970-01-01,
+# or "ms"/"us" with the unit argument):
+# ++ parse_datetimes(): parses an array of strings, with fast paths:
+#    ISO-8601 ("2024-06-18 08:35:12") parsed by NumPy in C, and fixed-width formats ("%d/%m/%Y %H:%M:%S") decoded
+#    from the digits of all the strings at once; any other format is parsed by strptime() ONCE per distinct string.
+#    The parsing plan of a format is compiled once and cached. If a fixed-width string is not a valid datetime
+#    (e.g. second 60, year 0, offset +2500), strptime() parses them instead, so it raises exactly the same ValueError.
+# ++ utc_to_local(), local_to_utc(), convert_timezone(): timezone conversions of whole arrays, using the table of
+#    UTC transitions precomputed by pytz (np.searchsorted() finds the offset of every timestamp)
+# ++ to_datetimes(): back to datetime objects (aware if a timezone is given), only when they are needed
+#
+# Epochs of strings WITHOUT timezone are "wall clock" epochs (as if the time was UTC): localize them with local_to_utc().
+#
+# Usage:
+#     from bulk_datetime import parse_datetimes, local_to_utc, utc_to_local, to_datetimes
+#     local_ny = parse_datetimes(["18/06/2024 12:00:00", "10/03/2024 02:30:00"], "%d/%m/%Y %H:%M:%S")
+#     utc = local_to_utc(local_ny, "America/New_York")        # like tz_NY.localize(...) for every timestamp
+#     local_seoul = utc_to_local(utc, "Asia/Seoul")           # like .astimezone(pytz.timezone('Asia/Seoul'))
+#     print(to_datetimes(local_seoul[:1]))                    # [datetime.datetime(2024, 6, 19, 1, 0)]
+
+import re
+import warnings
+import datetime
+from functools import lru_cache
+import numpy as np
+import pytz
+
+UNIT_FACTORS = {"s": 1, "ms": 1_000, "us": 1_000_000}
+EPOCH = datetime.datetime(1970, 1, 1)
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+# Fixed-width strptime directives: (field, width)
+FIXED_WIDTH_DIRECTIVES = {
+    "%Y": ("year", 4), "%m": ("month", 2), "%d": ("day", 2),
+    "%H": ("hour", 2), "%M": ("minute", 2), "%S": ("second", 2),
+    "%f": ("microsecond", 6), "%z": ("offset", 5), # %z: +HHMM or -HHMM
+}
+
+
+#--------------------------------------------------------------------------------#
+#---------------- Parsing -------------------------------------------------------#
+#--------------------------------------------------------------------------------#
+
+@lru_cache(maxsize=128)
+def compile_format(fmt):
+    """
+    Parsing plan of a strptime format whose fields all have a fixed width (e.g. "%d/%m/%Y %H:%M:%S"):
+    (total width, [(field, start, width)], [(position, literal character)]), or None if the format is not fixed-width.
+    """
+    fields, literals, position = [], [], 0
+
+    for token in re.findall(r"%.|[^%]", fmt):
+        if token == "%%":
+            token = "%"
+        if token.startswith("%") and len(token) == 2:
+            if token not in FIXED_WIDTH_DIRECTIVES:
+                return None # e.g. %b (month names), %-d (no zero padding): not fixed-width
+            field, width = FIXED_WIDTH_DIRECTIVES[token]
+            fields.append((field, position, width))
+            position += width
+        else:
+            if not token.isascii():
+                return None
+            literals.append((position, ord(token)))
+            position += 1
+
+    return position, fields, literals
+
+
+def days_from_civil(year, month, day):
+    # Number of days since 1970-01-01 of (proleptic Gregorian) dates, for arrays (H. Hinnant's algorithm)
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def _parse_fixed_width(strings, plan, unit):
+    # Decode all the strings at once: an (n, width) matrix of bytes, each field read from its columns of digits
+    width, fields, literals = plan
+    data = np.asarray(strings)
+    if len(data) == 0:
+        return np.zeros(0, dtype=np.int64)
+    try:
+        data = data if data.dtype.kind == "S" else data.astype("S") # Bytes: 1 byte per character
+    except UnicodeEncodeError: # Not ASCII: not this format
+        return None
+    if data.dtype.itemsize != width or not np.all(np.char.str_len(data) == width): # Longer or shorter strings
+        return None
+
+    matrix = data.view(np.uint8).reshape(len(data), width)
+    if any(np.any(matrix[:, position] != character) for position, character in literals):
+        return None
+
+    values = {"year": 1900, "month": 1, "day": 1, "hour": 0, "minute": 0, "second": 0, "microsecond": 0, "offset": 0}
+    for field, start, field_width in fields:
+        if field == "offset":
+            sign = np.where(matrix[:, start] == ord("-"), -1, 1)
+            if not np.all(np.isin(matrix[:, start], [ord("+"), ord("-")])):
+                return None
+            digits = matrix[:, start + 1:start + 5].astype(np.int64) - ord("0")
+            if np.any((digits < 0) | (digits > 9)) or np.any(digits[:, 2] > 5): # Minutes of the offset: 00 to 59
+                return None
+            if np.any(digits[:, 0] * 10 + digits[:, 1] > 23): # Hours of the offset: 00 to 23
+                return None
+            values["offset"] = sign * ((digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 2] * 10 + digits[:, 3]) * 60)
+            continue
+
+        digits = matrix[:, start:start + field_width].astype(np.int64) - ord("0")
+        if np.any((digits < 0) | (digits > 9)):
+            return None
+        values[field] = digits @ (10 ** np.arange(field_width - 1, -1, -1))
+
+    if not np.all(_valid_ranges(values)):
+        return None # strptime() raises the ValueError of the first impossible date or time
+
+    days = days_from_civil(values["year"], values["month"], values["day"])
+    seconds = days * 86400 + values["hour"] * 3600 + values["minute"] * 60 + values["second"] - values["offset"]
+    factor = UNIT_FACTORS[unit]
+    return seconds * factor + values["microsecond"] // (1_000_000 // factor)
+
+
+def _valid_ranges(values):
+    # Mask of the dates and times that datetime accepts (year 1 to 9999, existing day, seconds up to 59)
+    year, month, day = np.broadcast_arrays(values["year"], values["month"], values["day"])
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_ok = (month >= 1) & (month <= 12)
+    days_in_month = DAYS_IN_MONTH[np.where(month_ok, month, 0)] + ((month == 2) & leap)
+    valid = month_ok & (day >= 1) & (day <= days_in_month) & (year >= 1)
+    valid &= (np.asarray(values["hour"]) <= 23) & (np.asarray(values["minute"]) <= 59) & (np.asarray(values["second"]) <= 59)
+    return valid
+
+
+def _parse_each_distinct(strings, parse, unit):
+    # Parse every DISTINCT string once with parse(string) -> datetime (logs repeat the same dates/timestamps a lot)
+    distinct, inverse = np.unique(np.asarray(strings, dtype=str), return_inverse=True)
+    factor = UNIT_FACTORS[unit]
+    epochs = np.empty(len(distinct), dtype=np.int64)
+
+    for i, string in enumerate(distinct):
+        value = parse(str(string)) # A plain str, for the messages of the errors
+        if value.tzinfo is not None: # Aware: the epoch is in UTC
+            value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        delta = value - EPOCH
+        epochs[i] = (delta.days * 86400 + delta.seconds) * factor + delta.microseconds // (1_000_000 // factor)
+
+    return epochs[inverse.reshape(-1)]
+
+
+def parse_datetimes(strings, fmt=None, unit="s"):
+    """
+    Parse an array (or list) of strings into an int64 array of epochs in unit ("s", "ms" or "us").
+    fmt: a strptime format, or None for ISO-8601 ("2024-06-18", "2024-06-18 08:35:12", "2024-06-18T08:35:12+07:00").
+    Strings with a timezone (%z, or an ISO offset) give UTC epochs, the others give wall-clock epochs.
+    """
+    if unit not in UNIT_FACTORS:
+        raise ValueError(f"unit must be one of {list(UNIT_FACTORS)}, not {unit!r}")
+
+    if fmt is None:
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error") # Timezone offsets are not supported by NumPy (only a warning)
+                parsed = np.asarray(strings, dtype=f"datetime64[{unit}]")
+            if not np.any(np.isnat(parsed)): # NumPy reads "" and "NaT" as NaT: fromisoformat() raises the ValueError
+                return parsed.astype(np.int64)
+        except (ValueError, UserWarning, DeprecationWarning):
+            pass
+        return _parse_each_distinct(strings, datetime.datetime.fromisoformat, unit)
+
+    plan = compile_format(fmt)
+    if plan is not None:
+        epochs = _parse_fixed_width(strings, plan, unit)
+        if epochs is not None:
+            return epochs
+
+    return _parse_each_distinct(strings, lambda string: datetime.datetime.strptime(string, fmt), unit)
+
+
+#--------------------------------------------------------------------------------#
+#---------------- Timezone conversion with transition tables --------------------#
+#--------------------------------------------------------------------------------#
+
+@lru_cache(maxsize=64)
+def transition_table(timezone_name):
+    """
+    The UTC transitions of a pytz timezone as arrays (computed once per timezone):
+    (UTC epochs in seconds of the transitions, UTC offsets in seconds, DST flags, tzinfo objects) of each period.
+    """
+    tz = pytz.timezone(timezone_name)
+
+    if not hasattr(tz, "_utc_transition_times"): # Fixed offset (UTC, Etc/GMT+5...): a single period
+        offset = int(tz.utcoffset(datetime.datetime(2000, 1, 1)).total_seconds())
+        return np.array([np.iinfo(np.int64).min // 2], dtype=np.int64), np.array([offset]), np.array([False]), [tz]
+
+    transitions = np.array([(moment - EPOCH) // datetime.timedelta(seconds=1) for moment in tz._utc_transition_times], dtype=np.int64)
+    offsets = np.array([int(info[0].total_seconds()) for info in tz._transition_info], dtype=np.int64)
+    dst = np.array([bool(info[1]) for info in tz._transition_info])
+    tzinfos = [tz._tzinfos[info] for info in tz._transition_info] # The tzinfo pytz attaches to a datetime of each period
+    return transitions, offsets, dst, tzinfos
+
+
+def _timezone_name(tz):
+    return tz if isinstance(tz, str) else tz.zone
+
+
+def utc_offsets(utc_epochs, tz, unit="s"):
+    """The UTC offset (in unit) in timezone tz at every UTC epoch."""
+    factor = UNIT_FACTORS[unit]
+    transitions, offsets, _, _ = transition_table(_timezone_name(tz))
+    periods = np.searchsorted(transitions, np.floor_divide(utc_epochs, factor), side="right") - 1
+    return offsets[np.maximum(periods, 0)] * factor
+
+
+def utc_to_local(utc_epochs, tz, unit="s"):
+    """UTC epochs -> wall-clock epochs in timezone tz (the vectorized .astimezone(tz))."""
+    utc_epochs = np.asarray(utc_epochs, dtype=np.int64)
+    return utc_epochs + utc_offsets(utc_epochs, tz, unit)
+
+
+def local_to_utc(local_epochs, tz, unit="s", is_dst=False):
+    """
+    Wall-clock epochs in timezone tz -> UTC epochs (the vectorized tz.localize(..., is_dst=is_dst)).
+    The ambiguous times (the repeated hour when the clocks go back) and the non-existent times (the skipped hour
+    when the clocks go forward) are resolved by is_dst exactly like pytz; is_dst=None raises an error instead.
+    """
+    factor = UNIT_FACTORS[unit]
+    local_epochs = np.asarray(local_epochs, dtype=np.int64)
+    local_seconds = np.floor_divide(local_epochs, factor)
+    transitions, offsets, dst, _ = transition_table(_timezone_name(tz))
+
+    # Wall-clock start and end of every period
+    local_starts = transitions + offsets
+    local_ends = np.append(transitions[1:], np.iinfo(np.int64).max // 2) + offsets
+
+    period = np.maximum(np.searchsorted(local_starts, local_seconds, side="right") - 1, 0) # The last period started (wall clock)
+    previous = np.maximum(period - 1, 0)
+
+    ambiguous = (period > 0) & (local_seconds < local_ends[previous])  # Also inside the end of the previous period
+    nonexistent = local_seconds >= local_ends[period]                   # After the end of its period: in the gap
+
+    if is_dst is None and np.any(ambiguous | nonexistent):
+        first = int(np.argmax(ambiguous | nonexistent))
+        moment = EPOCH + datetime.timedelta(seconds=int(local_seconds[first]))
+        raise (pytz.exceptions.AmbiguousTimeError if ambiguous[first] else pytz.exceptions.NonExistentTimeError)(moment)
+
+    # Same choices as pytz:
+    # ambiguous: the previous period or this one, the one whose DST flag is is_dst, otherwise the previous one if is_dst
+    # non-existent: the offset of the next period if is_dst, otherwise the offset of the period before the gap
+    is_dst = bool(is_dst)
+    next_period = np.minimum(period + 1, len(offsets) - 1)
+    flag_decides = dst[previous] != dst[period]
+    take_previous = ambiguous & np.where(flag_decides, dst[previous] == is_dst, is_dst)
+    chosen = np.where(take_previous, previous, period)
+    if is_dst:
+        chosen = np.where(nonexistent, next_period, chosen)
+
+    return local_epochs - offsets[chosen] * factor
+
+
+def convert_timezone(local_epochs, from_tz, to_tz, unit="s", is_dst=False):
+    """Wall-clock epochs in from_tz -> wall-clock epochs in to_tz."""
+    return utc_to_local(local_to_utc(local_epochs, from_tz, unit, is_dst), to_tz, unit)
+
+
+#--------------------------------------------------------------------------------#
+#---------------- Back to datetime objects, on demand ---------------------------#
+#--------------------------------------------------------------------------------#
+
+def to_datetime64(epochs, unit="s"):
+    # A view of the epochs as NumPy datetime64 (printing, np.datetime_as_string()...), without copy
+    return np.asarray(epochs, dtype=np.int64).view(f"datetime64[{unit}]")
+
+
+def to_datetimes(epochs, tz=None, unit="s"):
+    """
+    Convert epochs into a list of datetime objects:
+    tz=None: naive datetimes of the epochs as they are; tz given: the epochs are UTC, the datetimes are aware in tz
+    (the same objects as utc_datetime.astimezone(pytz.timezone(tz))).
+    """
+    epochs = np.asarray(epochs, dtype=np.int64)
+    if tz is None:
+        return to_datetime64(epochs, unit).astype("datetime64[us]").astype(object).tolist()
+
+    factor = UNIT_FACTORS[unit]
+    transitions, offsets, _, tzinfos = transition_table(_timezone_name(tz))
+    periods = np.maximum(np.searchsorted(transitions, np.floor_divide(epochs, factor), side="right") - 1, 0)
+    local = to_datetime64(epochs + offsets[periods] * factor, unit).astype("datetime64[us]").astype(object).tolist()
+    return [moment.replace(tzinfo=tzinfos[period]) for moment, period in zip(local, periods.tolist())]
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(0)
+    utc = rng.integers(1_600_000_000, 1_750_000_000, 1_000_000)
+    strings = np.datetime_as_string(to_datetime64(utc))                                  # "2024-06-18T08:35:12"
+    log_strings = [time.strftime("%d/%m/%Y %H:%M:%S", time.gmtime(epoch)) for epoch in utc[:200_000].tolist()]
+
+    t0 = time.perf_counter()
+    tz_NY, tz_Seoul = pytz.timezone("America/New_York"), pytz.timezone("Asia/Seoul")
+    per_object = [tz_NY.localize(datetime.datetime.strptime(string, "%d/%m/%Y %H:%M:%S")).astimezone(tz_Seoul) for string in log_strings]
+    print(f"strptime + localize + astimezone, per object: {time.perf_counter() - t0:.3f} s ({len(log_strings):,} strings)")
+
+    t0 = time.perf_counter()
+    seoul = utc_to_local(local_to_utc(parse_datetimes(log_strings, "%d/%m/%Y %H:%M:%S"), "America/New_York"), "Asia/Seoul")
+    print(f"parse_datetimes + local_to_utc + utc_to_local: {time.perf_counter() - t0:.3f} s ({len(log_strings):,} strings)")
+    print([moment.replace(tzinfo=None) for moment in per_object[:3]] == to_datetimes(seoul[:3]))  # True
+
+    t0 = time.perf_counter()
+    epochs = parse_datetimes(strings)
+    print(f"parse_datetimes (ISO-8601): {time.perf_counter() - t0:.3f} s ({len(strings):,} strings), same epochs: {np.array_equal(epochs, utc)}")
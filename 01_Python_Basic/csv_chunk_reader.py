@@ -0,0 +1,232 @@
+#--------------------------------------------------------------------------------#
+#---------------- Parallel chunked reader for .csv and .tsv files ---------------#
+#--------------------------------------------------------------------------------#
+
+# Reusable version of process_csv_chunks() (28_CSV_TSV_open_read_write.py) for large files:
+# ++ the delimiter is sniffed from the beginning of the file (no hardcoded "\t" or ",")
+# ++ the file is split into chunks by BYTE OFFSET (each boundary moved to the next line start),
+#    so every chunk can be read and parsed by a different worker process, without reading the file beforehand
+# ++ quoted fields with line breaks cannot be split at line starts: they are looked for in the first 64 KB (then the file
+#    is read by a single process), and every worker checks its own chunk; if one is found further, the rest of the file
+#    is read by a single process from that chunk on (ordered=True), or a MultilineRecordError is raised (ordered=False)
+# ++ rows with more or fewer fields than the header raise a ValueError with their line number (no column is cut)
+# ++ the chunks are column-oriented: {column: list of values}, or NumPy arrays for the columns given in dtypes
+# ++ a callback can process each chunk inside the worker process, its results are delivered in order or as soon as ready
+#
+# Usage:
+#     from csv_chunk_reader import read_csv_chunks
+#     for chunk in read_csv_chunks("weather.tsv", chunk_bytes=1_000_000, workers=4, dtypes={"MaxTemp": "float64"}):
+#         print(len(chunk["MaxTemp"]), chunk["MaxTemp"].mean())
+
+import io
+import os
+import csv
+import multiprocessing
+from functools import partial
+from itertools import islice
+import numpy as np
+
+SAMPLE_SIZE = 64 * 1024 # Number of bytes read to sniff the dialect
+
+
+class MultilineRecordError(ValueError):
+    """A chunk holds a quoted field with line breaks, so it cannot be parsed on its own."""
+
+
+def sniff_dialect(file_path, sample_size=SAMPLE_SIZE):
+    """Guess the dialect (delimiter, quote character...) of a .csv/.tsv file from its first bytes."""
+    with open(file_path, mode="r", newline="", encoding="utf-8") as file_pointer:
+        sample = file_pointer.read(sample_size)
+
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",\t;|")
+        if dialect.quotechar not in sample: # No quoted field to learn from: quotes inside quoted fields are doubled ("") by default
+            dialect.doublequote = True
+        return dialect
+    except csv.Error: # Not enough information in the sample (e.g. a single column), decide by the file extension
+        return csv.excel_tab if str(file_path).endswith(".tsv") else csv.excel
+
+
+def has_multiline_records(file_path, dialect, sample_size=SAMPLE_SIZE):
+    """Check (on the first bytes) whether quoted fields contain line breaks, which prevents splitting the file at line starts."""
+    with open(file_path, mode="r", newline="", encoding="utf-8") as file_pointer:
+        lines = file_pointer.read(sample_size).splitlines(keepends=True)[:-1] # The last line may be cut by the sample
+
+    return sum(1 for _ in csv.reader(lines, dialect)) != len(lines)
+
+
+def read_header(file_path, dialect):
+    """Return the column names and the byte offset where the data starts (right after the header line)."""
+    with open(file_path, mode="rb") as file_pointer:
+        header_line = file_pointer.readline()
+
+    columns = next(csv.reader([header_line.decode("utf-8")], dialect))
+    return columns, len(header_line)
+
+
+def find_chunk_boundaries(file_path, data_start, chunk_bytes):
+    """Split the bytes [data_start, end of file) into (start, end) chunks of about chunk_bytes, each boundary at a line start."""
+    file_size = os.path.getsize(file_path)
+    boundaries = []
+    start = data_start
+
+    with open(file_path, mode="rb") as file_pointer:
+        while start < file_size:
+            file_pointer.seek(min(start + chunk_bytes, file_size))
+            file_pointer.readline() # Move to the start of the next line (no line is cut in two)
+            end = min(file_pointer.tell(), file_size)
+            boundaries.append((start, end))
+            start = end
+
+    return boundaries
+
+
+def count_lines(file_path, end):
+    """Count the lines of a file before the byte offset end (to report line numbers of a chunk read from the middle)."""
+    line_count = 0
+    with open(file_path, mode="rb") as file_pointer:
+        while end > 0 and (block := file_pointer.read(min(end, 1024 * 1024))):
+            line_count += block.count(b"\n")
+            end -= len(block)
+    return line_count
+
+
+def check_row_lengths(reader, columns, line_offset=lambda: 0):
+    """
+    Yield the rows of a csv.reader, raising a ValueError for the first row whose number of fields differs from the header.
+    line_offset: a function returning the number of lines before the first row read (only called to report an error)
+    """
+    for row in reader:
+        if row and len(row) != len(columns): # Empty lines are skipped later
+            raise ValueError(f"Line {line_offset() + reader.line_num}: {len(row)} fields instead of {len(columns)} ({', '.join(columns)})")
+        yield row
+
+
+def rows_to_columns(rows, columns, dtypes=None):
+    """
+    Turn a list of rows into a column-oriented chunk {column: list}, as NumPy arrays for the columns in dtypes.
+    Every row must have one field per column (see check_row_lengths()), a ragged row raises a ValueError.
+    """
+    rows = [row for row in rows if row] # Skip the empty lines
+    if any(len(row) != len(columns) for row in rows): # zip() would cut every column to the shortest row
+        raise ValueError(f"Every row should have {len(columns)} fields ({', '.join(columns)})")
+    chunk = {column: list(values) for column, values in zip(columns, zip(*rows))} if rows else {column: [] for column in columns}
+
+    for column, dtype in (dtypes or {}).items():
+        chunk[column] = np.asarray(chunk[column], dtype=dtype)
+
+    return chunk
+
+
+def parse_chunk(file_path, columns, dialect_params, dtypes, callback, boundary):
+    """
+    Worker function: read and parse the bytes of one chunk, then apply the callback (if any) inside the worker.
+    Raise a MultilineRecordError if a record of the chunk spans several lines (or a quoted field is left open at its end).
+    """
+    start, end = boundary
+
+    with open(file_path, mode="rb") as file_pointer:
+        file_pointer.seek(start)
+        text = file_pointer.read(end - start).decode("utf-8")
+
+    reader = csv.reader(io.StringIO(text, newline=""), **dialect_params, strict=True) # strict: an open quote at the end raises
+    rows = []
+
+    try:
+        for row in check_row_lengths(reader, columns, partial(count_lines, file_path, start)):
+            if reader.line_num != len(rows) + 1: # One record per line, unless a quoted field holds line breaks
+                raise MultilineRecordError(f"Quoted field with line breaks in the chunk at byte {start}")
+            rows.append(row)
+    except csv.Error as error:
+        raise MultilineRecordError(f"Quoted field left open in the chunk at byte {start}") from error
+
+    chunk = rows_to_columns(rows, columns, dtypes)
+    return callback(chunk) if callback is not None else chunk
+
+
+def _dialect_params(dialect):
+    # A sniffed dialect is a local class that cannot be pickled to the worker processes, only its parameters are sent
+    return {
+        "delimiter": dialect.delimiter,
+        "quotechar": dialect.quotechar,
+        "doublequote": dialect.doublequote,
+        "skipinitialspace": dialect.skipinitialspace,
+        "quoting": dialect.quoting,
+        "escapechar": dialect.escapechar
+    }
+
+
+def _sequential_chunks(file_path, dialect_params, dtypes, callback, chunk_rows, columns=None, start=0):
+    # Fallback for files whose records span several lines: one process, chunks of chunk_rows rows,
+    # from the beginning of the file (header included), or from the byte offset start of a record (columns given)
+    with open(file_path, mode="rb") as binary_pointer:
+        binary_pointer.seek(start)
+        reader = csv.reader(io.TextIOWrapper(binary_pointer, encoding="utf-8", newline=""), **dialect_params)
+        columns = columns or next(reader)
+        rows = check_row_lengths(reader, columns, partial(count_lines, file_path, start))
+
+        while chunk_rows_read := list(islice(rows, chunk_rows)):
+            chunk = rows_to_columns(chunk_rows_read, columns, dtypes)
+            yield callback(chunk) if callback is not None else chunk
+
+
+def read_csv_chunks(file_path, chunk_bytes=8 * 1024 * 1024, workers=None, dtypes=None, callback=None, ordered=True, dialect=None):
+    """
+    Generator reading a .csv/.tsv file in column-oriented chunks, parsed in parallel by worker processes.
+
+    chunk_bytes: the approximate size of a chunk in bytes
+    workers: the number of worker processes (default: all CPU cores, 1: no process is created)
+    dtypes: {column: NumPy dtype} of the columns to convert into arrays (the others stay lists of strings)
+    callback: a function applied to each chunk inside the workers (must be picklable: defined at the top level of a module),
+              its results are yielded instead of the chunks
+    ordered: yield in the order of the file (True), or as soon as a chunk is ready (False)
+    dialect: a csv dialect, sniffed from the file if not given
+
+    Quoted fields with line breaks are looked for in the first 64 KB (the whole file is then read by a single process).
+    Found further by a worker: with ordered=True, the file is read by a single process from that chunk on;
+    with ordered=False, a MultilineRecordError is raised (the chunks yielded before it may not be in the right order).
+    """
+    dialect = dialect or sniff_dialect(file_path)
+    dialect_params = _dialect_params(dialect)
+    workers = workers or os.cpu_count()
+    average_line_bytes = 100 # Rough estimation to keep sequential chunks of about chunk_bytes
+    chunk_rows = max(1, chunk_bytes // average_line_bytes)
+
+    if has_multiline_records(file_path, dialect):
+        yield from _sequential_chunks(file_path, dialect_params, dtypes, callback, chunk_rows)
+        return
+
+    columns, data_start = read_header(file_path, dialect)
+    boundaries = find_chunk_boundaries(file_path, data_start, chunk_bytes)
+    worker = partial(parse_chunk, file_path, columns, dialect_params, dtypes, callback)
+    parsed_count = 0 # Chunks yielded in order, the next one starts at a record boundary
+    serial = workers == 1 or len(boundaries) <= 1 # Not worth starting worker processes
+
+    try:
+        if serial:
+            for result in map(worker, boundaries):
+                yield result
+                parsed_count += 1
+            return
+
+        with multiprocessing.Pool(processes=min(workers, len(boundaries))) as pool:
+            results = pool.imap(worker, boundaries) if ordered else pool.imap_unordered(worker, boundaries)
+            for result in results:
+                yield result
+                parsed_count += 1
+
+    except MultilineRecordError:
+        if not (ordered or serial):
+            raise
+        # The chunks before are complete: read the rest of the file in a single process, from the first chunk not yielded
+        yield from _sequential_chunks(file_path, dialect_params, dtypes, callback, chunk_rows, columns, boundaries[parsed_count][0])
+
+
+if __name__ == "__main__":
+    parent_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_data", "csv_tsv_files")
+
+    for chunk in read_csv_chunks(os.path.join(parent_dir, "weather.tsv"), chunk_bytes=256, workers=2):
+        print({column: values[:3] for column, values in chunk.items()})
+
+    for chunk in read_csv_chunks(os.path.join(parent_dir, "drinks.csv"), chunk_bytes=2048, workers=2, ordered=False):
+        print(f"Processing chunk with {len(next(iter(chunk.values())))} rows")
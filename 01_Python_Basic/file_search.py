@@ -0,0 +1,206 @@
+#--------------------------------------------------------------------------------#
+#---------------- Parallel file search with cached directory listings -----------#
+#--------------------------------------------------------------------------------#
+
+# rglob(), walk() and the regex filters of 35_pathlib_glob_rglob_iterdir_walk_PatternSearch.py
+# walk ONE directory at a time, create a Path object for every entry, and the matches are counted by iterating again.
+# For large trees, this module:
+# ++ lists the directories with os.scandir() in a thread pool (listing a directory waits for the disk, not for Python)
+# ++ applies the glob pattern and the regular expression in the same pass, on the names (no Path objects)
+# ++ counts the matches without building any list: count_files()
+# ++ caches the listing of every directory, keyed on the modification time of the directory
+#    (it changes when an entry is added, removed or renamed), so a repeated search over a mostly static tree
+#    only needs one os.stat() per directory
+#
+# Usage:
+#     from file_search import search_files, count_files
+#     for path in search_files("demo_data", glob="*.json"):
+#         print(path)
+#     print(count_files("..", glob="*.py", regex=r"^1\d_"))
+
+import os
+import re
+import fnmatch
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+SKIP_DIRS = (".git", "__pycache__")
+WORKERS = 8 # Threads listing the directories (the GIL is released during the system calls)
+
+
+class DirectoryCache:
+    # {directory: (modification time in ns, (subdirectory names, file names))}
+
+    def __init__(self):
+        self._listings = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._listings)
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+
+    def lookup(self, directory):
+        # Return the modification time of a directory and its cached listing (None if not cached or outdated)
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError: # Removed in the meantime, or no permission: seen as an empty directory
+            return None, ((), ())
+
+        cached = self._listings.get(directory)
+        if cached is not None and cached[0] == mtime:
+            self.hits += 1
+            return mtime, cached[1]
+        return mtime, None
+
+    def listdir(self, directory, mtime=None):
+        # Return (subdirectory names, file names) of a directory, from the cache if the directory was not modified
+        if mtime is None:
+            mtime, listing = self.lookup(directory)
+            if listing is not None:
+                return listing
+
+        listing = _scan_directory(directory)
+        with self._lock:
+            self.misses += 1
+            self._listings[directory] = (mtime, listing)
+        return listing
+
+
+def _scan_directory(directory):
+    subdirectories, files = [], []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False): # Symbolic links to directories are not followed (no loops)
+                    subdirectories.append(entry.name)
+                else:
+                    files.append(entry.name)
+    except OSError:
+        pass
+    return tuple(subdirectories), tuple(files)
+
+
+default_cache = DirectoryCache() # Shared by all the searches of the process
+
+
+def _name_filter(glob=None, regex=None):
+    # Build a single function name -> bool from a glob pattern (like "*.py", matched on the name as rglob() does)
+    # and a regular expression (searched in the name); both are compiled once
+    glob_match = re.compile(fnmatch.translate(glob)).match if glob else None
+    regex_search = re.compile(regex).search if regex else None
+
+    if glob_match and regex_search:
+        return lambda name: glob_match(name) is not None and regex_search(name) is not None
+    return glob_match or regex_search or (lambda name: True)
+
+
+def _walk(root, visit, skip_dirs, workers, cache):
+    # Walk the tree from root with a thread pool: visit(directory, subdirectory names, file names) is called
+    # in the worker threads for every directory, its results are yielded as soon as ready (no order)
+    skip_dirs = set(skip_dirs)
+    cache = cache if cache is not None else DirectoryCache()
+
+    def scan(directory, mtime=None):
+        # List a directory, then walk its subdirectories in the same thread as long as their listing is cached
+        # (no system call but os.stat()); only the subdirectories to list from the disk are returned to the pool
+        results, to_list = [], []
+        stack = [(directory, cache.listdir(directory, mtime))]
+
+        while stack:
+            directory, (subdirectories, files) = stack.pop()
+            subdirectories = [name for name in subdirectories if name not in skip_dirs]
+            results.append(visit(directory, subdirectories, files))
+
+            for name in subdirectories:
+                subdirectory = os.path.join(directory, name)
+                mtime, listing = cache.lookup(subdirectory)
+                if listing is not None:
+                    stack.append((subdirectory, listing))
+                else:
+                    to_list.append((subdirectory, mtime))
+
+        return to_list, results
+
+    done = queue.SimpleQueue() # The finished scans, in the order they finish
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        executor.submit(scan, os.fspath(root)).add_done_callback(done.put)
+        running = 1
+
+        while running:
+            future = done.get()
+            running -= 1
+            to_list, results = future.result()
+            for subdirectory, mtime in to_list:
+                executor.submit(scan, subdirectory, mtime).add_done_callback(done.put)
+            running += len(to_list)
+            yield from results
+
+
+def search_files(root, glob=None, regex=None, include_dirs=False, skip_dirs=SKIP_DIRS, workers=WORKERS, cache=default_cache):
+    """
+    Yield the paths (str) of the files under root whose name matches the glob pattern AND the regular expression (if given).
+    include_dirs: also yield the matching directories. The paths are yielded directory by directory, in no particular order.
+    cache: a DirectoryCache (default: shared by the process), None to disable the cache.
+    """
+    name_matches = _name_filter(glob, regex)
+
+    def visit(directory, subdirectories, files):
+        names = (*subdirectories, *files) if include_dirs else files
+        return [os.path.join(directory, name) for name in names if name_matches(name)]
+
+    for matches in _walk(root, visit, skip_dirs, workers, cache):
+        yield from matches
+
+
+def count_files(root, glob=None, regex=None, include_dirs=False, skip_dirs=SKIP_DIRS, workers=WORKERS, cache=default_cache):
+    """Count the files (and directories if include_dirs) under root matching the filters, without building any path."""
+    name_matches = _name_filter(glob, regex)
+
+    def visit(directory, subdirectories, files):
+        count = sum(1 for name in files if name_matches(name))
+        return count + sum(1 for name in subdirectories if name_matches(name)) if include_dirs else count
+
+    return sum(_walk(root, visit, skip_dirs, workers, cache))
+
+
+def count_by_pattern(root, patterns, skip_dirs=SKIP_DIRS, workers=WORKERS, cache=default_cache):
+    """Count the files matching each glob pattern of {label: pattern} in ONE walk, e.g. {"python": "*.py", "json": "*.json"}."""
+    filters = {label: _name_filter(glob=pattern) for label, pattern in patterns.items()}
+
+    def visit(directory, subdirectories, files):
+        return {label: sum(1 for name in files if name_matches(name)) for label, name_matches in filters.items()}
+
+    totals = dict.fromkeys(patterns, 0)
+    for counts in _walk(root, visit, skip_dirs, workers, cache):
+        for label, count in counts.items():
+            totals[label] += count
+    return totals
+
+
+if __name__ == "__main__":
+    import time
+    from pathlib import Path
+
+    basic_dir = os.path.dirname(os.path.abspath(__file__))
+    repository_dir = os.path.dirname(basic_dir)
+
+    for path in sorted(search_files(os.path.join(basic_dir, "demo_data"), glob="*.json")):
+        print(path)
+
+    print(count_by_pattern(repository_dir, {"python": "*.py", "json": "*.json", "xml": "*.xml"}))
+
+    for method, count in [
+        ("Path.rglob()", lambda: sum(1 for _ in Path(repository_dir).rglob("*.py"))),
+        ("count_files() (cold cache)", lambda: count_files(repository_dir, glob="*.py")),
+        ("count_files() (warm cache)", lambda: count_files(repository_dir, glob="*.py")),
+    ]:
+        t0 = time.perf_counter()
+        result = count()
+        print(f"{method:<28} {result:>6} files in {(time.perf_counter() - t0) * 1000:8.2f} ms")
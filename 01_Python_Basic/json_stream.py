@@ -0,0 +1,238 @@
+#--------------------------------------------------------------------------------#
+#---------------- Streaming reader and writer for large JSON files --------------#
+#--------------------------------------------------------------------------------#
+
+# json.load() (29_JSON_load_dump.py) materializes the whole document in memory, and json.dump(..., indent=4)
+# spends most of its time on pretty-printing. For large arrays of records (like large_100_age_1000.json):
+# ++ iter_json_records() yields the records ONE AT A TIME, from a JSON array or from NDJSON (one JSON record per line),
+#    with a bounded memory (the read buffer and the current record), optionally keeping only some keys of each record
+# ++ JSONRecordWriter writes the records one at a time, compactly (no indentation), as a JSON array or as NDJSON
+# ++ benchmark() compares them with json.load() and json.dump()
+#
+# Usage:
+#     from json_stream import iter_json_records, JSONRecordWriter
+#     with JSONRecordWriter("old_trees.json") as writer:
+#         for tree in iter_json_records("large_100_age_1000.json", keys=["Tree", "age"]):
+#             if tree["age"] > 1500:
+#                 writer.write(tree)
+
+import os
+import json
+import time
+import random
+import tempfile
+import tracemalloc
+
+BUFFER_SIZE = 64 * 1024 # Number of characters read at once
+MAX_ELEMENT_SIZE = 64 * 1024 * 1024 # Maximum number of characters of an element of a JSON array (bounds the buffer)
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+WHITESPACE = " \t\n\r"
+
+
+def _project(record, keys):
+    # Keep only the given keys of a record (records that are not dictionaries are kept as they are)
+    if keys is None or not isinstance(record, dict):
+        return record
+    return {key: record[key] for key in keys if key in record}
+
+
+def iter_json_array(file_path, keys=None, buffer_size=BUFFER_SIZE, max_element_size=MAX_ELEMENT_SIZE):
+    """
+    Yield the elements of a JSON array file one at a time, decoding them from a sliding buffer.
+    Raise a ValueError for a malformed array (missing or extra comma, array not closed),
+    or for an element that cannot be decoded within max_element_size characters (the buffer never grows beyond it).
+    """
+    decoder = json.JSONDecoder()
+
+    with open(file_path, mode="r", encoding="utf-8") as file_pointer:
+        buffer = file_pointer.read(buffer_size).lstrip(WHITESPACE)
+        if not buffer.startswith("["):
+            raise ValueError(f"{file_path} does not contain a JSON array")
+
+        position, end_of_file = 1, False
+        consumed = 0            # Characters dropped from the buffer (to report positions in the file)
+        expect_element = True   # After "[" or ",": an element is expected, otherwise "," or "]"
+        first_element = True    # Right after "[": "]" closes an empty array
+
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE:
+                position += 1
+
+            if position < len(buffer):
+                char = buffer[position]
+
+                if not expect_element:
+                    if char == "]":
+                        return
+                    if char != ",":
+                        raise ValueError(f"{file_path}: expecting ',' or ']' at character {consumed + position}")
+                    position += 1
+                    expect_element = True
+                    continue
+
+                if char == "]" and first_element:
+                    return
+                if char in ",]":
+                    raise ValueError(f"{file_path}: expecting a value at character {consumed + position}")
+
+                try:
+                    record, record_end = decoder.raw_decode(buffer, position)
+                    # A number cut by the end of the buffer (e.g. "15" of "1500.25") must continue in the next read:
+                    # the element is only complete if followed by a delimiter, or at the end of the file
+                    complete = end_of_file or (record_end < len(buffer) and buffer[record_end] in WHITESPACE + ",]")
+                except json.JSONDecodeError:
+                    if end_of_file:
+                        raise
+                    complete = False
+
+                if complete:
+                    yield _project(record, keys)
+                    position = record_end
+                    expect_element, first_element = False, False
+                    continue
+
+                if len(buffer) - position >= max_element_size: # Invalid element, or too large to be read with a bounded memory
+                    raise ValueError(f"{file_path}: no valid element within {max_element_size} characters from character {consumed + position}")
+
+            elif end_of_file:
+                raise ValueError(f"{file_path}: the JSON array is not closed")
+
+            # The next element is cut by the end of the buffer (or not read yet): drop the consumed part and read more.
+            # At least as much as the part of the element already buffered is read, so that a large element is decoded
+            # again a few times (the buffered part doubles every read) rather than once per buffer_size (quadratic time)
+            cut_size = len(buffer) - position
+            more = file_pointer.read(min(max(buffer_size, cut_size), max_element_size - cut_size))
+            end_of_file = (more == "")
+            consumed += position
+            buffer = buffer[position:] + more
+            position = 0
+
+
+def iter_ndjson(file_path, keys=None):
+    """Yield the records of a newline-delimited JSON file one at a time (empty lines are skipped)."""
+    with open(file_path, mode="r", encoding="utf-8") as file_pointer:
+        for line in file_pointer:
+            if line.strip():
+                yield _project(json.loads(line), keys)
+
+
+def iter_json_records(file_path, keys=None):
+    """Yield the records of a JSON array file or of an NDJSON file (by suffix), keeping only the given keys if any."""
+    if str(file_path).endswith(NDJSON_SUFFIXES):
+        return iter_ndjson(file_path, keys)
+    return iter_json_array(file_path, keys)
+
+
+class JSONRecordWriter:
+    """
+    Write records one at a time as a compact JSON array (default), or as NDJSON (ndjson=True, or a .ndjson/.jsonl suffix).
+    The encoded records are buffered and written by batches of batch_size records.
+    """
+
+    def __init__(self, file_path, ndjson=None, batch_size=1000):
+        self.file_path = file_path
+        self.ndjson = str(file_path).endswith(NDJSON_SUFFIXES) if ndjson is None else ndjson
+        self.batch_size = batch_size
+        self.record_count = 0
+        self._encode = json.JSONEncoder(separators=(",", ":"), check_circular=False).encode # No indentation, no spaces
+        self._batch = []
+        self._file_pointer = None
+
+    def __enter__(self):
+        self._file_pointer = open(self.file_path, mode="w", encoding="utf-8")
+        if not self.ndjson:
+            self._file_pointer.write("[")
+        return self
+
+    def __exit__(self, *exc_info):
+        self._flush()
+        if not self.ndjson:
+            self._file_pointer.write("\n]\n" if self.record_count > 0 else "]\n")
+        self._file_pointer.close()
+
+    def write(self, record):
+        if self.ndjson:
+            self._batch.append(self._encode(record) + "\n")
+        else:
+            self._batch.append(("\n" if self.record_count == 0 else ",\n") + self._encode(record)) # One record per line
+        self.record_count += 1
+
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def _flush(self):
+        self._file_pointer.write("".join(self._batch))
+        self._batch = []
+
+
+#--------------------------------------------------------------------------------#
+#---------------- Benchmark against json.load() and json.dump() -----------------#
+#--------------------------------------------------------------------------------#
+
+def _measure(function):
+    # Return the result, the duration (seconds) and the peak memory allocated by Python (MB) of function()
+    # Timed and traced in 2 separate runs, since tracing the memory allocations slows down the code a lot
+    t0 = time.perf_counter()
+    result = function()
+    duration = time.perf_counter() - t0
+
+    tracemalloc.start()
+    function()
+    peak_memory = tracemalloc.get_traced_memory()[1] / 1024**2
+    tracemalloc.stop()
+    return result, duration, peak_memory
+
+
+def benchmark(record_count=200_000, seed=0):
+    """Compare writing and reading record_count records with json.dump()/json.load() and with this module."""
+    rng = random.Random(seed)
+    records = [{"Tree": str(i % 100), "age": rng.randint(100, 2000), "circumference": rng.randint(30, 250)} for i in range(record_count)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        pretty_path = os.path.join(directory, "records_indent.json")
+        array_path = os.path.join(directory, "records_stream.json")
+        ndjson_path = os.path.join(directory, "records_stream.ndjson")
+
+        def dump_indent():
+            with open(pretty_path, "w") as file_pointer:
+                json.dump(records, file_pointer, indent=4)
+
+        def stream_write(path):
+            with JSONRecordWriter(path) as writer:
+                writer.write_many(records)
+
+        def load_all():
+            with open(pretty_path) as file_pointer:
+                return sum(record["age"] for record in json.load(file_pointer))
+
+        def stream_read(path, keys=None):
+            return sum(record["age"] for record in iter_json_records(path, keys))
+
+        timings = [
+            ("write", "json.dump(indent=4)", _measure(dump_indent)),
+            ("write", "JSONRecordWriter (array)", _measure(lambda: stream_write(array_path))),
+            ("write", "JSONRecordWriter (ndjson)", _measure(lambda: stream_write(ndjson_path))),
+            ("read", "json.load()", _measure(load_all)),
+            ("read", "iter_json_records (array)", _measure(lambda: stream_read(array_path))),
+            ("read", "iter_json_records (ndjson)", _measure(lambda: stream_read(ndjson_path))),
+            ("read", "iter_json_records (ndjson, keys=['age'])", _measure(lambda: stream_read(ndjson_path, ["age"]))),
+        ]
+
+    print(f"{record_count:,} records:")
+    for operation, method, (_, duration, peak_memory) in timings:
+        print(f"++ {operation:<5} {method:<42} {duration:7.3f} s, peak memory = {peak_memory:8.2f} MB")
+
+    return timings
+
+
+if __name__ == "__main__":
+    json_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_data", "json_files")
+
+    for tree in iter_json_records(os.path.join(json_dir, "large_100_age_1000.json"), keys=["Tree", "age"]):
+        print(tree) # {'Tree': '1', 'age': 1004} ...
+
+    benchmark()
@@ -0,0 +1,327 @@
+#--------------------------------------------------------------------------------#
+#---------------- Parallel archives and copytree for large directories ----------#
+#--------------------------------------------------------------------------------#
+
+# shutil.make_archive(), shutil.unpack_archive() and shutil.copytree() (32_shutil_os_Module_...py)
+# compress, extract and copy ONE file at a time. To back up large data directories, this module:
+# ++ make_archive(): creates a .tar.gz whose compression is split over a thread pool: the tar stream is cut into blocks,
+#    each block is compressed into an independent gzip member (zlib releases the GIL while compressing), and the members
+#    are written in order. A gzip file made of several members is standard: tar, gzip and shutil.unpack_archive() read it.
+# ++ extract_archive(): extracts the members of a .zip in parallel (each thread reads its own handle of the archive),
+#    and streams a .tar/.tar.gz member by member ("r|*" mode: no seek, no temporary copy)
+# ++ copytree(): copies the files in a thread pool, with fast paths: hard links (link="hard")
+#    or copy-on-write clones (link="reflink", on Btrfs/XFS: no data is copied until modified)
+# ++ a progress callback progress(done_bytes, total_bytes) for the 3 functions
+# Parallel creation of .zip files is not offered: zipfile cannot write members compressed by another thread.
+#
+# Usage:
+#     from parallel_archive import make_archive, extract_archive, copytree
+#     archive = make_archive("data_backup", "../05_Pandas_DataR_dataframe/data", progress=print_progress)
+#     extract_archive(archive, "restored_data")
+#     copytree("../05_Pandas_DataR_dataframe/data", "data_copy", link="reflink")
+
+import os
+import sys
+import bz2
+import gzip
+import lzma
+import zlib
+import shutil
+import tarfile
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+try:
+    import fcntl # Unix only
+except ImportError:
+    fcntl = None
+
+WORKERS = os.cpu_count() or 1
+BLOCK_SIZE = 1024 * 1024 # Bytes of the tar stream compressed in each gzip member
+FICLONE = 0x40049409     # Linux ioctl cloning a file (reflink)
+
+
+def print_progress(done_bytes, total_bytes):
+    # A simple progress callback: percentage on a single line of the terminal
+    percentage = 100 * done_bytes / total_bytes if total_bytes else 100
+    print(f"\r{done_bytes / 1024**2:10.1f} / {total_bytes / 1024**2:.1f} MB ({percentage:5.1f}%)", end="\n" if done_bytes >= total_bytes else "", file=sys.stderr)
+
+
+def _tree_entries(root_dir):
+    # Return the directories and the files (relative paths, sorted) under root_dir, and the total size of the files
+    # (the symbolic links to directories are not followed, they are listed with the files)
+    directories, files, total_bytes = [], [], 0
+
+    for dirpath, dirnames, filenames in os.walk(root_dir):
+        linked_dirs = [name for name in dirnames if os.path.islink(os.path.join(dirpath, name))]
+        dirnames[:] = sorted(set(dirnames) - set(linked_dirs))
+        relative_dir = os.path.relpath(dirpath, root_dir)
+        if relative_dir != ".":
+            directories.append(relative_dir)
+        for filename in sorted(filenames + linked_dirs):
+            relative_path = os.path.normpath(os.path.join(relative_dir, filename))
+            files.append(relative_path)
+            total_bytes += os.lstat(os.path.join(root_dir, relative_path)).st_size
+
+    return directories, files, total_bytes
+
+
+#------------------------------------------------------------------------------------#
+#---------------- Archive creation: parallel gzip members ---------------------------#
+#------------------------------------------------------------------------------------#
+
+def _gzip_member(block, level):
+    # Compress a block into a complete gzip member (wbits=31: gzip header and trailer)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+
+class ParallelGzipWriter:
+    """
+    Write-only file object compressing its data into gzip members of block_size bytes, in a thread pool.
+    At most 2 * workers blocks are in memory at the same time; the members are written in order.
+    """
+
+    def __init__(self, fileobj, level=6, block_size=BLOCK_SIZE, workers=WORKERS):
+        self.fileobj = fileobj
+        self.level = level
+        self.block_size = block_size
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = deque() # Futures of the compressed members, in the order of the stream
+        self._buffer = bytearray()
+        self._written_members = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, data):
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block):
+        self._pending.append(self._executor.submit(_gzip_member, block, self.level))
+        while len(self._pending) > 2 * self.workers: # Bounded memory: wait for the oldest member
+            self._write_oldest()
+
+    def _write_oldest(self):
+        self.fileobj.write(self._pending.popleft().result())
+        self._written_members += 1
+
+    def close(self):
+        if self._executor is None:
+            return
+        if self._buffer or self._written_members + len(self._pending) == 0: # An empty stream is still 1 gzip member
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self._write_oldest()
+        self._executor.shutdown()
+        self._executor = None
+
+
+def make_archive(base_name, root_dir, workers=WORKERS, level=6, block_size=BLOCK_SIZE, progress=None):
+    """
+    Archive the content of root_dir into base_name + ".tar.gz", compressed in parallel. Return the path of the archive.
+    level: the compression level (1: fastest, 9: smallest), progress: a function progress(done_bytes, total_bytes)
+    """
+    directories, files, total_bytes = _tree_entries(root_dir)
+    archive_path = os.fspath(base_name) + ".tar.gz"
+    done_bytes = 0
+
+    with open(archive_path, "wb") as file_pointer, \
+         ParallelGzipWriter(file_pointer, level, block_size, workers) as gzip_writer, \
+         tarfile.open(fileobj=gzip_writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        for relative_dir in directories:
+            tar.add(os.path.join(root_dir, relative_dir), arcname=relative_dir, recursive=False)
+
+        for relative_path in files:
+            tar.add(os.path.join(root_dir, relative_path), arcname=relative_path, recursive=False)
+            if progress is not None:
+                done_bytes += os.lstat(os.path.join(root_dir, relative_path)).st_size
+                progress(done_bytes, total_bytes)
+
+    return archive_path
+
+
+#------------------------------------------------------------------------------------#
+#---------------- Archive extraction: parallel zip, streamed tar --------------------#
+#------------------------------------------------------------------------------------#
+
+def _member_path(extract_dir, member):
+    # Target path of a zip member, sanitized like ZipFile.extract(): no drive, no absolute path, no "." or ".." part
+    arcname = os.path.splitdrive(member.filename.replace("/", os.sep))[1]
+    parts = [part for part in arcname.split(os.sep) if part not in ("", os.curdir, os.pardir)]
+    return os.path.join(extract_dir, *parts) if parts else None
+
+
+def _extract_zip(file_path, extract_dir, workers, progress):
+    with zipfile.ZipFile(file_path) as archive:
+        members = archive.infolist()
+    total_bytes = sum(member.file_size for member in members)
+
+    # All the directories are created first, in this thread: the workers only write files
+    # (ZipFile.extract() checks then creates the parent directories, which races when several threads share one)
+    targets = [(member, _member_path(extract_dir, member)) for member in members]
+    for member, target in targets:
+        if target is not None:
+            os.makedirs(target if member.is_dir() else os.path.dirname(target), exist_ok=True)
+    files = [(member, target) for member, target in targets if (target is not None) and not member.is_dir()]
+
+    handles = threading.local() # One handle of the archive per thread (a ZipFile cannot be read by several threads)
+    opened = []
+
+    def extract(member, target):
+        if not hasattr(handles, "archive"):
+            handles.archive = zipfile.ZipFile(file_path)
+            opened.append(handles.archive)
+        with handles.archive.open(member) as source, open(target, "wb") as destination:
+            shutil.copyfileobj(source, destination) # Streamed to the target file
+        return member.file_size
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            done_bytes = 0
+            # The largest members first, so that they do not end up alone at the end
+            for future in as_completed([executor.submit(extract, *file) for file in sorted(files, key=lambda file: -file[0].file_size)]):
+                done_bytes += future.result()
+                if progress is not None:
+                    progress(done_bytes, total_bytes)
+    finally:
+        for archive in opened:
+            archive.close()
+
+
+# Decompressors of the files starting with these magic bytes: they all read the files made of several members/streams,
+# unlike the "r|gz" mode of tarfile, which stops after the first gzip member
+DECOMPRESSORS = {b"\x1f\x8b": gzip.open, b"BZh": bz2.open, b"\xfd7zXZ\x00": lzma.open}
+
+
+def _extract_tar(file_path, extract_dir, progress):
+    # The archive is read as a stream ("r|": no seek), each member is written as soon as it is decompressed
+    total_bytes = os.path.getsize(file_path)
+    extract_filter = {"filter": "data"} if hasattr(tarfile, "data_filter") else {} # Refuse unsafe paths and links
+
+    with open(file_path, "rb") as file_pointer:
+        magic = file_pointer.read(6)
+        file_pointer.seek(0)
+        decompressor = next((opener for prefix, opener in DECOMPRESSORS.items() if magic.startswith(prefix)), None)
+        stream = decompressor(file_pointer) if decompressor is not None else file_pointer
+
+        with stream, tarfile.open(fileobj=stream, mode="r|") as tar:
+            for member in tar:
+                tar.extract(member, extract_dir, **extract_filter)
+                if progress is not None:
+                    progress(file_pointer.tell(), total_bytes) # Bytes of the archive read so far
+
+
+def extract_archive(file_path, extract_dir, workers=WORKERS, progress=None):
+    """
+    Extract a .zip (members in parallel) or a .tar/.tar.gz/.tar.bz2/.tar.xz (streamed) archive into extract_dir.
+    progress: a function progress(done_bytes, total_bytes)
+    """
+    os.makedirs(extract_dir, exist_ok=True)
+
+    if zipfile.is_zipfile(file_path):
+        _extract_zip(file_path, extract_dir, workers, progress)
+    elif tarfile.is_tarfile(file_path):
+        _extract_tar(file_path, extract_dir, progress)
+    else:
+        raise ValueError(f"{file_path} is not a zip or tar archive")
+
+
+#------------------------------------------------------------------------------------#
+#---------------- Parallel copytree with link fast paths ----------------------------#
+#------------------------------------------------------------------------------------#
+
+def _reflink(src, dst):
+    # Clone src into dst (copy-on-write, no data copied); False if not supported (filesystem, OS...)
+    if fcntl is None:
+        return False
+    try:
+        with open(src, "rb") as source, open(dst, "wb") as target:
+            fcntl.ioctl(target.fileno(), FICLONE, source.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _copy_file(src, dst, link):
+    if link == "hard":
+        try:
+            os.link(src, dst)
+            return
+        except OSError: # Another filesystem, or no hard link support: copy
+            pass
+    elif link == "reflink" and _reflink(src, dst):
+        shutil.copystat(src, dst)
+        return
+
+    shutil.copy2(src, dst) # Uses os.sendfile()/copy_file_range() on Linux: the data is copied by the kernel
+
+
+def copytree(src, dst, workers=WORKERS, link=None, symlinks=False, dirs_exist_ok=False, progress=None):
+    """
+    Copy the directory tree src to dst, the files being copied in a thread pool. Return dst.
+    link: None (copy the data), "hard" (hard links: dst shares the files of src),
+          "reflink" (copy-on-write clones where supported); both fall back to a normal copy
+    symlinks: copy the symbolic links to files as links (True) or the files they point to (False)
+    progress: a function progress(done_bytes, total_bytes)
+    """
+    if link not in (None, "hard", "reflink"):
+        raise ValueError(f"link must be None, 'hard' or 'reflink', not {link!r}")
+
+    directories, files, total_bytes = _tree_entries(src)
+
+    os.makedirs(dst, exist_ok=dirs_exist_ok)
+    for relative_dir in directories: # Created before the files, in the main thread
+        os.makedirs(os.path.join(dst, relative_dir), exist_ok=dirs_exist_ok)
+
+    def copy(relative_path):
+        source, target = os.path.join(src, relative_path), os.path.join(dst, relative_path)
+        if os.path.islink(source) and (symlinks or os.path.isdir(source)): # Links to directories are always kept as links
+            os.symlink(os.readlink(source), target)
+        else:
+            _copy_file(source, target, link)
+        return os.lstat(source).st_size
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        done_bytes = 0
+        for future in as_completed([executor.submit(copy, relative_path) for relative_path in files]):
+            done_bytes += future.result()
+            if progress is not None:
+                progress(done_bytes, total_bytes)
+
+    for relative_dir in reversed(directories): # Directory times last: copying the files modified them
+        shutil.copystat(os.path.join(src, relative_dir), os.path.join(dst, relative_dir))
+    shutil.copystat(src, dst)
+
+    return dst
+
+
+if __name__ == "__main__":
+    import time
+    import tempfile
+
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "05_Pandas_DataR_dataframe", "data")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for method, function in [
+            ("shutil.make_archive()", lambda: shutil.make_archive(os.path.join(directory, "serial"), "gztar", data_dir)),
+            ("make_archive()", lambda: make_archive(os.path.join(directory, "parallel"), data_dir, progress=print_progress)),
+            ("shutil.copytree()", lambda: shutil.copytree(data_dir, os.path.join(directory, "copy_serial"))),
+            ("copytree()", lambda: copytree(data_dir, os.path.join(directory, "copy_parallel"))),
+            ("copytree(link='hard')", lambda: copytree(data_dir, os.path.join(directory, "copy_hard"), link="hard")),
+            ("extract_archive()", lambda: extract_archive(os.path.join(directory, "parallel.tar.gz"), os.path.join(directory, "restored"))),
+        ]:
+            t0 = time.perf_counter()
+            function()
+            print(f"{method:<24} {(time.perf_counter() - t0) * 1000:8.1f} ms")
@@ -0,0 +1,350 @@
+#--------------------------------------------------------------------------------#
+#---------------- Compiled-pattern cache and multi-pattern scanning -------------#
+#--------------------------------------------------------------------------------#
+
+# The examples of 12_re_RegularExpression_regex.py call re.search()/re.findall() with the pattern as a string,
+# and 24_String_handling.py (05_Pandas_DataR_dataframe) runs one str.extract() per subject: the same text is scanned
+# once per pattern. This module:
+# ++ cached_compile(): compiles a pattern once, and keeps the compiled patterns in a bounded LRU cache
+#    (re has its own cache, but it is small, and is cleared completely when full before Python 3.12)
+# ++ MultiPattern: many patterns {field: pattern} behind one interface (finditer, extract, findall, count),
+#    each one searched on its own (overlapping fields are all found); single_pass=True combines them into
+#    ONE pattern of alternatives instead, where the first field matching at a position hides the others
+# ++ KeyValuePattern: fields sharing the same layout "<key><value>", like "Math:   2.00":
+#    a single pattern "(Math|Literature|...):\s*(\d+\.\d+)" whose matches are collected by re.findall() (in C)
+#    (a key is followed by its value, so the keys cannot overlap)
+# ++ scan_file(), count_file(): run a MultiPattern over a large text file in parallel chunks (worker processes)
+# ++ extract_series(): extract all the fields of a pandas Series of strings in one pass, in parallel chunks
+#
+# Usage:
+#     from regex_scan import MultiPattern, KeyValuePattern, extract_series
+#     fields = MultiPattern({"email": r"[\w.]+@[\w.]+", "phone": r"\+?\d[\d -]{7,}\d"})
+#     fields.findall("Contact: ann@mail.com, +84 912 345 678")  # {'email': ['ann@mail.com'], 'phone': ['+84 912 345 678']}
+#     scores = KeyValuePattern(["Math", "Literature", "English"], r":\s*(\d+\.\d+)")
+#     scores.extract("Math:   2.00   Literature:   5.50")  # {'Math': '2.00', 'Literature': '5.50', 'English': None}
+#     df_scores = extract_series(df_bac["SCORE"], scores, dtype=float)  # One column per subject
+
+import os
+import re
+import heapq
+import multiprocessing
+from collections import Counter
+from functools import lru_cache, partial
+from csv_chunk_reader import find_chunk_boundaries
+
+PATTERN_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def cached_compile(pattern, flags=0):
+    """re.compile() with a bounded LRU cache: compiling the same pattern again costs a dictionary lookup."""
+    return re.compile(pattern, flags)
+
+
+def pattern_cache_info():
+    # Hits, misses and size of the compiled-pattern cache
+    return cached_compile.cache_info()
+
+
+GLOBAL_FLAGS_PATTERN = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+def _scoped_flags(pattern):
+    # "(?i)abc" -> "(?i:abc)": global inline flags are only valid at the start of the WHOLE pattern,
+    # so they become the flags of the alternative itself before being combined with the others
+    match = GLOBAL_FLAGS_PATTERN.match(pattern)
+    return f"(?{match.group(1)}:{pattern[match.end():]})" if match else pattern
+
+
+def _tagged_matches(matches, order, field):
+    # (start, order, field, match) of every match, to merge the matches of several patterns by position
+    for match in matches:
+        yield match.start(), order, field, match
+
+
+class MultiPattern:
+    """
+    Many patterns {field: pattern} searched in the same text. The value of a field is the first group of its pattern
+    (if it has groups), otherwise the whole match.
+
+    By default, each pattern is searched on its own: the matches of every field are found, even where they overlap
+    (same results as one re.finditer() per pattern, merged in the order of the text).
+    single_pass=True combines them into ONE pattern of alternatives "(?P<f0>pattern 0)|(?P<f1>pattern 1)|...":
+    the text is scanned once, but at a given position only the first field (in the order of the dictionary)
+    that matches is found, so a field overlapping an earlier one is hidden (e.g. "year" listed after "number").
+    It is not necessarily faster (the re engine tries every alternative at every position): measure it first.
+    With single_pass=True, the patterns cannot use numbered backreferences (\\1), since the groups are renumbered.
+    """
+
+    def __init__(self, patterns, flags=0, single_pass=False):
+        self.patterns = dict(patterns)
+        self.flags = flags
+        self.single_pass = single_pass
+        self.fields = list(self.patterns)
+        self._regexes = {field: cached_compile(pattern, flags) for field, pattern in self.patterns.items()}
+
+        if not single_pass:
+            self._value_group = {field: 1 if regex.groups > 0 else 0 for field, regex in self._regexes.items()}
+            return
+
+        alternatives = []
+        self._field_of_group = {}  # {name of the group of an alternative: field}
+        self._value_group = {}     # {field: number of the group holding its value}
+        group_number = 0
+
+        for i, (field, pattern) in enumerate(self.patterns.items()):
+            group_name = f"f{i}" # Fields may not be valid group names ("Tiếng Anh", "2016"...)
+            alternatives.append(f"(?P<{group_name}>{_scoped_flags(pattern)})")
+            group_number += 1
+            self._field_of_group[group_name] = field
+            self._value_group[field] = group_number + 1 if self._regexes[field].groups > 0 else group_number
+            group_number += self._regexes[field].groups
+
+        self.regex = cached_compile("|".join(alternatives), flags)
+
+    def __repr__(self):
+        single_pass = ", single_pass=True" if self.single_pass else ""
+        return f"{self.__class__.__name__}({self.patterns!r}{single_pass})"
+
+    def finditer(self, text):
+        # Yield (field, value, match object) for every match of any field, in the order of the text
+        if self.single_pass:
+            for match in self.regex.finditer(text):
+                field = self._field_of_group[match.lastgroup]
+                yield field, match.group(self._value_group[field]), match
+            return
+
+        matches = [_tagged_matches(regex.finditer(text), order, field) for order, (field, regex) in enumerate(self._regexes.items())]
+        for _, _, field, match in heapq.merge(*matches):
+            yield field, match.group(self._value_group[field]), match
+
+    def extract(self, text):
+        # {field: value of its first match}, None for the fields not found
+        if not self.single_pass:
+            values = {}
+            for field, regex in self._regexes.items():
+                match = regex.search(text)
+                values[field] = match.group(self._value_group[field]) if match else None
+            return values
+
+        values = dict.fromkeys(self.fields)
+        missing = len(self.fields)
+
+        for field, value, _ in self.finditer(text): # Stops as soon as all the fields are found
+            if values[field] is None:
+                values[field] = value
+                missing -= 1
+                if missing == 0:
+                    break
+
+        return values
+
+    def findall(self, text):
+        # {field: list of the values of all its matches}
+        values = {field: [] for field in self.fields}
+        for field, value, _ in self.finditer(text):
+            values[field].append(value)
+        return values
+
+    def count(self, text):
+        # Counter {field: number of matches}
+        if self.single_pass:
+            return Counter(self._field_of_group[match.lastgroup] for match in self.regex.finditer(text))
+        return Counter({field: count for field, regex in self._regexes.items() if (count := sum(1 for _ in regex.finditer(text)))})
+
+    def extract_columns(self, texts):
+        # extract() for many strings, as columns {field: list of values} (non-strings: None)
+        if not self.single_pass:
+            columns = {}
+            for field, regex in self._regexes.items(): # One pass per field, each one in a list comprehension
+                search, group = regex.search, self._value_group[field]
+                columns[field] = [match.group(group) if isinstance(text, str) and (match := search(text)) else None for text in texts]
+            return columns
+
+        field_position = {self.regex.groupindex[group_name]: i for i, group_name in enumerate(self._field_of_group)}
+        value_groups = [self._value_group[field] for field in self.fields]
+        columns = [[None] * len(texts) for _ in self.fields]
+        finditer = self.regex.finditer
+
+        for row, text in enumerate(texts):
+            if isinstance(text, str):
+                for match in finditer(text):
+                    i = field_position[match.lastindex] # The group of the alternative is the last one closed
+                    if columns[i][row] is None:
+                        columns[i][row] = match.group(value_groups[i])
+
+        return dict(zip(self.fields, columns))
+
+
+class KeyValuePattern:
+    """
+    Fields written as "<key><value>" in the text, e.g. "Math:   2.00", found by ONE pattern "(?P<key>Math|...)<value_pattern>".
+    keys: a list of keys (the fields), or a dictionary {key in the text: field}, e.g. {"Toán": "Math", "Ngữ văn": "Literature"}
+    value_pattern: the pattern following a key, its value is its group (at most one group), or the whole match without group.
+    The same interface as MultiPattern (fields, finditer, extract, findall, count, extract_columns).
+    """
+
+    def __init__(self, keys, value_pattern, flags=0):
+        self.keys = dict(keys) if isinstance(keys, dict) else {key: key for key in keys}
+        self.value_pattern = value_pattern
+        self.flags = flags
+        self.fields = list(dict.fromkeys(self.keys.values()))
+
+        value_groups = cached_compile(value_pattern, flags).groups
+        if value_groups > 1:
+            raise ValueError(f"value_pattern must have at most one group, not {value_groups}: {value_pattern!r}")
+
+        # The longest keys first, so that "Math" does not stop the match of "Mathematics"
+        key_alternatives = "|".join(re.escape(key) for key in sorted(self.keys, key=len, reverse=True))
+        self.regex = cached_compile(f"(?P<key>{key_alternatives})" + (value_pattern if value_groups == 1 else f"({value_pattern})"), flags)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.keys!r}, {self.value_pattern!r})"
+
+    def finditer(self, text):
+        for match in self.regex.finditer(text):
+            yield self.keys[match.group(1)], match.group(2), match
+
+    def extract(self, text):
+        values = dict.fromkeys(self.fields)
+        for key, value in reversed(self.regex.findall(text)): # Reversed: the first match of a field is kept
+            values[self.keys[key]] = value
+        return values
+
+    def findall(self, text):
+        values = {field: [] for field in self.fields}
+        for key, value in self.regex.findall(text):
+            values[self.keys[key]].append(value)
+        return values
+
+    def count(self, text):
+        return Counter(self.keys[key] for key, _ in self.regex.findall(text))
+
+    def extract_columns(self, texts):
+        # extract() for many strings, as columns {field: list of values}: re.findall() (in C) collects the (key, value)
+        # of a string, then each value is written in the column of its key (the keys of the same field share a column)
+        columns = {field: [None] * len(texts) for field in self.fields}
+        column_of_key = {key: columns[field] for key, field in self.keys.items()}
+        findall = self.regex.findall
+
+        for row, text in enumerate(texts):
+            if isinstance(text, str):
+                for key, value in findall(text):
+                    column = column_of_key[key]
+                    if column[row] is None:
+                        column[row] = value
+
+        return columns
+
+
+#--------------------------------------------------------------------------------#
+#---------------- Parallel scanning of large text files -------------------------#
+#--------------------------------------------------------------------------------#
+
+def _scan_chunk(file_path, multi_pattern, encoding, boundary):
+    # Worker function: read the lines of one chunk and return its matches as (field, value)
+    start, end = boundary
+    with open(file_path, mode="rb") as file_pointer:
+        file_pointer.seek(start)
+        text = file_pointer.read(end - start).decode(encoding)
+    return [(field, value) for field, value, _ in multi_pattern.finditer(text)]
+
+
+def _count_chunk(file_path, multi_pattern, encoding, boundary):
+    start, end = boundary
+    with open(file_path, mode="rb") as file_pointer:
+        file_pointer.seek(start)
+        text = file_pointer.read(end - start).decode(encoding)
+    return multi_pattern.count(text)
+
+
+def _map_chunks(worker, file_path, chunk_bytes, workers):
+    # Apply worker to the chunks of the file (each one starting at a line start), in order, in worker processes
+    boundaries = find_chunk_boundaries(file_path, 0, chunk_bytes)
+    workers = workers or os.cpu_count()
+
+    if workers == 1 or len(boundaries) <= 1:
+        yield from map(worker, boundaries)
+        return
+
+    with multiprocessing.Pool(processes=min(workers, len(boundaries))) as pool:
+        yield from pool.imap(worker, boundaries)
+
+
+def scan_file(file_path, multi_pattern, chunk_bytes=8 * 1024 * 1024, workers=None, encoding="utf-8"):
+    """
+    Yield (field, value) for every match in a text file, in the order of the file, the chunks being scanned in parallel.
+    The file is split at line starts: a match cannot span 2 lines (like grep).
+    """
+    for matches in _map_chunks(partial(_scan_chunk, file_path, multi_pattern, encoding), file_path, chunk_bytes, workers):
+        yield from matches
+
+
+def count_file(file_path, multi_pattern, chunk_bytes=8 * 1024 * 1024, workers=None, encoding="utf-8"):
+    """Count the matches of every field in a text file (Counter {field: count}), the chunks being scanned in parallel."""
+    counts = Counter(dict.fromkeys(multi_pattern.fields, 0))
+    for chunk_counts in _map_chunks(partial(_count_chunk, file_path, multi_pattern, encoding), file_path, chunk_bytes, workers):
+        counts.update(chunk_counts)
+    return counts
+
+
+#--------------------------------------------------------------------------------#
+#---------------- pandas Series: all the fields in one pass ---------------------#
+#--------------------------------------------------------------------------------#
+
+def extract_series(series, multi_pattern, dtype=None, workers=1, chunk_size=50_000):
+    """
+    Extract all the fields of a MultiPattern/KeyValuePattern from a pandas Series of strings in ONE pass:
+    return a DataFrame with one column per field (same index as series), converted to dtype if given.
+    workers > 1: the Series is split into chunks of chunk_size strings, processed by worker processes.
+    """
+    import numpy as np
+    import pandas as pd # Only needed by this function
+
+    texts = series.tolist()
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    if workers == 1 or len(chunks) <= 1:
+        chunk_columns = list(map(multi_pattern.extract_columns, chunks))
+    else:
+        with multiprocessing.Pool(processes=min(workers, len(chunks))) as pool:
+            chunk_columns = pool.map(multi_pattern.extract_columns, chunks)
+
+    columns = {field: [value for chunk in chunk_columns for value in chunk[field]] for field in multi_pattern.fields}
+    if dtype is not None:
+        columns = {field: np.asarray(values, dtype=dtype) for field, values in columns.items()} # None -> NaN for floats
+
+    return pd.DataFrame(columns, index=series.index, columns=multi_pattern.fields)
+
+
+if __name__ == "__main__":
+    import time
+    import random
+    import pandas as pd
+
+    subjects = ["Math", "Literature", "Geography", "History", "English", "Biology", "Physics", "Chemistry"]
+    rng = random.Random(0)
+    series = pd.Series([
+        "   ".join(f"{subject}:   {rng.randint(0, 40) / 4:.2f}" for subject in rng.sample(subjects, rng.randint(3, 6)))
+        for _ in range(100_000)
+    ])
+
+    t0 = time.perf_counter()
+    one_pass_per_subject = pd.DataFrame({subject: series.str.extract(fr"{subject}:\s*(\d+\.\d+)", expand=False).astype(float) for subject in subjects})
+    print(f"str.extract() per subject: {time.perf_counter() - t0:.3f} s")
+
+    for label, multi_pattern in [
+        ("MultiPattern", MultiPattern({subject: fr"{subject}:\s*(\d+\.\d+)" for subject in subjects})),
+        ("MultiPattern, single_pass=True", MultiPattern({subject: fr"{subject}:\s*(\d+\.\d+)" for subject in subjects}, single_pass=True)),
+        ("KeyValuePattern", KeyValuePattern(subjects, r":\s*(\d+\.\d+)")),
+    ]:
+        t0 = time.perf_counter()
+        extracted = extract_series(series, multi_pattern, dtype=float)
+        print(f"extract_series({label}): {time.perf_counter() - t0:.3f} s, same result: {extracted.equals(one_pass_per_subject)}")
+
+    # Overlapping fields: a year is also a number
+    text = "Born 1987, ID 42, moved in 2016"
+    print(MultiPattern({"number": r"\d+", "year": r"\b(?:19|20)\d\d\b"}).findall(text))
+    # {'number': ['1987', '42', '2016'], 'year': ['1987', '2016']}
+    print(MultiPattern({"number": r"\d+", "year": r"\b(?:19|20)\d\d\b"}, single_pass=True).findall(text))
+    # {'number': ['1987', '42', '2016'], 'year': []}: "number" matches first at every position
@@ -0,0 +1,46 @@
+# Regression tests of bulk_datetime, run them from this directory:
+#     python -m unittest test_bulk_datetime
+
+from bulk_datetime import parse_datetimes
+import datetime, unittest
+
+
+class FixedWidthParsingTest(unittest.TestCase):
+    '''
+    The vectorized fixed-width path must accept and reject exactly the same strings as datetime.strptime().
+    '''
+
+    def assert_rejected_like_strptime(self, string, fmt):
+        with self.assertRaises(ValueError) as strptime_error:
+            datetime.datetime.strptime(string, fmt)
+
+        with self.assertRaises(ValueError) as error:
+            parse_datetimes([string], fmt)
+
+        self.assertEqual(str(error.exception), str(strptime_error.exception))
+
+
+    def test_second_60_and_61(self):
+        self.assert_rejected_like_strptime("00:00:60", "%H:%M:%S")
+        self.assert_rejected_like_strptime("00:00:61", "%H:%M:%S")
+
+
+    def test_year_0(self):
+        self.assert_rejected_like_strptime("0000-01-01", "%Y-%m-%d")
+
+
+    def test_offset_hours_above_23(self):
+        self.assert_rejected_like_strptime("2024-01-01 +2500", "%Y-%m-%d %z")
+        self.assert_rejected_like_strptime("2024-01-01 -2400", "%Y-%m-%d %z")
+
+
+    def test_limits_still_accepted(self):
+        strings = ["0001-01-01 00:00:59 +2359", "9999-12-31 23:59:59 -2359"]
+        fmt = "%Y-%m-%d %H:%M:%S %z"
+        expected = [int((datetime.datetime.strptime(string, fmt) - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)).total_seconds()) for string in strings]
+
+        self.assertEqual(parse_datetimes(strings, fmt).tolist(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,219 @@
+#--------------------------------------------------------------------------------#
+#---------------- Memory-mapped line index for large .txt files -----------------#
+#--------------------------------------------------------------------------------#
+
+# The readers of 27_TXT_open_read_write.py read the whole file, or iterate over the lines from the start.
+# For multi-GB files (e.g. logs), LineIndexedFile maps the file in memory (mmap: the OS loads only the pages being read)
+# and builds an index of the byte offset of every line start:
+# ++ O(1) random access to the line n: txt_file[n], and to any range of lines: txt_file[1000:1010]
+# ++ fast tail reads: txt_file.tail(10) (no need of the index, the end of the file is scanned backwards)
+# ++ random sampling of lines: txt_file.sample(5)
+# ++ parallel processing of line ranges by worker processes: txt_file.process_parallel(function)
+# The index is cached in a sidecar file (<file>.lineidx.npy), reused as long as the file is not modified.
+#
+# Usage:
+#     from txt_line_index import LineIndexedFile
+#     with LineIndexedFile("server.log") as log:
+#         print(len(log), log[123456], log.tail(5))
+
+import os
+import mmap
+import random
+import multiprocessing
+from functools import partial
+import numpy as np
+
+NEWLINE = ord("\n")
+SCAN_BLOCK_SIZE = 64 * 1024 * 1024 # Bytes scanned at once when building the index (bounded memory)
+INDEX_SUFFIX = ".lineidx.npy"
+
+
+class LineIndexedFile:
+
+    def __init__(self, file_path, encoding="utf-8", use_cache=True):
+        self.file_path = str(file_path)
+        self.encoding = encoding
+        self.use_cache = use_cache
+        self._file_pointer = open(self.file_path, mode="rb")
+        self._size = os.fstat(self._file_pointer.fileno()).st_size
+        self._mmap = mmap.mmap(self._file_pointer.fileno(), 0, access=mmap.ACCESS_READ) if self._size > 0 else b""
+        self._offsets = None # Built (or loaded from the sidecar file) at the first random access
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._offsets = None # Release the memory-mapped index before closing the mapped file
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file_pointer.close()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.file_path!r})"
+
+    #-------------------------- Line index --------------------------#
+
+    @property
+    def index_path(self):
+        return self.file_path + INDEX_SUFFIX
+
+    @property
+    def offsets(self):
+        # Byte offset of every line start, followed by the file size: the line n is the bytes [offsets[n], offsets[n + 1])
+        if self._offsets is None:
+            self._offsets = self._load_index() if self.use_cache else None
+            if self._offsets is None:
+                self._offsets = self._build_index()
+                if self.use_cache:
+                    self._save_index()
+        return self._offsets
+
+    def _build_index(self):
+        # Scan the file block by block with NumPy, looking for the newline bytes
+        line_starts = [np.zeros(1, dtype=np.int64)]
+
+        for block_start in range(0, self._size, SCAN_BLOCK_SIZE):
+            block = np.frombuffer(self._mmap, dtype=np.uint8, count=min(SCAN_BLOCK_SIZE, self._size - block_start), offset=block_start)
+            line_starts.append(np.flatnonzero(block == NEWLINE).astype(np.int64) + block_start + 1)
+            del block # Release the view of the mapped file
+
+        offsets = np.concatenate(line_starts)
+
+        if offsets[-1] != self._size: # The last line has no newline character at its end
+            offsets = np.append(offsets, self._size)
+
+        return offsets
+
+    def _index_header(self):
+        # The sidecar file starts with the size and modification time of the indexed file, to detect a modified file
+        stat = os.stat(self.file_path)
+        return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def _load_index(self):
+        try:
+            cached = np.load(self.index_path, mmap_mode="r") # The index itself is memory-mapped too
+        except (OSError, ValueError):
+            return None
+
+        if len(cached) < 3 or not np.array_equal(cached[:2], self._index_header()):
+            return None # Outdated index, the file was modified
+        return cached[2:]
+
+    def _save_index(self):
+        try:
+            np.save(self.index_path, np.concatenate([self._index_header(), self._offsets]))
+        except OSError: # Read-only directory, the index is just not cached
+            pass
+
+    #-------------------------- Random access --------------------------#
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _decode(self, data):
+        return data.decode(self.encoding).rstrip("\r\n")
+
+    def __getitem__(self, n):
+        # txt_file[n]: the line n (negative n counts from the end), txt_file[start:stop]: a list of lines
+        if isinstance(n, slice):
+            start, stop, step = n.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return self.lines(start, stop)
+
+        if n < 0:
+            n += len(self)
+        if not 0 <= n < len(self):
+            raise IndexError("line index out of range")
+
+        return self._decode(self._mmap[self.offsets[n]:self.offsets[n + 1]])
+
+    def lines(self, start=0, stop=None):
+        # The lines [start, stop) as a list, read from a single slice of the mapped file
+        stop = len(self) if stop is None else min(stop, len(self))
+        if start >= stop:
+            return []
+        return _split_lines(self._mmap[self.offsets[start]:self.offsets[stop]].decode(self.encoding))
+
+    def tail(self, n=10):
+        # The last n lines, read backwards from the end of the file (the index is not needed)
+        if self._offsets is not None:
+            return self.lines(max(0, len(self) - n)) if n > 0 else []
+
+        if n <= 0 or self._size == 0:
+            return []
+
+        end = self._size
+        if self._mmap[end - 1] == NEWLINE:
+            end -= 1 # The newline character at the end of the file belongs to the last line
+
+        position = end
+        for _ in range(n): # Jump back n newline characters
+            position = self._mmap.rfind(b"\n", 0, position)
+            if position == -1:
+                break
+
+        return _split_lines(self._mmap[position + 1:end].decode(self.encoding))
+
+    def sample(self, k, seed=None):
+        # k lines picked at random (without replacement), in the order of the file
+        rng = random.Random(seed)
+        return [self[n] for n in sorted(rng.sample(range(len(self)), min(k, len(self))))]
+
+    #-------------------------- Parallel processing --------------------------#
+
+    def line_ranges(self, lines_per_range):
+        # Split the lines into ranges of (at most) lines_per_range lines, as (first line, byte start, byte end)
+        offsets = self.offsets
+        return [
+            (start, int(offsets[start]), int(offsets[min(start + lines_per_range, len(self))]))
+            for start in range(0, len(self), lines_per_range)
+        ]
+
+    def process_parallel(self, function, workers=None, lines_per_range=100_000, ordered=True):
+        # Apply function(first line number, list of lines) to every line range in worker processes, yield the results
+        # function must be picklable (defined at the top level of a module)
+        worker = partial(_process_line_range, self.file_path, self.encoding, function)
+        ranges = self.line_ranges(lines_per_range)
+
+        if workers == 1 or len(ranges) <= 1:
+            yield from map(worker, ranges)
+            return
+
+        with multiprocessing.Pool(processes=min(workers or os.cpu_count(), len(ranges))) as pool:
+            yield from (pool.imap(worker, ranges) if ordered else pool.imap_unordered(worker, ranges))
+
+
+def _split_lines(text):
+    # Split on "\n" only, like the index (str.splitlines() also splits on other characters, e.g. "\x0c")
+    lines = text.split("\n")
+    if lines[-1] == "":
+        lines.pop() # The text ends with a newline character, it does not start a new line
+    return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+
+def _process_line_range(file_path, encoding, function, line_range):
+    # Worker function: only the byte range of its lines is read (memory-mapped), no index is needed
+    first_line, byte_start, byte_end = line_range
+
+    with open(file_path, mode="rb") as file_pointer, mmap.mmap(file_pointer.fileno(), 0, access=mmap.ACCESS_READ) as mapped_file:
+        lines = _split_lines(mapped_file[byte_start:byte_end].decode(encoding))
+
+    return function(first_line, lines)
+
+
+def _count_scores_above_90(first_line, lines):
+    return sum(1 for line in lines if ":" in line and line.split(":")[1].strip().isdecimal() and int(line.split(":")[1]) > 90)
+
+
+if __name__ == "__main__":
+    file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_data", "txt_files", "StudentScores.txt")
+
+    with LineIndexedFile(file_path, use_cache=False) as scores:
+        print(len(scores), scores[1], scores[-1])    # Number of lines, second line, last line
+        print(scores.tail(3))                          # The last 3 lines
+        print(scores.sample(2, seed=0))                # 2 random lines
+        print(sum(scores.process_parallel(_count_scores_above_90, workers=2, lines_per_range=3)))
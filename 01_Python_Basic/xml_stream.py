@@ -0,0 +1,169 @@
+#--------------------------------------------------------------------------------#
+#---------------- Streaming (iterparse) reader for large .xml files -------------#
+#--------------------------------------------------------------------------------#
+
+# ET.parse() (30_XML_parse_create_write.py) builds the WHOLE tree in memory, and a recursive walk of the tree
+# (summarize_xml_structure) reaches the recursion limit on deep documents. For large catalogs of repeated records
+# (like the <food> of food.xml or the <CD> of music_cd.xml), this module uses ET.iterparse(), which reads the file
+# piece by piece, and removes every element from the tree as soon as it is processed (bounded memory):
+# ++ iter_xml_records() yields the records ONE AT A TIME, as flat dictionaries {child tag: text}
+#    (a tag repeated in a record gives the list of its texts, in document order)
+# ++ summarize_structure() aggregates the tag paths with their counts ("CATALOG/CD/TITLE": 26), without recursion
+# ++ iter_xml_tables() / read_xml_table() convert the records into column-oriented tables {column: list of values},
+#    or NumPy arrays for the columns given in dtypes
+#
+# Usage:
+#     from xml_stream import read_xml_table, summarize_structure, print_structure
+#     print_structure(summarize_structure("music_cd.xml"))
+#     table = read_xml_table("music_cd.xml", dtypes={"PRICE": "float64", "YEAR": "int64"})
+#     print(table["PRICE"].mean())
+
+import os
+import xml.etree.ElementTree as ET
+from collections import Counter
+from itertools import islice
+import numpy as np
+
+
+def _flatten_record(record):
+    # Turn a record element into a flat dictionary: {child tag: text}, {"parent/child": text} for the nested children,
+    # {"tag@attribute": value} for the attributes (iterative walk, no recursion).
+    # A key found several times (repeated tag) gets the list of its values, in document order
+    values = {f"@{name}": value for name, value in record.attrib.items()}
+    repeated = set() # Keys whose value is already a list of repeated values
+    stack = [(child, child.tag) for child in reversed(record)]
+
+    def add(key, value):
+        if key not in values:
+            values[key] = value
+        elif key in repeated:
+            values[key].append(value)
+        else:
+            values[key] = [values[key], value]
+            repeated.add(key)
+
+    while stack:
+        element, path = stack.pop()
+        for name, value in element.attrib.items():
+            add(f"{path}@{name}", value)
+
+        if len(element) > 0:
+            stack.extend((child, f"{path}/{child.tag}") for child in reversed(element))
+        else:
+            add(path, element.text.strip() if element.text is not None else None)
+
+    return values
+
+
+def iter_xml_records(file_path, record_tag=None):
+    """
+    Yield the records of an XML file one at a time, as flat dictionaries.
+    record_tag: the tag of the records (default: the tag of the first child of the root element)
+    """
+    stack = []           # The open elements, from the root to the current element
+    record_depth = None  # Depth of the record being read (None: outside of a record)
+
+    for event, element in ET.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            if record_tag is None and len(stack) == 1:
+                record_tag = element.tag
+            if record_depth is None and element.tag == record_tag:
+                record_depth = len(stack)
+            stack.append(element)
+            continue
+
+        stack.pop()
+        if record_depth is not None and len(stack) > record_depth:
+            continue # Inside a record: its children are kept until the end of the record
+
+        if record_depth == len(stack):
+            yield _flatten_record(element)
+            record_depth = None
+
+        # The element is processed: remove it from the tree, so that the memory does not grow with the file
+        element.clear()
+        if stack:
+            stack[-1].remove(element)
+
+
+def summarize_structure(file_path):
+    """
+    Return the tag paths of an XML file with their number of occurrences, e.g. {"CATALOG": 1, "CATALOG/CD": 26, ...}
+    (in the order of first appearance). Unlike a recursive walk of the tree, the memory does not depend on the size of the file.
+    """
+    counts = Counter()
+    path = []
+    stack = [] # The open elements, from the root to the current element
+
+    for event, element in ET.iterparse(file_path, events=("start", "end")):
+        if event == "start":
+            path.append(element.tag)
+            stack.append(element)
+            counts["/".join(path)] += 1
+        else:
+            path.pop()
+            stack.pop()
+            element.clear() # Only the tags are needed
+            if stack:
+                stack[-1].remove(element) # Otherwise the root keeps one (empty) element per record
+
+    return dict(counts)
+
+
+def print_structure(summary):
+    # One line per tag path (not per element), indented by depth:
+    # CATALOG (1)
+    #   CD (26)
+    #     TITLE (26)
+    for path, count in summary.items():
+        depth = path.count("/")
+        print(f"{'  ' * depth}{path.rsplit('/', 1)[-1]} ({count})")
+
+
+def records_to_columns(records, columns=None, dtypes=None):
+    """
+    Turn a list of flat records into a column-oriented table {column: list}, as NumPy arrays for the columns in dtypes.
+    columns: the columns to keep (default: every key, in the order of first appearance). A missing value is None (NaN for floats).
+    The values of a repeated tag stay lists: do not give a dtype to such a column.
+    """
+    if columns is None:
+        columns = list(dict.fromkeys(key for record in records for key in record))
+
+    table = {column: [record.get(column) for record in records] for column in columns}
+
+    for column, dtype in (dtypes or {}).items():
+        table[column] = np.asarray(table[column], dtype=dtype)
+
+    return table
+
+
+def iter_xml_tables(file_path, record_tag=None, chunk_size=10_000, columns=None, dtypes=None):
+    """Generator of column-oriented tables of (at most) chunk_size records each, read with a bounded memory."""
+    records = iter_xml_records(file_path, record_tag)
+
+    while chunk := list(islice(records, chunk_size)):
+        yield records_to_columns(chunk, columns, dtypes)
+
+
+def read_xml_table(file_path, record_tag=None, columns=None, dtypes=None):
+    """Read all the records of an XML file into a single column-oriented table."""
+    return records_to_columns(list(iter_xml_records(file_path, record_tag)), columns, dtypes)
+
+
+if __name__ == "__main__":
+    xml_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demo_data", "xml_files")
+
+    print_structure(summarize_structure(os.path.join(xml_dir, "food.xml")))
+    # breakfast_menu (1)
+    #   food (5)
+    #     name (5)
+    #     ...
+
+    for record in iter_xml_records(os.path.join(xml_dir, "food.xml")):
+        print(record) # {'name': 'Belgian Waffles', 'price': '$5.95', 'description': '...', 'calories': '650'} ...
+
+    cds = read_xml_table(os.path.join(xml_dir, "music_cd.xml"), dtypes={"PRICE": "float64", "YEAR": "int64"})
+    print(cds["TITLE"][:3], cds["PRICE"].mean(), cds["YEAR"].min())
+
+    for table in iter_xml_tables(os.path.join(xml_dir, "plant_catalog.xml"), chunk_size=10, columns=["COMMON", "PRICE"]):
+        print(len(table["COMMON"]), table["PRICE"][:2])
@@ -9,8 +9,20 @@
 #              and IS involved in creating new instances of the class (like construct_from_csv() below)
 
 import csv
+from pathlib import Path
+from item import read_csv_chunks, CSVLoadReport # Streaming CSV loading, shared with the Item class (item.py)
 
 class Employee:
+    csv_schema = {"Name": str, "Age": int, "City": str} # CSV column -> type conversion, in the order of __init__ arguments
+
+    def __init__(self, name: str, age: int, city: str):
+        self.name = name
+        self.age = age
+        self.city = city
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.name}, {self.age}, {self.city})"
+
     @classmethod # indicates the below method is a class method, not an instance method
     def demo_class_method(cls): # class method requires "cls" as the first argument, like "self" for instance method
         print("This is a demo class method of the class Item")
@@ -23,16 +35,32 @@ class Employee:
 
         return employees
 
+    @classmethod
+    def from_csv(cls, file_path: str, chunk_size: int = 10_000, report=None):
+        # A class method that really constructs the instances (typed: Age is an int), chunk by chunk
+        # The file is streamed row by row instead of being loaded as a whole, the invalid rows are collected in report
+        yield from read_csv_chunks(file_path, cls.csv_schema, build=cls, chunk_size=chunk_size, report=report)
+
 print(Employee.demo_class_method()) # Execute a class method
                                     # This is a demo class method of the class Item
                                     # None (this is because we did not define the return value for the demo method)
 
-csv_path = "/home/longdpt/Documents/Academic/DataScience_MachineLearning_Python_SQL/01_Python_Basic/class_OOP/class_method_employees.csv"
+csv_path = Path(__file__).parent.joinpath("class_method_employees.csv")
 
 lst_employees = Employee.construct_from_csv(file_path=csv_path)
 print(lst_employees)
 # {'Name': 'Alice', 'Age': '30', 'City': 'New York'}
 # {'Name': 'Bob', 'Age': '25', 'City': 'Los Angeles'}
 # {'Name': 'Charlie', 'Age': '35', 'City': 'Chicago'}
+# ==> only dictionaries of strings, and the whole file is loaded in memory at once
+
+report = CSVLoadReport()
+for employees in Employee.from_csv(file_path=csv_path, chunk_size=2, report=report): # Chunks of (at most) 2 employees
+    print(employees)
+# [Employee(Alice, 30, New York), Employee(Bob, 25, Los Angeles)]
+# [Employee(Charlie, 35, Chicago)]
+
+print(report)        # CSVLoadReport(rows=3, errors=0, ... rows/s)
+print(report.errors) # [] (the invalid rows would be listed here as (line number, error), without stopping the load)
 
 ### NOT RECOMMEND: class methods can be called from an instance, but should not do so
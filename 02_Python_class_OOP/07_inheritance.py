@@ -86,4 +86,24 @@ print(fruit1.is_organic)  # Output: True
 print(fruit1.calculate_total_price())  # Output: 25.0 (2.5 * 10)
 
 print(Fruit.all_items)  # Output: [Fruit(Apple, 2.5, 10), Fruit(Banana, 1.5, 20)]
-                        # It inherits the all_items attribute and the __repr__() method from Item
\ No newline at end of file
+                        # It inherits the all_items attribute and the __repr__() method from Item
+
+#----------------------------------------------------------------------#
+#----------- Inherited class attributes in bulk (ItemStore) -----------#
+#----------------------------------------------------------------------#
+
+# default_discount_rate is a class attribute of Item (0.2), a subclass can override it for all of its instances
+# and any instance can override its own discount_rate (a property of Item, stored in a slot)
+# ItemStore applies all of them to a whole inventory at once (vectorized), instead of one item at a time
+
+from item import ItemStore
+
+Fruit.default_discount_rate = 0.1 # Subclass-level rate, Item.default_discount_rate is still 0.2
+fruit2.discount_rate = 0.5        # Per-item rate, only for fruit2
+
+inventory = ItemStore.from_items(Item.all_items)
+print(inventory.effective_discount_rates()) # [0.1 0.5] (fruit1 uses the rate of Fruit, fruit2 its own rate)
+print(inventory.discounted_prices())        # [2.25 0.75]
+
+Fruit.default_discount_rate = 0.3 # The cached rates are recalculated as soon as a class rate changes
+print(inventory.effective_discount_rates()) # [0.3 0.5]
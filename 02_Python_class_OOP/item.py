@@ -1,33 +1,481 @@
 # Create the Item class in a separate file named item.py
 
 import csv
+import time
+import bisect
+import weakref
+from array import array
+import numpy as np
 
 class Item:
 
-    all_items = []
+    default_discount_rate = 0.2 # Class attribute, can be overridden by a subclass (e.g. Fruit.default_discount_rate = 0.1)
+    all_items = []              # Strong references: every created item stays alive as long as the class
+    weak_registration = False   # Set to True to register the items in all_items_weak instead of all_items
+    all_items_weak = weakref.WeakValueDictionary() # Weak references: an item disappears once it is no longer used elsewhere
+
+    csv_schema = {"name": str, "price": float, "quantity": int} # CSV column -> type conversion, in the order of __init__ arguments
+
+    __slots__ = ("_name", "_price", "_quantity", "_discount_rate", "_inventory", "__weakref__")
+    # __slots__ replaces the per-instance __dict__ by fixed attribute slots (much less memory per item)
+    # "__weakref__" is needed to reference the items weakly
+    # "_discount_rate" holds the per-item discount rate (see the discount_rate property), an instance cannot add attributes
+    # Subclasses without __slots__ (e.g. Fruit in 07_inheritance.py) still get a __dict__ for their extra attributes
 
     def __init__(self, name: str, price: float, quantity: int):
-        assert isinstance(name, str), "Name must be a string"
-        assert price >= 0, "Price must be greater than zero"
-        assert quantity >= 0, "Quantity must be greater than or equal to zero"
+        self._inventory = None # The ItemInventory indexing this item, if any (notified of every change)
+        self._discount_rate = None # None: the default_discount_rate of the class of the item
 
-        self.name = name          
-        self.price = price        
+        self.name = name          # The setters below validate the values
+        self.price = price
         self.quantity = quantity
 
-        Item.all_items.append(self)
+        if Item.weak_registration:
+            Item.all_items_weak[id(self)] = self # Insertion ordered, like all_items
+        else:
+            Item.all_items.append(self)
+
+    # name, price and quantity are properties (like ItemWithSetter in 08_property_getter_setter_underscore.py),
+    # so that a change is validated, and the indexes of the inventory of the item are updated
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, value):
+        assert isinstance(value, str), "Name must be a string"
+        self._set("name", value)
+
+    @property
+    def price(self):
+        return self._price
+
+    @price.setter
+    def price(self, value):
+        assert value >= 0, "Price must be greater than zero"
+        self._set("price", value)
+
+    @property
+    def quantity(self):
+        return self._quantity
+
+    @quantity.setter
+    def quantity(self, value):
+        assert value >= 0, "Quantity must be greater than or equal to zero"
+        self._set("quantity", value)
+
+    # discount_rate is a property too: item.discount_rate = 0.5 overrides the rate of this item only,
+    # del item.discount_rate (or None) goes back to the default_discount_rate of its class
+
+    @property
+    def discount_rate(self):
+        return self.default_discount_rate if self._discount_rate is None else self._discount_rate
+
+    @discount_rate.setter
+    def discount_rate(self, value):
+        assert value is None or 0 <= value <= 1, "Discount rate must be between 0 and 1"
+        self._discount_rate = value
+
+    @discount_rate.deleter
+    def discount_rate(self):
+        self._discount_rate = None
+
+    def _set(self, field: str, value):
+        if self._inventory is not None:
+            self._inventory._update(self, field, getattr(self, field), value)
+        setattr(self, "_" + field, value)
 
     def __repr__(self):
         return f"{self.__class__.__name__}({self.name}, {self.price}, {self.quantity})"
         # Use self.__class__.name__ to get the class name dynamically
-      
+
     def calculate_total_price(self):
         return self.price * self.quantity
-    
+
+    def apply_discount(self):
+        # self.discount_rate is the rate of this item if overridden,
+        # else the default_discount_rate of its class (subclass, else Item)
+        return self.price * (1 - self.discount_rate)
+
+    @classmethod
+    def registered_items(cls):
+        # The registered items, from all_items_weak if weak_registration is used, else from all_items
+        if cls.weak_registration:
+            return list(cls.all_items_weak.values())
+        return list(cls.all_items)
+
     @classmethod
     def construct_from_csv(cls, file_path: str): #A function to construct an instance of the class from a .csv file
         with open(file_path, 'r') as f:
             reader = csv.DictReader(f) # Read .csv file as a dictionary
             items = list(reader)
 
-        return items
\ No newline at end of file
+        return items
+
+    @classmethod
+    def from_csv(cls, file_path: str, chunk_size: int = 10_000, schema: dict = None, report=None):
+        # Streaming, typed version of construct_from_csv(): yield lists of (at most) chunk_size Item instances
+        # The file is read row by row, so it is never loaded as a whole (constant memory)
+        # The invalid rows are collected in report (a CSVLoadReport) instead of aborting the load
+        # NOTE: every created item is registered in all_items, set Item.weak_registration = True
+        #       (or load into an ItemStore) to really keep the memory constant
+        schema = schema or cls.csv_schema
+        yield from read_csv_chunks(file_path, schema, build=cls, chunk_size=chunk_size, report=report)
+
+
+#------------------------------------------------------------------------------#
+#----------- ItemStore: many items stored column by column -------------------#
+#------------------------------------------------------------------------------#
+
+# One Item object per catalog row does not scale to millions of rows (one Python object per row and per attribute).
+# ItemStore keeps the names, prices and quantities in 3 columns instead:
+# ++ names: a list of strings
+# ++ prices: a typed array of float64 (array('d')), quantities: a typed array of int64 (array('q'))
+# Appending a row is O(1) (amortized), and the calculations are vectorized with NumPy over the whole store.
+# The discount rates are stored as 2 more columns:
+# ++ kinds: the class of each item (Item, Fruit...), as an index in item_classes (array('H'))
+# ++ discount_overrides: the per-item discount rate, NaN if the item uses the rate of its class (array('d'))
+
+class ItemStore:
+
+    def __init__(self):
+        self.names = []
+        self.prices = array('d')
+        self.quantities = array('q')
+        self.kinds = array('H')
+        self.discount_overrides = array('d')
+        self.item_classes = []          # The classes of the stored items, indexed by kinds
+        self._version = 0               # Incremented when a discount override is changed
+        self._rate_cache_key = None     # (version, number of items, rate of each class) of the cached rates
+        self._rate_cache = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index: int):
+        return self.names[index], self.prices[index], self.quantities[index]
+
+    def __iter__(self):
+        return zip(self.names, self.prices, self.quantities)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} items)"
+
+    def _kind(self, item_class):
+        # The index of item_class in item_classes (added at its first use)
+        if item_class not in self.item_classes:
+            self.item_classes.append(item_class)
+        return self.item_classes.index(item_class)
+
+    def append(self, name: str, price: float, quantity: int, item_class=Item, discount_rate: float = None):
+        assert isinstance(name, str), "Name must be a string"
+        assert price >= 0, "Price must be greater than zero"
+        assert quantity >= 0, "Quantity must be greater than or equal to zero"
+        assert discount_rate is None or 0 <= discount_rate <= 1, "Discount rate must be between 0 and 1"
+
+        self.names.append(name)
+        self.prices.append(price)
+        self.quantities.append(quantity)
+        self.kinds.append(self._kind(item_class))
+        self.discount_overrides.append(np.nan if discount_rate is None else discount_rate)
+
+        return len(self.names) - 1 # The index of the new item
+
+    def extend(self, names, prices, quantities, item_class=Item, discount_rates=None):
+        # Append many items of the same class at once, the prices and quantities are validated as whole columns
+        # discount_rates: the per-item discount rates (NaN for no override), None if all items use the rate of item_class
+        prices = np.asarray(prices, dtype=np.float64)
+        quantities = np.asarray(quantities, dtype=np.int64)
+        names = list(names)
+        discount_rates = np.full(len(names), np.nan) if discount_rates is None else np.asarray(discount_rates, dtype=np.float64)
+
+        assert len(names) == len(prices) == len(quantities) == len(discount_rates), "Names, prices and quantities must have the same length"
+        assert all(isinstance(name, str) for name in names), "Name must be a string"
+        assert (prices >= 0).all(), "Price must be greater than zero"
+        assert (quantities >= 0).all(), "Quantity must be greater than or equal to zero"
+        assert not ((discount_rates < 0) | (discount_rates > 1)).any(), "Discount rate must be between 0 and 1"
+
+        self.names.extend(names)
+        self.prices.frombytes(prices.tobytes())
+        self.quantities.frombytes(quantities.tobytes())
+        self.kinds.extend([self._kind(item_class)] * len(names))
+        self.discount_overrides.frombytes(discount_rates.tobytes())
+
+    def set_discount_rate(self, indices, discount_rate: float = None):
+        # Override the discount rate of some items (an index or a list of indices), None to use the rate of their class again
+        assert discount_rate is None or 0 <= discount_rate <= 1, "Discount rate must be between 0 and 1"
+        overrides = np.frombuffer(self.discount_overrides, dtype=np.float64)
+        overrides[indices] = np.nan if discount_rate is None else discount_rate
+        del overrides # Release the view, so that the store can grow again
+        self._version += 1
+
+    def effective_discount_rates(self):
+        # The discount rate of every item: its override if any, else the default_discount_rate of its class (subclass, else Item)
+        # Cached, and recalculated only if an override, the number of items, or the default_discount_rate of a class has changed
+        class_rates = tuple(item_class.default_discount_rate for item_class in self.item_classes)
+        cache_key = (self._version, len(self), class_rates)
+
+        if cache_key != self._rate_cache_key:
+            kinds = np.frombuffer(self.kinds, dtype=np.uint16)
+            overrides = np.frombuffer(self.discount_overrides, dtype=np.float64)
+            rates = np.asarray(class_rates, dtype=np.float64)[kinds] if len(self) > 0 else np.empty(0)
+            rates = np.where(np.isnan(overrides), rates, overrides) # Also releases the views (new array)
+            rates.flags.writeable = False # Shared by the next calls until invalidated
+            self._rate_cache, self._rate_cache_key = rates, cache_key
+
+        return self._rate_cache
+
+    def discounted_prices(self):
+        # Vectorized Item.apply_discount() over the whole store, with the class, subclass and per-item rates
+        return np.frombuffer(self.prices, dtype=np.float64) * (1 - self.effective_discount_rates())
+
+    @classmethod
+    def from_csv(cls, file_path: str, schema: dict = None, report=None):
+        # Bulk-load a CSV file into a new store, row by row (constant memory apart from the store itself)
+        # The invalid rows are collected in report (a CSVLoadReport) instead of aborting the load
+        store = cls()
+        schema = schema or Item.csv_schema
+
+        for _ in read_csv_chunks(file_path, schema, build=store.append, report=report):
+            pass # Each row is already appended to the store by build
+
+        return store
+
+    @classmethod
+    def from_items(cls, items):
+        # Build a store from Item objects, e.g. ItemStore.from_items(Item.all_items)
+        store = cls()
+        for item in items:
+            store.append(item.name, item.price, item.quantity, item_class=type(item), discount_rate=item._discount_rate)
+        return store
+
+    def price_array(self):
+        # NumPy copy of the prices
+        # (a view would prevent the store from growing: a typed array cannot be resized while it is viewed)
+        return np.frombuffer(self.prices, dtype=np.float64).copy()
+
+    def quantity_array(self):
+        # NumPy copy of the quantities
+        return np.frombuffer(self.quantities, dtype=np.int64).copy()
+
+    def calculate_total_price(self):
+        # Vectorized Item.calculate_total_price(): the total price of every item at once
+        return np.frombuffer(self.prices, dtype=np.float64) * np.frombuffer(self.quantities, dtype=np.int64)
+
+    def total_value(self):
+        # The total price of the whole store
+        return float(self.calculate_total_price().sum())
+
+    def apply_discount(self, discount_rate=None, inplace: bool = False):
+        # Vectorized discount: discount_rate is either one rate for all the items, or one rate per item,
+        # None to use the effective rates of the items (see effective_discount_rates())
+        # Return the discounted prices, and also save them in the store if inplace is True
+        if discount_rate is None:
+            discount_rate = self.effective_discount_rates()
+        discount_rate = np.asarray(discount_rate, dtype=np.float64)
+        assert ((discount_rate >= 0) & (discount_rate <= 1)).all(), "Discount rate must be between 0 and 1"
+        assert discount_rate.ndim == 0 or discount_rate.shape == (len(self),), "One discount rate, or one per item, must be given"
+
+        prices = np.frombuffer(self.prices, dtype=np.float64)
+        discounted_prices = prices * (1 - discount_rate)
+
+        if inplace:
+            prices[:] = discounted_prices # Writes through the view into the typed array
+
+        del prices # Release the view, so that the store can grow again
+        return discounted_prices
+
+
+#------------------------------------------------------------------------------#
+#----------- ItemInventory: indexed lookups and grouped aggregates ------------#
+#------------------------------------------------------------------------------#
+
+# Finding items in Item.all_items is a linear scan. ItemInventory keeps indexes over the items added to it:
+# ++ a hash index on name: {name: [items]}
+# ++ sorted indexes on price and quantity: sorted lists of (value, item number), searched by bisection
+# ++ grouped aggregates by class (Item, Phone, Fruit...): number of items and total value (price * quantity)
+# An item notifies its inventory of every change of name, price or quantity (see Item._set),
+# so the indexes and aggregates are updated incrementally, instead of rescanning the whole inventory.
+
+class ItemInventory:
+
+    def __init__(self, items=()):
+        self._items = {}                # {item number: item}
+        self._numbers = {}              # {id(item): item number}
+        self._next_number = 0
+        self._by_name = {}              # {name: [items]}
+        self._sorted = {"price": [], "quantity": []} # Sorted lists of (value, item number)
+        self.count_by_class = {}        # {class: number of items}
+        self.value_by_class = {}        # {class: total value}
+
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({len(self)} items)"
+
+    def add(self, item: Item):
+        assert item._inventory is None, "An item can only be indexed by one inventory"
+
+        number = self._next_number
+        self._next_number += 1
+        self._items[number] = item
+        self._numbers[id(item)] = number
+        item._inventory = self
+
+        self._by_name.setdefault(item.name, []).append(item)
+        for field, entries in self._sorted.items():
+            bisect.insort(entries, (getattr(item, field), number))
+
+        item_class = type(item)
+        self.count_by_class[item_class] = self.count_by_class.get(item_class, 0) + 1
+        self.value_by_class[item_class] = self.value_by_class.get(item_class, 0) + item.calculate_total_price()
+
+    def remove(self, item: Item):
+        assert item._inventory is self, "The item is not indexed by this inventory"
+
+        number = self._numbers.pop(id(item))
+        del self._items[number]
+        item._inventory = None
+
+        self._remove_name(item, item.name)
+        for field, entries in self._sorted.items():
+            del entries[bisect.bisect_left(entries, (getattr(item, field), number))]
+
+        item_class = type(item)
+        self.count_by_class[item_class] -= 1
+        self.value_by_class[item_class] -= item.calculate_total_price()
+
+    def _remove_name(self, item: Item, name: str):
+        same_name = self._by_name[name]
+        same_name.remove(item)
+        if not same_name:
+            del self._by_name[name]
+
+    def _update(self, item: Item, field: str, old_value, new_value):
+        # Called by the item before one of its fields changes
+        if field == "name":
+            self._remove_name(item, old_value)
+            self._by_name.setdefault(new_value, []).append(item)
+            return
+
+        number = self._numbers[id(item)]
+        entries = self._sorted[field]
+        del entries[bisect.bisect_left(entries, (old_value, number))]
+        bisect.insort(entries, (new_value, number))
+
+        # The value changes by the difference of the field times the other field
+        other_value = item.quantity if field == "price" else item.price
+        self.value_by_class[type(item)] += (new_value - old_value) * other_value
+
+    def find_by_name(self, name: str):
+        return list(self._by_name.get(name, []))
+
+    def _range(self, field: str, low=None, high=None):
+        entries = self._sorted[field]
+        start = 0 if low is None else bisect.bisect_left(entries, (low, -1))
+        stop = len(entries) if high is None else bisect.bisect_right(entries, (high, self._next_number))
+        return [self._items[number] for _, number in entries[start:stop]]
+
+    def price_range(self, low: float = None, high: float = None):
+        # The items with low <= price <= high, sorted by price (None: no bound)
+        return self._range("price", low, high)
+
+    def quantity_range(self, low: int = None, high: int = None):
+        # The items with low <= quantity <= high, sorted by quantity (None: no bound)
+        return self._range("quantity", low, high)
+
+    def total_value(self):
+        return sum(self.value_by_class.values())
+
+    def value_by_class_name(self):
+        # Grouped aggregate for dashboards: {class name: (number of items, total value)}
+        return {item_class.__name__: (self.count_by_class[item_class], self.value_by_class[item_class]) for item_class in self.value_by_class}
+
+
+#------------------------------------------------------------------------------#
+#----------- Streaming CSV loading (typed rows, collected errors) -------------#
+#------------------------------------------------------------------------------#
+
+class CSVLoadReport:
+    # Statistics of a streaming CSV load: loaded rows, invalid rows (with their errors) and throughput
+    # Updated while the rows are loaded, so it can also be inspected in the middle of a load
+
+    def __init__(self, max_errors: int = 1000, progress_every: int = None):
+        self.rows = 0
+        self.error_count = 0
+        self.errors = []                      # (line number, error message) of the first max_errors invalid rows
+        self.max_errors = max_errors
+        self.progress_every = progress_every  # Print the throughput every progress_every rows (None: never)
+        self.start_time = time.perf_counter()
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(rows={self.rows}, errors={self.error_count}, {self.rows_per_second:,.0f} rows/s)"
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def add_rows(self, row_count: int):
+        previous_rows = self.rows
+        self.rows += row_count
+        self.seconds = time.perf_counter() - self.start_time
+
+        if self.progress_every and (self.rows // self.progress_every > previous_rows // self.progress_every):
+            print(f"Loaded {self.rows:,} rows ({self.rows_per_second:,.0f} rows/s, {self.error_count} invalid rows)")
+
+    def add_error(self, line_number: int, error: Exception):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_number, f"{error.__class__.__name__}: {error}"))
+
+
+def read_csv_chunks(file_path: str, schema: dict, build=None, chunk_size: int = 10_000, report: CSVLoadReport = None):
+    # Stream a CSV file and yield lists of (at most) chunk_size built rows
+    # ++ schema: {CSV column: type conversion}, e.g. {"name": str, "price": float, "quantity": int}
+    # ++ build: called with the converted values in the order of schema, e.g. a class (build=Item) to construct instances
+    #           (None: yield the converted values as tuples)
+    # A row that fails the conversion or the construction (ValueError, TypeError, AssertionError) is recorded in report and skipped
+    report = report if report is not None else CSVLoadReport()
+    chunk_size = max(1, chunk_size)
+
+    with open(file_path, 'r', newline='') as f:
+        reader = csv.DictReader(f)
+        missing_columns = [column for column in schema if column not in (reader.fieldnames or [])]
+
+        if missing_columns: # Nothing could be loaded, this one does abort
+            raise ValueError(f"Missing CSV columns in {file_path}: {', '.join(missing_columns)}")
+
+        chunk = []
+        line_number = reader.line_num + 1 # Line 1 is the header
+        for row in reader:
+            row_line_number, line_number = line_number, reader.line_num + 1 # A quoted field can span several lines
+            try:
+                values = [row[column] for column in schema]
+                if None in values:
+                    raise ValueError("missing values")
+                values = tuple(convert(value) for convert, value in zip(schema.values(), values))
+                chunk.append(values if build is None else build(*values))
+
+            except (ValueError, TypeError, AssertionError) as e:
+                report.add_error(row_line_number, e)
+                continue
+
+            if len(chunk) == chunk_size:
+                report.add_rows(len(chunk))
+                yield chunk
+                chunk = []
+
+        if chunk:
+            report.add_rows(len(chunk))
+            yield chunk
+
+    report.seconds = time.perf_counter() - report.start_time
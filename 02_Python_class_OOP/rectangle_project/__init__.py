@@ -0,0 +1,15 @@
+# This __init__.py file makes the rectangle_project directory an importable package:
+#     from rectangle_project import RectangleCalculator
+#
+# The classes are only imported on their first access (module-level __getattr__),
+# so importing the package itself costs nothing until one of them is used.
+
+__all__ = ["RectangleCalculator", "RectangleManifest", "RectangleService"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import rectangle_module
+        return getattr(rectangle_module, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
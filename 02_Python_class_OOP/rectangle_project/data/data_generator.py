@@ -1,14 +1,20 @@
+import io
+import csv
 import json
 import random
+import multiprocessing
 from pathlib import Path
+from functools import partial
+from argparse import ArgumentParser, HelpFormatter
 from loguru import logger
 
-# Randomly select 20 file numbers to be corrupted
-corrupted_indices = random.sample(range(1, 201), 20)
-logger.info(f"Corrupted files will be: {sorted(corrupted_indices)}")
+
+#-----------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Corruption types -----------------------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
 
 corruption_types = [
-    lambda x: str(x),  # Convert number to string
+    lambda x: -x,      # Negative number
     lambda x: "abc",   # Non-numeric string
     lambda x: "?$#%",  # Special characters
     lambda x: "",      # Empty string
@@ -20,49 +26,172 @@ corruption_types = [
     lambda x: "NaN",   # Not a Number string
 ]
 
-# Generate all 200 files
-for i in range(1, 201):
-    # Generate random dimensions between 1.0 and 100.0
-    length = round(random.uniform(1.0, 100.0), 1)
-    width = round(random.uniform(1.0, 100.0), 1)
-    
-    # Check if this file should be corrupted
-    if i in corrupted_indices:
-        # Decide which field(s) to corrupt
-        corrupt_length = random.choice([True, False])
-        corrupt_width = random.choice([True, False])
-        
-        # Ensure at least one field is corrupted
-        if not corrupt_length and not corrupt_width:
-            corrupt_length = True
-        
-        if corrupt_length:
-            corruption_func = random.choice(corruption_types)
-            length = corruption_func(length)
-        
-        if corrupt_width:
-            corruption_func = random.choice(corruption_types)
-            width = corruption_func(width)
-    
-    data = {
-        "length": length,
-        "width": width
-    }
-    
-    filename = f"rectangle_{i}.json"
-    filepath = Path("02_Python_class_OOP/rectanble_project/data").joinpath(filename)
-    
-    with open(filepath, 'w') as f:
-        json.dump(data, f, indent=4)
-
-logger.info(f"Generated 200 rectangle files (180 valid, 20 corrupted)")
-logger.info("Corrupted files are randomly distributed among rectangle_1.json to rectangle_200.json")
-
-# Print some examples of corrupted files
-logger.info("\nExamples of some corrupted files:")
-sample_corrupted = random.sample(corrupted_indices, min(5, len(corrupted_indices)))
-for i in sample_corrupted:
-    filepath = Path("02_Python_class_OOP/rectanble_project/data").joinpath(f'rectangle_{i}.json')
-    with open(filepath, 'r') as f:
-        data = json.load(f)
-    logger.error(f"rectangle_{i}.json: {data}")
+LAYOUTS = ("files", "ndjson", "csv")
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Generate the rectangles ----------------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+def generate_block(seed, corruption_rate, block):
+    '''
+    Generate the rectangles of one block (start, stop) of file numbers.
+
+    The random generator is re-seeded by (seed, file number) for each rectangle,
+    so the corpus only depends on the seed, not on the block size nor on the number of CPU cores.
+    Return a list of tuples (file_number, length, width, corrupted)
+    '''
+    start, stop = block
+    rng = random.Random()
+    rectangles = []
+
+    for i in range(start, stop):
+        rng.seed(f"{seed}:{i}")
+
+        # Generate random dimensions between 1.0 and 100.0
+        length = round(rng.uniform(1.0, 100.0), 1)
+        width = round(rng.uniform(1.0, 100.0), 1)
+        corrupted = rng.random() < corruption_rate
+
+        if corrupted:
+            # Decide which field(s) to corrupt
+            corrupt_length = rng.choice([True, False])
+            corrupt_width = rng.choice([True, False])
+
+            # Ensure at least one field is corrupted
+            if not corrupt_length and not corrupt_width:
+                corrupt_length = True
+
+            if corrupt_length:
+                length = rng.choice(corruption_types)(length)
+
+            if corrupt_width:
+                width = rng.choice(corruption_types)(width)
+
+        rectangles.append((i, length, width, corrupted))
+
+    return rectangles
+
+
+def write_block_files(output_dir, seed, corruption_rate, block):
+    '''
+    Generate a block of rectangles, then write them as one JSON file per rectangle ("files" layout).
+    Return the number of written and corrupted files.
+    '''
+    rectangles = generate_block(seed, corruption_rate, block)
+    corrupted_count = 0
+    file_dir = Path(output_dir)
+
+    for i, length, width, corrupted in rectangles:
+        with open(file_dir.joinpath(f"rectangle_{i}.json"), "w") as f:
+            f.write(json.dumps({"length": length, "width": width}, indent=4)) # One write call per file
+
+        corrupted_count += corrupted
+
+    return len(rectangles), corrupted_count
+
+
+def format_block_rows(layout, seed, corruption_rate, block):
+    '''
+    Generate a block of rectangles and format them as rows of a consolidated file (NDJSON or CSV).
+    The rows are written by the parent process, in order, so the single output file is written sequentially.
+    '''
+    rectangles = generate_block(seed, corruption_rate, block)
+    rows = io.StringIO()
+
+    if layout == "ndjson":
+        for i, length, width, _ in rectangles:
+            rows.write(json.dumps({"name": f"rectangle_{i}.json", "length": length, "width": width}) + "\n")
+
+    else:
+        csv.writer(rows, lineterminator="\n").writerows((f"rectangle_{i}.json", length, width) for i, length, width, _ in rectangles)
+
+    return rows.getvalue(), len(rectangles), sum(corrupted for *_, corrupted in rectangles)
+
+
+def generate_corpus(count=200, corruption_rate=0.1, seed=0, layout="files", output=".", cores=2, block_size=10_000):
+    '''
+    Generate a corpus of count rectangles (file numbers 1 to count) with the given layout:
+    ++ files: one rectangle_N.json file per rectangle in the output directory (read by -i with a flat scan)
+    ++ ndjson / csv: a single consolidated file (name, length, width per row)
+    The blocks of block_size rectangles are generated and written in parallel by the CPU cores.
+    Return the number of generated and corrupted rectangles.
+    '''
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout should be one of {', '.join(LAYOUTS)}")
+
+    output = Path(output)
+    blocks = [(start, min(start + block_size, count + 1)) for start in range(1, count + 1, block_size)]
+    generated_count, corrupted_count = 0, 0
+
+    with multiprocessing.Pool(processes=cores) as pool:
+        if layout == "files":
+            output.mkdir(exist_ok=True, parents=True)
+            write_block = partial(write_block_files, output, seed, corruption_rate)
+
+            for block_count, block_corrupted in pool.imap_unordered(write_block, blocks):
+                generated_count += block_count
+                corrupted_count += block_corrupted
+
+        else:
+            if output.suffix == "":
+                output = output.joinpath(f"rectangles.{layout}")
+
+            output.parent.mkdir(exist_ok=True, parents=True)
+            format_rows = partial(format_block_rows, layout, seed, corruption_rate)
+
+            with open(output, "w") as f:
+                if layout == "csv":
+                    f.write("name,length,width\n")
+
+                for rows, block_count, block_corrupted in pool.imap(format_rows, blocks): # Ordered, sequential write
+                    f.write(rows)
+                    generated_count += block_count
+                    corrupted_count += block_corrupted
+
+    return generated_count, corrupted_count
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Run the generator ----------------------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+def main():
+    formatter = lambda prog: HelpFormatter(prog, width=200, max_help_position=50)
+
+    parser = ArgumentParser(
+        prog = "Rectangle Data Generator",
+        description = "Generate a (deterministic) corpus of rectangle inputs, some of them being corrupted.",
+        formatter_class = formatter
+    )
+
+    parser.add_argument("-n", "--count", required=False, default=200, type=int, metavar="\b", help="The number of rectangles to generate.")
+    parser.add_argument("-r", "--corruption-rate", required=False, default=0.1, type=float, metavar="\b", help="The probability of a rectangle to be corrupted.")
+    parser.add_argument("-s", "--seed", required=False, default=None, type=int, metavar="\b", help="The random seed, the same seed always produces the same corpus (default: a random seed, logged).")
+    parser.add_argument("-l", "--layout", required=False, default="files", choices=LAYOUTS, help="The output layout.")
+    parser.add_argument("-o", "--output", required=False, default=str(Path(__file__).parent), metavar="\b", help="The output directory (or file for the ndjson and csv layouts).")
+    parser.add_argument("-c", "--cores", required=False, default=2, type=int, metavar="\b", help="The number of CPU cores generating and writing in parallel.")
+    parser.add_argument("-b", "--block-size", required=False, default=10_000, type=int, metavar="\b", help="The number of rectangles generated by a CPU core at once.")
+
+    args = parser.parse_args()
+
+    if args.seed is None:
+        args.seed = random.randrange(2**32)
+
+    logger.info(f"Generating {args.count} rectangles with seed {args.seed} ({args.layout} layout) into {args.output}")
+
+    generated_count, corrupted_count = generate_corpus(
+        count = args.count,
+        corruption_rate = args.corruption_rate,
+        seed = args.seed,
+        layout = args.layout,
+        output = args.output,
+        cores = args.cores,
+        block_size = args.block_size
+    )
+
+    logger.info(f"Generated {generated_count} rectangles ({generated_count - corrupted_count} valid, {corrupted_count} corrupted)")
+
+
+if __name__ == "__main__":
+    main()
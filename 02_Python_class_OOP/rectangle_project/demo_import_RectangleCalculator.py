@@ -1,8 +1,7 @@
-# Move to the directory containing the rectangle_module.py
-import os
-os.chdir("/home/longdpt/Documents/Academic/DataScience_MachineLearning/02_Python_class_OOP/rectangle_project")
-
 # Import the RectangleCalculator class from the rectangle_module.py
+# No need to move to its directory: the directory of a running script is always searched for imports.
+# From anywhere else, add the parent directory of rectangle_project to sys.path and import the package instead:
+#     from rectangle_project import RectangleCalculator
 from rectangle_module import RectangleCalculator
 
 
@@ -105,6 +104,26 @@ Instead, they are set directly, which can lead to inconsistencies and non-integr
 '''
 
 
+##################################################################################
+## Columnar (vectorized) calculation over many rectangles with calculate_many() ##
+##################################################################################
+
+# Lengths and widths are given as whole columns (lists, tuples or NumPy arrays), validated and computed at once
+results = RectangleCalculator.calculate_many(
+    lengths = [355, "55", "abc", 33],
+    widths = [263, 23, 7.5, None]
+)
+
+print(results["perimeter"]) # [1236.  156.   nan   nan]
+print(results["area"]) # [93365.  1265.    nan    nan]
+print(results["valid"]) # [ True  True False False]
+
+'''
+Corrupted inputs do not raise errors or return None one by one,
+they are marked as False in results["valid"] and hold NaN (Not a Number) in the other columns.
+'''
+
+
 #-------------------------------------------------------------------------------------------------------------------------#
 #----------------------------------------- non-canon way to use an imported class ----------------------------------------#
 #-------------------------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,422 @@
+from rectangle_module import RectangleCalculator, STAGES as RECTANGLE_STAGES
+from data.data_generator import generate_corpus
+from argparse import ArgumentParser, HelpFormatter
+from pathlib import Path
+from datetime import datetime
+from loguru import logger
+import json, os, platform, random, re, shutil, subprocess, sys, tempfile, threading, time, timeit
+
+
+PROJECT_DIR = Path(__file__).resolve().parent
+LAZY_MODULES = ("numpy", "loguru", "termcolor", "argparse", "multiprocessing", "concurrent.futures", "socketserver") # Only imported by rectangle_module when used
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#--------------------------------- Micro-benchmark of the input validation ---------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+def regex_validate(*numbers):
+    '''
+    The former regex-based validation of RectangleCalculator, kept here as the reference to compare against.
+    '''
+    numeric_pattern = r"^\+?\d+\.?\d*$"
+    numbers = list(numbers)
+
+    for idx, number in enumerate(numbers):
+        if re.match(numeric_pattern, str(number)):
+            numbers[idx] = float(number)
+
+        else:
+            numbers[idx] = None
+
+    return numbers
+
+
+def benchmark_validation(rectangle_count=100_000, repeat=5, seed=0):
+    '''
+    Compare the per-rectangle cost of validating and computing (perimeter + area) a rectangle:
+    ++ regex: the former path, validating the length and width with a regex 3 times per rectangle
+              (in _single_workflow, perimeter and area)
+    ++ fast: the type-dispatched validation, done once per rectangle then cached on the instance
+    Return a dictionary {input type: {path: microseconds per rectangle}}
+    '''
+    rng = random.Random(seed)
+    validate = RectangleCalculator._RectangleCalculator__valiate_input_number
+
+    float_inputs = [(round(rng.uniform(1, 100), 1), round(rng.uniform(1, 100), 1)) for _ in range(rectangle_count)]
+    string_inputs = [(str(length), str(width)) for length, width in float_inputs]
+
+    def regex_path(inputs):
+        for length, width in inputs:
+            length, width = regex_validate(length, width) # _single_workflow
+            length, width = regex_validate(length, width) # perimeter
+            perimeter = 2 * (length + width)
+            length, width = regex_validate(length, width) # area
+            area = length * width
+
+    def fast_path(inputs):
+        rectangle = RectangleCalculator()
+
+        for length, width in inputs:
+            rectangle.length, rectangle.width = validate(length, width) # _single_workflow
+            rectangle.perimeter
+            rectangle.area
+
+    timings = {}
+
+    for input_type, inputs in [("float", float_inputs), ("string", string_inputs)]:
+        timings[input_type] = {
+            path_name: min(timeit.repeat(lambda: path(inputs), number=1, repeat=repeat)) / rectangle_count * 1e6
+            for path_name, path in [("regex", regex_path), ("fast", fast_path)]
+        }
+
+    return timings
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#--------------------------------- End-to-end benchmark over generated corpora -----------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+def prepare_corpus(corpus_dir, size, seed=0):
+    '''
+    Generate (once) a corpus of size rectangle JSON files, reused by every run of the same size.
+    '''
+    corpus_path = Path(corpus_dir).joinpath(f"files_{size}_seed_{seed}")
+    complete_marker = corpus_path.with_suffix(".complete")
+
+    if not complete_marker.exists():
+        shutil.rmtree(corpus_path, ignore_errors=True)
+        generate_corpus(count=size, corruption_rate=0.1, seed=seed, layout="files", output=corpus_path, cores=os.cpu_count())
+        complete_marker.touch()
+
+    return corpus_path
+
+
+class ProcessTreeRSS:
+    '''
+    Sample (every interval seconds, in a thread) the total RSS of a process and all its descendants, e.g. the CLI and its workers,
+    from /proc. wait4().ru_maxrss only reports the peak of the single largest process of the tree.
+    Use it as a context manager around the run: peak_mb is the peak total RSS (MB), None where /proc is not available (not Linux).
+    '''
+    def __init__(self, pid, interval=0.01):
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb = None
+        self.__stop = threading.Event()
+        self.__sampler = threading.Thread(target=self.__sample, daemon=True)
+
+
+    def __enter__(self):
+        if Path("/proc/self/status").exists():
+            self.__sampler.start()
+
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.__stop.set()
+
+        if self.__sampler.is_alive():
+            self.__sampler.join()
+
+
+    def __sample(self):
+        while True:
+            total_kb = sum(self.__rss_kb(pid) for pid in self.__tree_pids())
+
+            if total_kb > 0:
+                self.peak_mb = max(self.peak_mb or 0, total_kb / 1024)
+            
+            if self.__stop.wait(self.interval):
+                return None
+
+
+    def __tree_pids(self):
+        children = {} # {parent pid: [child pid]} of every running process
+
+        for stat_path in Path("/proc").glob("[0-9]*/stat"):
+            try:
+                fields = stat_path.read_text().rsplit(")", 1)[1].split() # The command name, in parentheses, can contain spaces
+
+            except (OSError, IndexError):
+                continue # The process has exited meanwhile
+            
+            children.setdefault(int(fields[1]), []).append(int(stat_path.parent.name))
+
+        tree_pids, pending = [], [self.pid]
+
+        while pending:
+            pid = pending.pop()
+            tree_pids.append(pid)
+            pending.extend(children.get(pid, []))
+        
+        return tree_pids
+
+
+    @staticmethod
+    def __rss_kb(pid):
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+
+        except (OSError, ValueError):
+            pass # The process has exited meanwhile
+
+        return 0 # Exited, or a zombie without memory
+
+
+def run_cli(corpus_path, output_dir, cores, extra_args=()):
+    '''
+    Run the rectangle_module CLI in a fresh process.
+    Return a dictionary of the wall time (seconds), the peak total RSS (MB) of the CLI process and its worker processes (sampled),
+    the peak RSS of the largest single one of them (MB) and the stage timings (seconds) measured by the CLI within this very run.
+    '''
+    timings_path = Path(output_dir).with_name(f"{Path(output_dir).name}_timings.json")
+    command = [sys.executable, str(PROJECT_DIR.joinpath("rectangle_module.py")), "-i", str(corpus_path), "-o", str(output_dir), "-c", str(cores), "--timings", str(timings_path), *extra_args]
+
+    t0 = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=Path(output_dir).parent)
+
+    with ProcessTreeRSS(process.pid) as tree_rss:
+        _, status, rusage = os.wait4(process.pid, 0) # The rusage of this very process, including its waited-for workers
+        wall_time = time.perf_counter() - t0
+
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    if process.returncode != 0:
+        raise RuntimeError(f"The CLI failed (exit code {process.returncode}): {' '.join(command)}")
+
+    stage_timings = json.loads(timings_path.read_text())
+    timings_path.unlink()
+
+    return {
+        "wall_time": wall_time,
+        "peak_rss_mb": tree_rss.peak_mb,
+        "max_process_rss_mb": rusage.ru_maxrss / 1024, # ru_maxrss is in kilobytes on Linux
+        "stages": stage_timings
+    }
+
+
+def run_api(corpus_path, output_dir, cores):
+    '''
+    Run the batch engine through the library API (RectangleCalculator._run_batch) in this process.
+    Return a dictionary of the wall time (seconds), the peak total RSS (MB) of this process and its worker processes (sampled)
+    and the stage timings (seconds) measured within this very run.
+    '''
+    calculator = RectangleCalculator()
+    calculator._input = Path(corpus_path)
+    calculator._output = Path(output_dir)
+    calculator._cores = cores
+    Path(output_dir).mkdir(exist_ok=True, parents=True)
+
+    with ProcessTreeRSS(os.getpid()) as tree_rss:
+        t0 = time.perf_counter()
+        calculator._run_batch(RectangleCalculator._scan_json_files(corpus_path))
+        wall_time = time.perf_counter() - t0
+
+    return {
+        "wall_time": wall_time,
+        "peak_rss_mb": tree_rss.peak_mb,
+        "max_process_rss_mb": None, # Not measurable for the workers of a pool in this process
+        "stages": calculator._stage_timings
+    }
+
+
+def benchmark_end_to_end(sizes, cores_list, corpus_dir, repeat=1):
+    '''
+    Run the CLI and the library API over corpora of increasing size with several numbers of CPU cores.
+    Return a list of result dictionaries (one per size, interface and cores), each with the stage timings of its best run.
+    '''
+    logger.disable("rectangle_module") # Keep the console for the benchmark report
+    runs = []
+    base_cores = min(cores_list)
+
+    for size in sizes:
+        corpus_path = prepare_corpus(corpus_dir, size)
+        scratch_dir = Path(tempfile.mkdtemp(prefix="rectangle_benchmark_", dir=corpus_dir))
+
+        try:
+            for interface in ["cli", "api"]:
+                base_throughput = None
+
+                for cores in sorted(cores_list):
+                    measures = []
+
+                    for attempt in range(repeat):
+                        output_dir = scratch_dir.joinpath(f"{interface}_{cores}_{attempt}")
+                        run = run_cli if interface == "cli" else run_api
+                        measures.append(run(corpus_path, output_dir, cores))
+                        shutil.rmtree(output_dir, ignore_errors=True)
+
+                    best = min(measures, key=lambda measure: measure["wall_time"])
+                    throughput = size / best["wall_time"]
+                    base_throughput = throughput if cores == base_cores else base_throughput
+
+                    runs.append({
+                        "size": size,
+                        "interface": interface,
+                        "cores": cores,
+                        "wall_time_s": best["wall_time"],
+                        "files_per_s": throughput,
+                        "peak_rss_mb": best["peak_rss_mb"],
+                        "max_process_rss_mb": best["max_process_rss_mb"],
+                        "scaling_efficiency": (throughput / base_throughput) / (cores / base_cores),
+                        **{f"{stage}_s": seconds for stage, seconds in best["stages"].items()}
+                    })
+
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    logger.enable("rectangle_module")
+
+    return runs
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Import-time budget ---------------------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+def benchmark_import_time(budget_ms=100, repeat=5):
+    '''
+    Measure the cumulative import time of rectangle_module with "python -X importtime", in fresh processes,
+    and the wall time of a single -l/-w calculation through the CLI above the start of a bare interpreter
+    (the best of repeat is kept for all of them).
+    The budget is met if both the import and the single calculation take at most budget_ms,
+    and neither of them imports any of the LAZY_MODULES.
+    Return a dictionary of the measures.
+    '''
+    single_cli_command = [str(PROJECT_DIR.joinpath("rectangle_module.py")), "-l", "2", "-w", "3"]
+    import_times, eager_modules = [], set()
+
+    def imported_modules(command): # {module: cumulative import time (microseconds)} of a fresh process
+        stderr = subprocess.run([sys.executable, "-X", "importtime", *command], cwd=PROJECT_DIR, capture_output=True, text=True, check=True).stderr
+        cumulative_times = {}
+
+        for line in stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+
+            _, cumulative_time, module = line.split("|")
+
+            if cumulative_time.strip().isdecimal(): # Skip the header line
+                cumulative_times[module.strip()] = int(cumulative_time)
+        
+        return cumulative_times
+
+    for _ in range(repeat):
+        cumulative_times = imported_modules(["-c", "import rectangle_module"])
+        import_times.append(cumulative_times["rectangle_module"] / 1000)
+        eager_modules.update(module for module in LAZY_MODULES if module in cumulative_times)
+
+    cli_modules = imported_modules(single_cli_command) # The single calculation runs rectangle_module as __main__
+    eager_modules.update(module for module in LAZY_MODULES if module in cli_modules)
+
+    def best_wall_time(command):
+        wall_times = []
+
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            subprocess.run([sys.executable, *command], cwd=PROJECT_DIR, capture_output=True, check=True)
+            wall_times.append(time.perf_counter() - t0)
+        
+        return min(wall_times) * 1000
+
+    startup_ms = best_wall_time(["-c", "pass"])
+    single_cli_ms = best_wall_time(single_cli_command)
+
+    return {
+        "import_ms": min(import_times),
+        "budget_ms": budget_ms,
+        "eager_modules": sorted(eager_modules),
+        "startup_ms": startup_ms,
+        "single_cli_ms": single_cli_ms,
+        "within_budget": (min(import_times) <= budget_ms) and (single_cli_ms - startup_ms <= budget_ms) and (len(eager_modules) == 0)
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_DIR, capture_output=True, text=True, check=True).stdout.strip()
+
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+#---------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Run the benchmarks -------------------------------------------#
+#---------------------------------------------------------------------------------------------------------#
+
+def main():
+    formatter = lambda prog: HelpFormatter(prog, width=200, max_help_position=50)
+
+    parser = ArgumentParser(
+        prog = "Rectangle Calculator Benchmark",
+        description = "Measure the performance of the rectangle_module.",
+        formatter_class = formatter
+    )
+
+    parser.add_argument("--suite", required=False, default="all", choices=["validation", "end-to-end", "import-time", "all"], help="The benchmark suite to run.")
+    parser.add_argument("-n", "--rectangles", required=False, default=100_000, type=int, metavar="\b", help="The number of rectangles used by the validation micro-benchmark.")
+    parser.add_argument("-r", "--repeat", required=False, default=5, type=int, metavar="\b", help="The number of repetitions of the validation micro-benchmark (the best one is reported).")
+    parser.add_argument("-s", "--sizes", required=False, default=[1_000, 10_000, 100_000], type=int, nargs="+", metavar="\b", help="The corpus sizes (number of JSON files) of the end-to-end benchmark.")
+    parser.add_argument("-c", "--cores", required=False, default=[1, 2, 4], type=int, nargs="+", metavar="\b", help="The numbers of CPU cores of the end-to-end benchmark.")
+    parser.add_argument("-d", "--corpus-dir", required=False, default=str(Path(tempfile.gettempdir()).joinpath("rectangle_corpora")), metavar="\b", help="The directory caching the generated corpora.")
+    parser.add_argument("-b", "--import-budget", required=False, default=100, type=float, metavar="\b", help="The maximum import time of rectangle_module, and time of a single -l/-w calculation above the start of the interpreter, in milliseconds; the benchmark fails (exit code 1) above it.")
+    parser.add_argument("-o", "--output", required=False, default="", metavar="\b", help="The JSON file to write the machine-readable results in (compare them between commits).")
+
+    args = parser.parse_args()
+
+    results = {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count()
+    }
+
+    if args.suite in ["validation", "all"]:
+        print(f"Validation + perimeter + area, per rectangle ({args.rectangles} rectangles, best of {args.repeat}):")
+        results["validation"] = benchmark_validation(args.rectangles, args.repeat)
+
+        for input_type, timing in results["validation"].items():
+            speedup = timing["regex"] / timing["fast"]
+            print(f"++ {input_type:<6} inputs: regex = {timing['regex']:.3f} us, fast = {timing['fast']:.3f} us ({speedup:.1f}x faster)")
+
+    if args.suite in ["end-to-end", "all"]:
+        Path(args.corpus_dir).mkdir(exist_ok=True, parents=True)
+        results["runs"] = benchmark_end_to_end(args.sizes, args.cores, args.corpus_dir)
+
+        print("\nEnd-to-end throughput (peak RSS: total of the process and its workers, sampled; stages: seconds, summed over the cores):")
+        for run in results["runs"]:
+            peak_rss = "" if run["peak_rss_mb"] is None else f", peak RSS = {run['peak_rss_mb']:.0f} MB"
+            max_process_rss = "" if run["max_process_rss_mb"] is None else f", max single-process RSS = {run['max_process_rss_mb']:.0f} MB"
+            stages = ", ".join(f"{stage} = {run[f'{stage}_s']:.3f}" for stage in RECTANGLE_STAGES)
+            print(
+                f"++ {run['size']:>9} files, {run['interface']}, {run['cores']} cores: {run['files_per_s']:,.0f} files/s "
+                f"({run['wall_time_s']:.2f} s, scaling efficiency = {run['scaling_efficiency']:.0%}{peak_rss}{max_process_rss})"
+            )
+            print(f"   stages: {stages}")
+
+    if args.suite in ["import-time", "all"]:
+        results["import_time"] = benchmark_import_time(args.import_budget)
+        import_time = results["import_time"]
+        eager_modules = ", ".join(import_time["eager_modules"]) or "none"
+
+        print(f"\nImport and single calculation times of rectangle_module (budget = {import_time['budget_ms']:.0f} ms):")
+        print(f"++ import = {import_time['import_ms']:.1f} ms, eagerly imported heavy modules: {eager_modules}")
+        print(f"++ single -l/-w calculation through the CLI = {import_time['single_cli_ms']:.1f} ms ({import_time['single_cli_ms'] - import_time['startup_ms']:.1f} ms above a bare interpreter)")
+        print(f"++ {'within budget' if import_time['within_budget'] else 'OVER BUDGET'}")
+
+    if args.output != "":
+        with open(args.output, "w") as json_pointer:
+            json.dump(results, json_pointer, indent=4)
+
+        print(f"\nResults are saved in {args.output}")
+
+    if not results.get("import_time", {"within_budget": True})["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
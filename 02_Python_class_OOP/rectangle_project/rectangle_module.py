@@ -1,9 +1,152 @@
-from loguru import logger
 from pathlib import Path
-from argparse import ArgumentParser, HelpFormatter
-import json, re, shutil
-from termcolor import colored
-import multiprocessing
+import json, re, os, sys, math, time, types, signal, threading, importlib
+from functools import partial
+from collections import deque
+from itertools import islice, chain
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Lazy imports ---------------------------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+class _LazyImport:
+    '''
+    Stand-in for a module, or for an attribute of a module (module_name, attribute_name), imported on its first use.
+
+    Importing rectangle_module or calculating a single rectangle (-l/-w) does not pay for the machinery
+    of the batch path (NumPy, multiprocessing, thread pools, sockets...) nor for the logging and coloring ones
+    if nothing is logged. Each one is imported once, the first time one of its attributes is accessed or it is called.
+    '''
+
+    def __init__(self, module_name, attribute_name=None):
+        self.__module_name = module_name
+        self.__attribute_name = attribute_name
+        self.__target = None
+
+
+    def __load(self): # Internal use only
+        if self.__target is None:
+            target = importlib.import_module(self.__module_name)
+            self.__target = target if self.__attribute_name is None else getattr(target, self.__attribute_name)
+        
+        return self.__target
+
+
+    def __getattr__(self, name):
+        return getattr(self.__load(), name)
+    
+
+    def __call__(self, *args, **kwargs):
+        return self.__load()(*args, **kwargs)
+
+
+class _ConsoleLogger:
+    '''
+    Stand-in for the logger of loguru, printing to stderr in the default format of loguru until loguru is needed.
+
+    Loguru (and the asyncio, multiprocessing... it imports) costs more than the whole single calculation (-l/-w),
+    which only prints a few messages to the console. Loguru is imported the first time anything else than
+    a log message is asked (a log file added with logger.add(), logger.disable()...), and the messages go through it
+    as soon as it is imported, by this module or by any other one (e.g. the benchmark disabling these logs).
+    '''
+
+    LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40, "CRITICAL": 50}
+    LEVEL_COLORS = {"DEBUG": "\x1b[34m\x1b[1m", "INFO": "\x1b[1m", "WARNING": "\x1b[33m\x1b[1m", "ERROR": "\x1b[31m\x1b[1m", "CRITICAL": "\x1b[41m\x1b[1m"}
+
+    def __init__(self):
+        self.__loguru_logger = _LazyImport("loguru", "logger")
+        self.__min_level = self.LEVELS.get(os.environ.get("LOGURU_LEVEL", "DEBUG").upper(), 10)
+
+
+    def __log(self, level, message): # Internal use only
+        if "loguru" in sys.modules:
+            return self.__loguru_logger.opt(depth=2).log(level, message) # depth: report the caller of info(), warning()...
+        
+        if self.LEVELS[level] < self.__min_level:
+            return None
+
+        frame = sys._getframe(2)
+        now = time.time()
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now)) + f".{int(now % 1 * 1000):03d}"
+        location = (frame.f_globals.get("__name__"), frame.f_code.co_name, frame.f_lineno)
+
+        if sys.stderr.isatty() and not os.environ.get("NO_COLOR"):
+            level_color = self.LEVEL_COLORS[level]
+            name, function, line = (f"\x1b[36m{field}\x1b[0m" for field in location)
+            line = f"\x1b[32m{timestamp}\x1b[0m | {level_color}{level: <8}\x1b[0m | {name}:{function}:{line} - {level_color}{message}\x1b[0m\n"
+        
+        else:
+            line = f"{timestamp} | {level: <8} | {location[0]}:{location[1]}:{location[2]} - {message}\n"
+        
+        sys.stderr.write(line)
+        sys.stderr.flush()
+
+
+    def debug(self, message):
+        self.__log("DEBUG", message)
+
+
+    def info(self, message):
+        self.__log("INFO", message)
+
+
+    def warning(self, message):
+        self.__log("WARNING", message)
+
+
+    def error(self, message):
+        self.__log("ERROR", message)
+
+
+    def critical(self, message):
+        self.__log("CRITICAL", message)
+
+
+    def __getattr__(self, name):
+        return getattr(self.__loguru_logger, name)
+
+
+def colored(text, *args, stream=None, **kwargs):
+    '''
+    termcolor.colored(), without importing termcolor when the text would stay plain anyway
+    (the stream it is written to is not a terminal, or colors are disabled by NO_COLOR / ANSI_COLORS_DISABLED).
+    stream: where the text is written, stderr by default (the console logger), e.g. sys.stdout for the prompt of input().
+    '''
+    stream = sys.stderr if stream is None else stream
+
+    if os.environ.get("NO_COLOR") or os.environ.get("ANSI_COLORS_DISABLED") or not (os.environ.get("FORCE_COLOR") or stream.isatty()):
+        return str(text)
+
+    return _termcolor_colored(text, *args, force_color=True, **kwargs) # termcolor itself would only check stdout
+
+
+logger = _ConsoleLogger()
+_termcolor_colored = _LazyImport("termcolor", "colored")
+ArgumentParser = _LazyImport("argparse", "ArgumentParser")
+HelpFormatter = _LazyImport("argparse", "HelpFormatter")
+ThreadPoolExecutor = _LazyImport("concurrent.futures", "ThreadPoolExecutor")
+wait = _LazyImport("concurrent.futures", "wait")
+multiprocessing = _LazyImport("multiprocessing")
+shared_memory = _LazyImport("multiprocessing.shared_memory")
+socketserver = _LazyImport("socketserver")
+shutil = _LazyImport("shutil")
+csv = _LazyImport("csv")
+hashlib = _LazyImport("hashlib")
+np = _LazyImport("numpy")
+
+
+CONSOLIDATED_SUFFIXES = (".ndjson", ".jsonl", ".csv") # Single-file (columnar) layouts holding many rectangles
+CONSOLIDATED_COLUMNS = ("name", "length", "width", "perimeter", "area") # One row per rectangle
+ANSI_ESCAPE_PATTERN = re.compile(r"\x1b\[[0-9;]*m") # Colors of termcolor, only meaningful in a terminal
+CORRUPTED_EXAMPLE_COUNT = 10 # Number of corrupted file names shown in the summary of a batch run
+RESULT_COLUMNS = ("length", "width", "perimeter", "area") # Columns of the shared result buffer of a display-only batch run
+SUMMARY_SAMPLE_SIZE = 100_000 # Valid rectangles kept to estimate the quartiles in the summary of a display-only batch run
+PENDING_WRITES_LIMIT = 1024 # Writes a batch worker leaves pending across its chunks before waiting for the oldest ones
+STAGES = ("scan", "read", "compute", "write") # Stages timed by a batch run with outputs (read, compute and write: summed over the CPU cores, write: 0 for a consolidated file)
+CLI_DEFAULTS = { # Default values of the command-line arguments
+    "length": None, "width": None, "input": "", "output": "", "cores": 2, "convert_to": "", "chunk_size": 256,
+    "incremental": False, "read_threads": 4, "write_threads": 4, "in_flight": None, "serve": "", "timings": ""
+}
 
 
 #-----------------------------------------------------------------------------------------------------------#
@@ -15,11 +158,15 @@ class RectangleCalculator:
     This class will takes the length and width of a rectangle as inputs, 
     then return the corresponding perimeter and area as outputs.
 
-    It can also read inputs from multiple JSON files.
-    The results can be returned in a specified JSON file.
-    The class supports multicore computing.
+    It can also read inputs from multiple JSON files, or from a single consolidated NDJSON/CSV file.
+    The results can be returned in a specified JSON file, or in a single consolidated NDJSON/CSV file.
+    The class supports multicore computing, and columnar (vectorized) computing over many rectangles at once.
     '''
 
+    _io_executors = {} # Reader/writer thread pools of the current process, reused by the batch workers
+    _pending_writes = {} # {pid: deque of (results, write futures)} of the chunks whose writes are not yet waited for
+    _flush_barrier = None # Set in the batch workers by _init_batch_worker()
+
 
     def __init__(self, length=None, width=None):
         '''
@@ -28,23 +175,61 @@ class RectangleCalculator:
         length: the length of the rectangle (for inplace calculating)
         width: the width of the rectangle (for inplace calculating)
         cores: the number of CPU cores using for parallel computing
+        chunk_size: the number of JSON files that each CPU core reads, validates and computes at once (batch mode)
+        in_flight: the maximum number of chunks submitted to the CPU cores ahead of the saved results (default: 2 x cores)
+        incremental: only recalculate new or changed input JSON files, tracked by a manifest next to the outputs
+        read_threads: the number of threads reading (prefetching) the input JSON files in each CPU core (batch mode)
+        write_threads: the number of threads writing the output JSON files in each CPU core (batch mode)
         '''
         self._input = ''
         self._output = ''
+        self.__validated_given = None # Cache of the validated (length, width), reset when they are changed
         self.length = length
         self.width = width
         self.__length = None
         self.__width = None
         self._cores = 2
+        self._chunk_size = 256
+        self._in_flight = None
+        self._incremental = False
+        self._read_threads = 4
+        self._write_threads = 4
+        self._stage_timings = dict.fromkeys(STAGES, 0.0) # Stage timings (seconds) of the last batch run with outputs
         self._single_output_path = None
         self._json_count = 0
 
 
+    @property
+    def length(self):
+        return self.__given_length
+
+
+    @length.setter
+    def length(self, length):
+        self.__given_length = length
+        self.__validated_given = None
+
+
+    @property
+    def width(self):
+        return self.__given_width
+
+
+    @width.setter
+    def width(self, width):
+        self.__given_width = width
+        self.__validated_given = None
+
+
     def __validate_output_directory(self): # Internal use only, cannot call out when the module is being imported
         match str(self._output):
             case "":
                 pass
             
+            case _ if Path(self._output).suffix in CONSOLIDATED_SUFFIXES: # All results are written in a single file
+                self._output = Path(self._output)
+                self._output.parent.mkdir(exist_ok=True, parents=True)
+            
             case _:
                 if (Path(self._output).suffix != ""):
                     self._output = Path(self._output)
@@ -55,9 +240,7 @@ class RectangleCalculator:
                 else:
                     self._output = Path(self._output)
                 
-                non_json_count = sum([1 for _ in self._output.rglob("*[!.json]")]) # Ensure the directory contains only json file
-                
-                if (self._output.is_dir()) and (non_json_count == 0):
+                if (not self._incremental) and RectangleCalculator.__contains_only_json(self._output): # Ensure the directory contains only json file
                     shutil.rmtree(self._output)
                 
                 self._output.mkdir(exist_ok=True, parents=True)
@@ -85,9 +268,7 @@ class RectangleCalculator:
         
         
         if json_output_file.suffix == "":
-            non_json_count = sum([1 for _ in json_output_file.rglob("*[!.json]")]) # Ensure the directory contains only json file
-            
-            if (json_output_file.is_dir()) and (non_json_count == 0):
+            if RectangleCalculator.__contains_only_json(json_output_file): # Ensure the directory contains only json file
                 shutil.rmtree(json_output_file)
                 json_output_file.mkdir(exist_ok=True)
             
@@ -108,21 +289,168 @@ class RectangleCalculator:
         return json_output_file
 
 
+    @staticmethod
+    def __contains_only_json(directory): # Internal use only, cannot call out when the module is being imported
+        '''
+        Cheap check (non-recursive, stops at the first offending entry) that a directory only holds JSON files.
+        Sub-directories count as non-JSON entries, so nothing outside the top level needs to be scanned.
+        '''
+        if not Path(directory).is_dir():
+            return False
+        
+        with os.scandir(directory) as entries:
+            return not any((not entry.name.endswith(".json")) or entry.is_dir() for entry in entries)
+
+
+    @staticmethod
+    def _scan_json_files(input_dir):
+        '''
+        Lazily yield the names of the JSON files in the input directory, as the directory iterator produces them.
+        '''
+        with os.scandir(input_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") and entry.is_file():
+                    yield entry.name
+
+
     @staticmethod
     def __valiate_input_number(*numbers): # Internal use only, cannot call out when the module is being imported
-        numeric_pattern = r"^\+?\d+\.?\d*$"
+        '''
+        Return the given numbers as floats, None for the invalid ones.
+
+        Type-dispatched (no regex): finite non-negative int/float are accepted directly,
+        other values are parsed once as strings: optional "+", digits, optional "." and digits (e.g. "12", "+3.5", "7.").
+        '''
         numbers = list(numbers)
         
         for idx, number in enumerate(numbers):
-            if re.match(numeric_pattern, str(number)):
-                numbers[idx] = float(number)
+            if isinstance(number, (int, float)) and (not isinstance(number, bool)):
+                try:
+                    number = float(number)
+                
+                except OverflowError: # Integer too large for a float
+                    number = None
+
+                numbers[idx] = number if (number is not None) and (0 <= number < math.inf) else None
+                continue
             
+            number = str(number)
+            integer_part, _, decimal_part = number.removeprefix("+").partition(".")
+
+            if integer_part.isdecimal() and ((decimal_part == "") or decimal_part.isdecimal()):
+                number = float(number)
+                numbers[idx] = number if number < math.inf else None # Too many digits overflow to inf
+
             else:
                 numbers[idx] = None
         
         return numbers
 
 
+    def __validated_dimensions(self): # Internal use only, cannot call out when the module is being imported
+        '''
+        Return the validated (length, width) used by the perimeter and area properties.
+        The given length and width are only validated once, until one of them is changed.
+        '''
+        if (None in [self.__length, self.__width]) and ((str(self._input) == "") or (not Path(self._input).is_dir())):
+            if self.__validated_given is None:
+                self.__validated_given = tuple(RectangleCalculator.__valiate_input_number(self.length, self.width))
+            
+            return self.__validated_given
+        
+        return self.__length, self.__width # Already validated when being loaded from the JSON file
+
+
+    @staticmethod
+    def __validate_input_array(numbers): # Internal use only, cannot call out when the module is being imported
+        '''
+        Vectorized version of __valiate_input_number: validate a whole column of numbers in one pass.
+        Return a float64 array (NaN for invalid inputs) and the corresponding boolean mask of valid inputs.
+        '''
+        numbers = np.asarray(numbers)
+
+        if (numbers.dtype.kind in "iuf") and (numbers.dtype != bool): # Already numeric, no string parsing is needed
+            numbers = numbers.astype(np.float64)
+            with np.errstate(invalid="ignore"):
+                valid = np.isfinite(numbers) & (numbers >= 0)
+
+        elif numbers.dtype == object: # Mixed inputs (e.g. read from JSON files), each one is validated by its own type as in __valiate_input_number
+            numbers = np.array(
+                [math.nan if number is None else number for number in RectangleCalculator.__valiate_input_number(*numbers.ravel())],
+                dtype=np.float64
+            ).reshape(numbers.shape)
+            valid = ~np.isnan(numbers)
+
+        else: # String inputs, apply the same rule as the regex r"^\+?\d+\.?\d*$" on the whole array
+            numbers = numbers.astype(str)
+            numbers = np.where(np.char.startswith(numbers, "+"), np.char.replace(numbers, "+", "", count=1), numbers)
+            valid = (
+                (np.char.count(numbers, ".") <= 1)
+                & (~np.char.startswith(numbers, "."))
+                & np.char.isdecimal(np.char.replace(numbers, ".", "", count=1))
+            )
+            numbers = np.where(valid, numbers, "nan").astype(np.float64)
+            valid &= np.isfinite(numbers) # Too many digits overflow to inf
+
+        numbers[~valid] = np.nan
+
+        return numbers, valid
+
+
+    @staticmethod
+    def calculate_many(lengths, widths):
+        '''
+        Columnar (vectorized) counterpart of the perimeter and area properties.
+
+        lengths, widths: arrays or sequences of the same size (numbers, numeric strings or corrupted values)
+        Return a dictionary of NumPy arrays with keys "length", "width", "perimeter", "area" and "valid",
+        corrupted rectangles are marked as False in "valid" and hold NaN instead of None.
+        '''
+        lengths, valid_lengths = RectangleCalculator.__validate_input_array(lengths)
+        widths, valid_widths = RectangleCalculator.__validate_input_array(widths)
+
+        if lengths.shape != widths.shape:
+            raise ValueError(f"lengths and widths must have the same shape, got {lengths.shape} and {widths.shape}")
+
+        return {
+            "length": lengths,
+            "width": widths,
+            "perimeter": 2 * (lengths + widths),
+            "area": lengths * widths,
+            "valid": valid_lengths & valid_widths
+        }
+
+
+    @staticmethod
+    def _calculate_request(request):
+        '''
+        Calculate a single request of the service mode (see RectangleService), given as a dictionary:
+        ++ {"length": ..., "width": ...}: the dimensions themselves
+        ++ {"path": ...}: the path of an input JSON file, plus an optional "output" path of the result JSON file
+        Return the result as a dictionary (length, width, perimeter, area), or {"error": ...} for missing or corrupted inputs.
+        '''
+        if "path" in request:
+            if not Path(str(request["path"])).is_file():
+                return {"error": f"MISSING input, no JSON file at {request["path"]}"}
+            
+            length, width = RectangleCalculator.__read_json_inputs(request["path"])
+        
+        else:
+            length, width = request.get("length"), request.get("width")
+        
+        length, width = RectangleCalculator.__valiate_input_number(length, width)
+
+        if None in [length, width]:
+            return {"error": "CORRUPTED inputs, they are expected to be POSITIVE NUMBERS (greater than zero)"}
+        
+        result = {"length": length, "width": width, "perimeter": 2 * (length + width), "area": length * width}
+
+        if request.get("output"):
+            RectangleCalculator.__write_json_output(request["output"], *result.values())
+        
+        return result
+
+
     def __load_rectangle_inputs(self, json_rectangle_file): # Internal use only, cannot call out when the module is being imported
         if len(Path(json_rectangle_file).parts) > 1:
             json_file_path = json_rectangle_file
@@ -135,20 +463,39 @@ class RectangleCalculator:
             length, width = RectangleCalculator.__valiate_input_number(length, width)
         
         if None in [length, width]:
-            json_rectangle_file = colored(json_rectangle_file, "yellow", attrs=['bold'])
-            datatype_hint = colored("! They are expected to be POSITIVE NUMBERS (greater than zero)", "red", attrs = ['bold'])
-            logger.error(f"CORRUPTED inputs are detected in {json_rectangle_file}{datatype_hint}\n")
+            RectangleCalculator.__log_corrupted_inputs(json_rectangle_file)
         
         return length, width
+
+
+    @staticmethod
+    def __log_corrupted_inputs(json_rectangle_file): # Internal use only, cannot call out when the module is being imported
+        json_rectangle_file = colored(str(json_rectangle_file), "yellow", attrs=['bold'])
+        datatype_hint = colored("! They are expected to be POSITIVE NUMBERS (greater than zero)", "red", attrs = ['bold'])
+        logger.error(f"CORRUPTED inputs are detected in {json_rectangle_file}{datatype_hint}\n")
+
+
+    @staticmethod
+    def __log_corrupted_summary(corrupted_count, corrupted_examples): # Internal use only, cannot call out when the module is being imported
+        '''
+        Log a single summary of the corrupted inputs of a batch run, instead of one line per corrupted file.
+        '''
+        if corrupted_count == 0:
+            return None
+        
+        examples = ", ".join(corrupted_examples)
+
+        if corrupted_count > len(corrupted_examples):
+            examples += f" and {corrupted_count - len(corrupted_examples)} more"
+        
+        corrupted_count = colored(str(corrupted_count), "yellow", attrs=['bold'])
+        datatype_hint = colored("! They are expected to be POSITIVE NUMBERS (greater than zero)", "red", attrs = ['bold'])
+        logger.error(f"CORRUPTED inputs are detected in {corrupted_count} rectangles ({examples}){datatype_hint}\n")
     
 
     @property
     def perimeter(self):
-        if (None in [self.__length, self.__width]) and ((str(self._input) == "") or (not Path(self._input).is_dir())):
-            length, width = RectangleCalculator.__valiate_input_number(self.length, self.width)
-        
-        else:
-            length, width = RectangleCalculator.__valiate_input_number(self.__length, self.__width)
+        length, width = self.__validated_dimensions()
         
         if None in [length, width]:
             self.__perimeter = None
@@ -161,11 +508,7 @@ class RectangleCalculator:
 
     @property
     def area(self):
-        if (None in [self.__length, self.__width]) and ((str(self._input) == "") or (not Path(self._input).is_dir())):
-            length, width = RectangleCalculator.__valiate_input_number(self.length, self.width)
-        
-        else:
-            length, width = RectangleCalculator.__valiate_input_number(self.__length, self.__width)
+        length, width = self.__validated_dimensions()
         
         if None in [length, width]:
             self.__area = None
@@ -206,6 +549,20 @@ class RectangleCalculator:
                 logger.info(f"The result is saved in {result_path}\n")
 
     
+    @staticmethod
+    def __format_summary(rectangle_output_name, length, width, perimeter, area): # Internal use only, cannot call out when the module is being imported
+        perimeter_result = colored(f"++ Perimeter = 2 * ({length} + {width}) = {perimeter}", "cyan", attrs=["bold"])
+        area_result = colored(f"++ Area = {length} * {width} = {area}", "cyan", attrs=["bold"])
+
+        return (
+            f"\n\nResult of the {rectangle_output_name} {colored("rectangle:", "white", attrs=["bold"])}\n"
+            f"++ Length = {length}\n"
+            f"++ Width = {width}\n"
+            f"{perimeter_result}\n"
+            f"{area_result}\n"
+        )
+
+
     def summary(self, rectangle_output_name="nameless"):
         rectangle_output_name = colored(str(rectangle_output_name), (139, 0, 0), attrs=["bold"])
         prioritize_message = colored(", prioritize them for calculation.", "yellow", attrs=['bold'])
@@ -218,16 +575,7 @@ class RectangleCalculator:
         
         match str(self._output):
             case "":
-                perimeter_result = colored(f"++ Perimeter = 2 * ({length} + {width}) = {self.perimeter}", "cyan", attrs=["bold"])
-                area_result = colored(f"++ Area = {length} * {width} = {self.area}", "cyan", attrs=["bold"])
-
-                out_message = (
-                    f"\n\nResult of the {rectangle_output_name} {colored("rectangle:", "white", attrs=["bold"])}\n"
-                    f"++ Length = {length}\n"
-                    f"++ Width = {width}\n"
-                    f"{perimeter_result}\n"
-                    f"{area_result}\n"
-                )    
+                out_message = RectangleCalculator.__format_summary(rectangle_output_name, length, width, self.perimeter, self.area)
 
                 if (str(self._input) == "") and (None in [self.__perimeter, self.__area]):
                     logger.critical("NO valid inputs were given! They are expected to be POSITIVE NUMBERS (greater than zero)")
@@ -300,120 +648,1214 @@ class RectangleCalculator:
         
         if out_message is not None:
             logger.info(out_message)
-            
-
-#------------------------------------------------------------------------------------------------------------#
-#------------------------------------------ Define log_file() function --------------------------------------#
-#------------------------------------------------------------------------------------------------------------#
 
-def __config_log_file(project_dir): # Internal use only, cannot call out when the module is being imported
-    logger_path = Path(project_dir).joinpath("rectangle_logs.txt")
-    if logger_path.exists():
-        logger_path.unlink() # Delete the rectangle_logs.txt of the previous run if existed
 
-    logger.add(sink = logger_path, # The path to the .txt file that saves logs
-            rotation="1 MB",  # Rotate when file reaches 1MB
-            retention="10 days",  # Keep logs for 10 days
-            level="WARNING") # Only save the WARNING level and above
+    @staticmethod
+    def _chunk_json_files(json_files, chunk_size):
+        '''
+        Group the JSON file names into lists of (at most) chunk_size names,
+        each list is handed to a CPU core as a single task in batch mode.
+        '''
+        chunk_size = max(1, int(chunk_size))
+        chunk = []
 
+        for json_file in json_files:
+            chunk.append(json_file)
 
-#--------------------------------------------------------------------------------------------------------------#
-#------------------------------------------ Define parse_args() function --------------------------------------#
-#--------------------------------------------------------------------------------------------------------------#
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        
+        if chunk:
+            yield chunk
 
-def __parse_args():
-    formatter = lambda prog: HelpFormatter(prog, width=200, max_help_position=50)
 
-    parser = ArgumentParser(
-        prog = "Rectangle Calculator Program",
-        description = "Calculate the perimeter and area of a rectangle.",
-        add_help = True,
-        formatter_class = formatter
-    )
-    
-    parser.add_argument("-l", "--length", required=False, default=None, metavar="\b", help="Length of the rectangle (expected to be a positive number).")
-    parser.add_argument("-w", "--width", required=False, default=None, metavar="\b", help="Width of the rectangle (expected to be a positive number).")
-    parser.add_argument("-i", "--input", required=False, default="", metavar="\b", help="Input path leading to a JSON file containing the length and width of a rectangle, or to a directory having multiple JSON input files.")
-    parser.add_argument("-o", "--output", required=False, default="", metavar="\b", help="Output path leading to a JSON file to store the results, or to a directory to store multiple JSON output files.")
-    parser.add_argument("-c", "--cores", required=False, default=2, type=int, metavar="\b", help="The number of CPU cores to be used for parallel computing.")
+    @staticmethod
+    def _batch_workflow(input_dir, output_dir, json_files, read_threads=1, write_threads=1):
+        '''
+        Read, validate and compute a whole chunk of JSON files as a single task (batch mode).
+        The whole chunk is validated and computed at once by calculate_many().
 
-    return parser.parse_args()
+        The files of the chunk are read (prefetched) by read_threads threads and the results written by write_threads threads,
+        so that the waiting time of the I/O calls overlaps (e.g. on network filesystems) instead of adding up.
+        All writes are finished before the chunk is returned, so every reported result is already saved.
 
+        Only the directory paths and file names are sent to the worker (no RectangleCalculator object is pickled),
+        and the worker returns compact tuples (json_file, length, width, perimeter, area) to the parent process.
+        Corrupted inputs are returned with length, width, perimeter and area set to None.
+        '''
+        results, _ = RectangleCalculator._timed_batch_workflow(input_dir, output_dir, json_files, read_threads, write_threads)
+        return results + RectangleCalculator.__drain_pending_writes(0)
 
-#------------------------------------------------------------------------------------------------------------#
-#------------------------------------------ Define main() function ------------------------------------------#
-#------------------------------------------------------------------------------------------------------------#
 
-def main():
-    try:
-        # calculator = RectangleCalculator(
-        #     length = '2',
-        #     width = "3.5"
-        # )
-        # calculator._input = "02_Python_class_OOP/rectangle_project/data"
-        # calculator._output = ""
-        # calculator._cores = 2
+    @staticmethod
+    def _timed_batch_workflow(input_dir, output_dir, json_files, read_threads=1, write_threads=1):
+        '''
+        _batch_workflow() as a task of a batch run, which also measures its stages: return (results, {"read": seconds, "compute": seconds, "write": seconds}).
 
-        args = __parse_args()
+        With write_threads > 1, the writes of the chunk are left pending in the writer threads while the worker computes its next chunks:
+        the results of a chunk are only returned (by this task or a later one of the same worker) once all its writes are finished,
+        waiting for the oldest chunks only above PENDING_WRITES_LIMIT pending writes. _flush_batch_writes() returns the rest at the end of the run.
+        '''
+        t0 = time.perf_counter()
+        lengths, widths = RectangleCalculator.__read_chunk_inputs(input_dir, json_files, read_threads)
+        t1 = time.perf_counter()
+        results = RectangleCalculator._calculate_results(json_files, lengths, widths)
+        t2 = time.perf_counter()
 
-        calculator = RectangleCalculator(
-            length = args.length,
-            width = args.width
-        )
-        calculator._input = args.input
-        calculator._output = args.output
-        calculator._cores = args.cores
+        if str(output_dir) != "":
+            outputs = [(Path(output_dir).joinpath(json_file), length, width, perimeter, area) for json_file, length, width, perimeter, area in results if perimeter is not None]
 
-        if (calculator._input != "") and (Path(calculator._input).is_dir()):
-            calculator._input = Path(calculator._input)
+            if write_threads > 1:
+                writes = [RectangleCalculator.__io_executor("write", write_threads).submit(RectangleCalculator.__write_json_output, *output) for output in outputs]
+                RectangleCalculator._pending_writes.setdefault(os.getpid(), deque()).append((results, writes))
+                results = RectangleCalculator.__drain_pending_writes(PENDING_WRITES_LIMIT)
             
-            input_json_files = [(entry.name,) for entry in calculator._input.glob("*.json")]
-            calculator._json_count = len(input_json_files)
-            
-            if calculator._json_count > 1:
-                calculator._output = calculator._RectangleCalculator__validate_output_directory()
+            else:
+                for output in outputs:
+                    RectangleCalculator.__write_json_output(*output)
+        
+        return results, {"read": t1 - t0, "compute": t2 - t1, "write": time.perf_counter() - t2}
 
-                match str(calculator._output):
-                    case "":
-                        logger.warning(
-                            (   
-                                "\nYou are passing multiple input files but no valid ouput directory path was given!!!"
-                                "\nIf you procced, all results will be displayed here WITHOUT being saved!!!"
-                            )
-                        )
-                        
-                        answer = input(colored("Would you like to proceed? [y/n]: ", "blue", attrs=["bold"]))
 
-                        if answer.lower() == "y":
-                            with multiprocessing.Pool(processes=calculator._cores) as pool:
-                                pool.starmap(func=calculator._single_workflow, iterable=input_json_files)
-                        
-                        else:
-                            return None # stop the program
-                        
-                    case _:
-                        __config_log_file(calculator._input.parent) # Only produce rectangle_logs.txt if the input and output directories or files are given           
-                        
-                        with multiprocessing.Pool(processes=calculator._cores) as pool:
-                                pool.starmap(func=calculator._single_workflow, iterable=input_json_files)
-                        
-                        # for entry in calculator._input.glob("*.json"):
-                        #     calculator._single_workflow(entry.name)
-                        
-                        output_dir = colored(str(calculator._output), (139, 0, 0), attrs=["bold"])
-                        logger.info(f"All result files are saved in {output_dir}\n")
-            
-            elif calculator._json_count == 1:
-                logger.debug("Only one input JSON file is detected in the given directory. If the output path is also given, it should be in a file format.\n")
-                calculator._input = calculator._input.joinpath(input_json_files[0][0])
-                calculator._single_workflow(calculator._input)
-                calculator._display_saving_single_output_message()
+    @staticmethod
+    def _init_batch_worker(flush_barrier):
+        '''
+        Initializer of the batch worker processes: keep the barrier making every worker take exactly one _flush_batch_writes() task.
+        '''
+        RectangleCalculator._flush_barrier = flush_barrier
+
+
+    @staticmethod
+    def _flush_batch_writes(_):
+        '''
+        Last task of every worker of a batch run: wait for all its pending writes and return (results, {"write": seconds}) of their chunks.
+        It then waits for the other workers, so that no worker takes two of these tasks and leaves another one unflushed.
+        '''
+        t0 = time.perf_counter()
+        results = RectangleCalculator.__drain_pending_writes(0)
+        timings = {"write": time.perf_counter() - t0}
+        RectangleCalculator._flush_barrier.wait()
+
+        return results, timings
+
+
+    @staticmethod
+    def __drain_pending_writes(limit): # Internal use only, cannot call out when the module is being imported
+        '''
+        Return the results of the oldest pending chunks of the current process whose writes are all finished,
+        waiting for the writes of the oldest ones as long as more than limit writes are pending (0: all of them).
+        '''
+        pending = RectangleCalculator._pending_writes.get(os.getpid(), deque())
+        pending_count = sum(len(writes) for _, writes in pending)
+        saved_results = []
+
+        while pending and ((pending_count > limit) or all(write.done() for write in pending[0][1])):
+            results, writes = pending.popleft()
+            pending_count -= len(writes)
+
+            for write in wait(writes).done:
+                write.result() # Raise the error of a failed write, if any
+            
+            saved_results.extend(results)
+        
+        return saved_results
+
+
+    @staticmethod
+    def _display_batch_workflow(input_dir, buffer_name, chunk_size, chunk, read_threads=1):
+        '''
+        Display-only counterpart of _batch_workflow() (no output path): read, validate and compute a chunk of JSON files,
+        then store the results in the shared result buffer of the parent process instead of returning them.
+
+        chunk: (slot, json_files), the results of json_files[i] are stored in the row slot * chunk_size + i of the buffer,
+        whose columns are RESULT_COLUMNS (NaN perimeter and area for corrupted inputs).
+        Only the number of processed JSON files is returned, so no result is pickled back to the parent process.
+        '''
+        slot, json_files = chunk
+        lengths, widths = RectangleCalculator.__read_chunk_inputs(input_dir, json_files, read_threads)
+        columns = RectangleCalculator.calculate_many(np.array(lengths, dtype=object), np.array(widths, dtype=object))
+        result_buffer = shared_memory.SharedMemory(name=buffer_name)
+
+        try:
+            results = np.ndarray((result_buffer.size // (len(RESULT_COLUMNS) * 8), len(RESULT_COLUMNS)), dtype=np.float64, buffer=result_buffer.buf)
+            results[slot * chunk_size:slot * chunk_size + len(json_files)] = np.column_stack([columns[column] for column in RESULT_COLUMNS])
+            del results # The view must be released before closing the shared memory
+        
+        finally:
+            result_buffer.close()
+        
+        return len(json_files)
+
+
+    @staticmethod
+    def __read_chunk_inputs(input_dir, json_files, read_threads): # Internal use only, cannot call out when the module is being imported
+        '''
+        Read the (raw) length and width of every JSON file of a chunk, with read_threads threads if more than one.
+        Return two tuples: lengths, widths
+        '''
+        input_dir = Path(input_dir)
+        json_paths = [input_dir.joinpath(json_file) for json_file in json_files]
+
+        if read_threads > 1:
+            inputs = list(RectangleCalculator.__io_executor("read", read_threads).map(RectangleCalculator.__read_json_inputs, json_paths))
+        
+        else:
+            inputs = [RectangleCalculator.__read_json_inputs(json_path) for json_path in json_paths]
+        
+        return tuple(zip(*inputs)) if inputs else ((), ())
+
+
+    @staticmethod
+    def __io_executor(kind, threads): # Internal use only, cannot call out when the module is being imported
+        '''
+        Return the reader or writer thread pool of the current process (created once, then reused by every chunk).
+        '''
+        key = (os.getpid(), kind, threads) # A forked process must not reuse the thread pool of its parent
+
+        if key not in RectangleCalculator._io_executors:
+            RectangleCalculator._io_executors[key] = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"rectangle_{kind}")
+        
+        return RectangleCalculator._io_executors[key]
+
+
+    @staticmethod
+    def __read_json_inputs(json_path): # Internal use only, cannot call out when the module is being imported
+        try:
+            with open(json_path, "r") as json_pointer:
+                length, width = json.load(json_pointer).values()
+        
+        except (ValueError, AttributeError, OSError): # Invalid JSON, wrong number of keys, or unreadable file
+            length, width = None, None
+        
+        return length, width
+
+
+    @staticmethod
+    def __write_json_output(json_path, length, width, perimeter, area): # Internal use only, cannot call out when the module is being imported
+        result_dict = {
+            "length": length,
+            "width": width,
+            "perimeter": perimeter,
+            "area": area
+        }
+
+        with open(json_path, "w") as json_pointer:
+            json.dump(result_dict, json_pointer, indent=4)
+
+
+    @staticmethod
+    def _calculate_results(names, lengths, widths):
+        '''
+        Compute a whole column of rectangles with calculate_many(),
+        then pack them into compact tuples (name, length, width, perimeter, area).
+        Corrupted rectangles are packed with length, width, perimeter and area set to None.
+        '''
+        columns = RectangleCalculator.calculate_many(np.array(lengths, dtype=object), np.array(widths, dtype=object))
+        columns = {key: column.tolist() for key, column in columns.items()}
+        results = []
+
+        for name, length, width, perimeter, area, valid in zip(names, *columns.values()):
+            if valid:
+                results.append((name, length, width, perimeter, area))
+            
+            else:
+                results.append((name, None, None, None, None))
+        
+        return results
+
+
+    def __report_results(self, results, corrupted_summary): # Internal use only, cannot call out when the module is being imported
+        '''
+        Log the compact result tuples in the parent process, then yield the valid ones again (for saving).
+        Corrupted rectangles are only counted in corrupted_summary, to be logged once at the end of the run.
+        '''
+        prioritize_message = colored(", prioritize them for calculation.", "yellow", attrs=['bold'])
+        given_inputs_valid = None not in RectangleCalculator.__valiate_input_number(self.length, self.width)
+
+        for name, length, width, perimeter, area in results:
+            if perimeter is None:
+                corrupted_summary["count"] += 1
+
+                if len(corrupted_summary["examples"]) < CORRUPTED_EXAMPLE_COUNT:
+                    corrupted_summary["examples"].append(str(name))
+                
+                continue
+            
+            rectangle_output_name = colored(name, (139, 0, 0), attrs=["bold"])
+
+            if given_inputs_valid:
+                logger.warning(f"Detected valid inputs in {rectangle_output_name}{prioritize_message}\n")
+            
+            if str(self._output) == "":
+                logger.info(RectangleCalculator.__format_summary(rectangle_output_name, length, width, perimeter, area))
+            
+            yield name, length, width, perimeter, area
+
+
+    def __save_results(self, results, on_result=None): # Internal use only, cannot call out when the module is being imported
+        '''
+        Consume the reported results, writing them in one sequential pass if the output is a consolidated file.
+        on_result(name, valid) is called for every result, if given (e.g. RectangleManifest.record_output()).
+        Return the number of calculated rectangles (valid or corrupted).
+        '''
+        result_count = 0
+
+        def counted_results():
+            nonlocal result_count
+
+            for result in results:
+                result_count += 1
+
+                if on_result is not None:
+                    on_result(result[0], result[3] is not None)
+                
+                yield result
+
+        corrupted_summary = {"count": 0, "examples": []}
+        valid_results = self.__report_results(counted_results(), corrupted_summary)
+
+        if Path(str(self._output)).suffix in CONSOLIDATED_SUFFIXES:
+            RectangleCalculator._write_consolidated_file(self._output, valid_results)
+        
+        else:
+            deque(valid_results, maxlen=0) # Per-file outputs are already saved by the workers, only logging remains
+        
+        RectangleCalculator.__log_corrupted_summary(corrupted_summary["count"], corrupted_summary["examples"])
+        
+        return result_count
+
+
+    def _imap_bounded(self, pool, func, chunks):
+        '''
+        Ordered equivalent of pool.imap(func, chunks) with a bounded in-flight window.
+
+        pool.imap() consumes the whole iterable up front, this generator only submits a new chunk once
+        the oldest one is returned, so the directory is scanned at the pace results are saved (constant memory).
+        '''
+        in_flight = self._in_flight or (2 * self._cores)
+        pending = deque()
+
+        for chunk in chunks:
+            pending.append(pool.apply_async(func, (chunk,)))
+
+            if len(pending) >= in_flight:
+                yield pending.popleft().get()
+        
+        while pending:
+            yield pending.popleft().get()
+
+
+    def _batch_pool(self):
+        '''
+        Process pool of a batch run: self._cores workers, initialized by _init_batch_worker().
+        '''
+        return multiprocessing.Pool(processes=self._cores, initializer=RectangleCalculator._init_batch_worker, initargs=(multiprocessing.Barrier(self._cores),))
+
+
+    def _run_batch(self, json_files, pool=None, on_result=None):
+        '''
+        Distribute chunks of JSON files to the CPU cores and report the returned results in the parent process.
+        json_files can be a lazy iterator (e.g. from _scan_json_files()), it is consumed chunk by chunk.
+        pool: a process pool from _batch_pool() to reuse (e.g. the one hashing the inputs of an incremental run), otherwise one is created.
+        on_result(name, valid): called for every saved result, if given.
+        Return the number of processed JSON files.
+        '''
+        if str(self._output) == "":
+            return self._run_display_batch(json_files) # Nothing to save, the results are only logged and summarized
+        
+        if pool is None:
+            with self._batch_pool() as pool:
+                return self._run_batch(json_files, pool, on_result)
+        
+        if Path(str(self._output)).suffix in CONSOLIDATED_SUFFIXES:
+            output_dir = "" # The parent process writes the single consolidated file instead of the workers
+        
+        else:
+            output_dir = self._output
+        
+        batch_workflow = partial(
+            RectangleCalculator._timed_batch_workflow, self._input, output_dir,
+            read_threads = self._read_threads,
+            write_threads = self._write_threads
+        )
+        self._stage_timings = dict.fromkeys(STAGES, 0.0)
+        json_chunks = RectangleCalculator._chunk_json_files(self.__timed_scan(json_files), self._chunk_size)
+
+        def flushed_writes(): # The chunks whose writes are still pending in the workers, once every chunk is computed
+            if (output_dir != "") and (self._write_threads > 1):
+                yield from pool.imap_unordered(RectangleCalculator._flush_batch_writes, range(self._cores))
+
+        def chunk_results():
+            for results, timings in chain(self._imap_bounded(pool, batch_workflow, json_chunks), flushed_writes()):
+                for stage, seconds in timings.items():
+                    self._stage_timings[stage] += seconds
+                
+                yield from results
+
+        return self.__save_results(chunk_results(), on_result)
+
+
+    def __timed_scan(self, json_files): # Internal use only, cannot call out when the module is being imported
+        '''
+        Yield the names of json_files, adding the time spent producing them (directory scan, manifest...) to the "scan" stage.
+        '''
+        json_files = iter(json_files)
+
+        while True:
+            t0 = time.perf_counter()
+            json_file = next(json_files, None)
+            self._stage_timings["scan"] += time.perf_counter() - t0
+
+            if json_file is None:
+                return None
+            
+            yield json_file
+
+
+    def _run_display_batch(self, json_files):
+        '''
+        Batch mode without output path: the CPU cores store their results in a shared-memory buffer pre-allocated
+        for the in-flight window only (one slot of chunk_size rows per in-flight chunk, reused in turn),
+        so only the number of rows of each chunk is sent back, and nothing is logged by the workers.
+        The parent process logs the results of each chunk from its slot as soon as it is done, in the order of the scan,
+        and only folds them into a bounded summary (nothing is sorted nor kept per JSON file).
+        Return the number of processed JSON files.
+        '''
+        chunk_size = max(1, int(self._chunk_size))
+        slot_count = self._in_flight or (2 * self._cores) # Same window as _imap_bounded()
+        result_buffer = shared_memory.SharedMemory(create=True, size=slot_count * chunk_size * len(RESULT_COLUMNS) * np.dtype(np.float64).itemsize)
+        pending_chunks = deque() # Names of the submitted chunks, the parent process already knows them
+
+        def slotted_chunks():
+            for ordinal, chunk in enumerate(RectangleCalculator._chunk_json_files(json_files, chunk_size)):
+                pending_chunks.append(chunk)
+                yield ordinal % slot_count, chunk # A slot is reused once the chunk submitted slot_count chunks earlier is reported
+
+        try:
+            display_workflow = partial(
+                RectangleCalculator._display_batch_workflow, self._input, result_buffer.name, chunk_size,
+                read_threads = self._read_threads
+            )
+            results = np.ndarray((slot_count * chunk_size, len(RESULT_COLUMNS)), dtype=np.float64, buffer=result_buffer.buf)
+            summary = RectangleCalculator.__new_display_summary()
+            ordinal = 0
+
+            with multiprocessing.Pool(processes=self._cores) as pool:
+                for row_count in self._imap_bounded(pool, display_workflow, slotted_chunks()):
+                    start = (ordinal % slot_count) * chunk_size
+                    self.__report_display_chunk(pending_chunks.popleft(), results[start:start + row_count], summary)
+                    ordinal += 1
+            
+            del results # The view must be released before closing the shared memory
+        
+        finally:
+            result_buffer.close()
+            result_buffer.unlink()
+        
+        self.__report_display_summary(summary)
+        return summary["count"]
+
+
+    @staticmethod
+    def __new_display_summary(): # Internal use only, cannot call out when the module is being imported
+        '''
+        Running summary of a display-only batch run, its size does not depend on the number of JSON files:
+        counts, totals, minimums and maximums are exact, the quartiles are estimated from a uniform random sample
+        of at most SUMMARY_SAMPLE_SIZE valid rows (exact below that number).
+        '''
+        column_count = len(RESULT_COLUMNS)
+
+        return {
+            "count": 0, "valid_count": 0, "corrupted_examples": [],
+            "totals": np.zeros(column_count), "minimums": np.full(column_count, np.inf), "maximums": np.full(column_count, -np.inf),
+            "sample": np.empty((0, column_count)), "sample_keys": np.empty(0), "rng": np.random.default_rng(0)
+        }
+
+
+    def __report_display_chunk(self, json_files, results, summary): # Internal use only, cannot call out when the module is being imported
+        '''
+        Log the valid rectangles of one chunk (one log record per chunk) and fold the chunk into the running summary.
+        '''
+        valid = ~np.isnan(results[:, RESULT_COLUMNS.index("perimeter")])
+        valid_rows = np.flatnonzero(valid)
+        valid_results = results[valid]
+        summary["count"] += len(json_files)
+        summary["valid_count"] += len(valid_rows)
+
+        free_examples = CORRUPTED_EXAMPLE_COUNT - len(summary["corrupted_examples"])
+        summary["corrupted_examples"].extend(str(json_files[idx]) for idx in np.flatnonzero(~valid)[:max(0, free_examples)].tolist())
+
+        if len(valid_rows) == 0:
+            return None
+        
+        logger.info("".join(
+            RectangleCalculator.__format_summary(colored(json_files[idx], (139, 0, 0), attrs=["bold"]), *row)
+            for idx, row in zip(valid_rows.tolist(), valid_results.tolist())
+        ))
+
+        summary["totals"] += valid_results.sum(axis=0)
+        np.minimum(summary["minimums"], valid_results.min(axis=0), out=summary["minimums"])
+        np.maximum(summary["maximums"], valid_results.max(axis=0), out=summary["maximums"])
+
+        # Bottom-k sampling: every row gets a random key, the rows with the SUMMARY_SAMPLE_SIZE smallest keys are a uniform sample
+        sample = np.concatenate([summary["sample"], valid_results])
+        sample_keys = np.concatenate([summary["sample_keys"], summary["rng"].random(len(valid_rows))])
+
+        if len(sample_keys) > SUMMARY_SAMPLE_SIZE:
+            kept = np.argpartition(sample_keys, SUMMARY_SAMPLE_SIZE)[:SUMMARY_SAMPLE_SIZE]
+            sample, sample_keys = sample[kept], sample_keys[kept]
+        
+        summary["sample"], summary["sample_keys"] = sample, sample_keys
+
+
+    def __report_display_summary(self, summary): # Internal use only, cannot call out when the module is being imported
+        '''
+        Log the end of a display-only batch run: the summary of the corrupted inputs, then the totals and the distribution.
+        '''
+        count, valid_count = summary["count"], summary["valid_count"]
+
+        if (valid_count > 0) and (None not in RectangleCalculator.__valiate_input_number(self.length, self.width)):
+            prioritize_message = colored(", prioritize them for calculation.", "yellow", attrs=['bold'])
+            logger.warning(f"Detected valid inputs in {colored(f"{valid_count} rectangles", (139, 0, 0), attrs=["bold"])}{prioritize_message}\n")
+        
+        RectangleCalculator.__log_corrupted_summary(count - valid_count, summary["corrupted_examples"])
+
+        report = [
+            f"\n\nSummary of the {colored(f"{count} rectangles", "white", attrs=["bold"])} "
+            f"({valid_count} valid, {count - valid_count} corrupted):\n"
+        ]
+
+        if valid_count > 0:
+            report.append(colored(f"++ Total perimeter = {summary["totals"][RESULT_COLUMNS.index("perimeter")]}\n", "cyan", attrs=["bold"]))
+            report.append(colored(f"++ Total area = {summary["totals"][RESULT_COLUMNS.index("area")]}\n", "cyan", attrs=["bold"]))
+            report.append(f"{"":<12}" + "".join(f"{statistic:>14}" for statistic in ("min", "25%", "median", "75%", "max", "mean")) + "\n")
+
+            quartiles = np.percentile(summary["sample"], [25, 50, 75], axis=0)
+            means = summary["totals"] / valid_count
+
+            for idx, column in enumerate(RESULT_COLUMNS):
+                statistics = (summary["minimums"][idx], *quartiles[:, idx], summary["maximums"][idx], means[idx])
+                report.append(f"++ {column.capitalize():<9}" + "".join(f"{statistic:>14.4f}" for statistic in statistics) + "\n")
+            
+            if valid_count > SUMMARY_SAMPLE_SIZE:
+                report.append(f"(quartiles estimated from a random sample of {SUMMARY_SAMPLE_SIZE} rectangles)\n")
+        
+        logger.info("".join(report))
+
+
+    def _run_incremental_batch(self, json_files):
+        '''
+        Incremental version of _run_batch(): only the new or changed JSON files (or those whose output is missing)
+        are recalculated, and the outputs of the deleted JSON files are removed (see RectangleManifest).
+        The same CPU cores hash the candidate files and calculate the changed ones.
+        Return the number of JSON files found in the input directory.
+        '''
+        manifest = RectangleManifest(self._input, self._output)
+
+        with self._batch_pool() as pool:
+            changed_json_files = manifest.changed_json_files(json_files, self._chunk_size, partial(self._imap_bounded, pool))
+            self._run_batch(changed_json_files, pool, on_result=manifest.record_output)
+        
+        removed_count = manifest.save()
+
+        logger.info(
+            f"Incremental run: {manifest.changed_count} new or changed, {manifest.unchanged_count} unchanged, "
+            f"{removed_count} removed input JSON files\n"
+        )
+
+        return manifest.changed_count + manifest.unchanged_count
+
+
+    def _consolidated_workflow(self):
+        '''
+        Calculate all rectangles of a consolidated input file: one sequential read, a few array operations, one sequential write.
+        '''
+        names, lengths, widths = RectangleCalculator._read_consolidated_file(self._input)
+        self.__save_results(RectangleCalculator._calculate_results(names, lengths, widths))
+
+
+    @staticmethod
+    def _read_consolidated_file(consolidated_file):
+        '''
+        Read a consolidated input file (newline-delimited JSON or CSV) in one sequential pass.
+        Each row gives the length and width of a rectangle, and optionally its name.
+        Return three lists: names, lengths, widths
+        '''
+        consolidated_file = Path(consolidated_file)
+        names, lengths, widths = [], [], []
+
+        with open(consolidated_file, "r", newline="") as file_pointer:
+            if consolidated_file.suffix == ".csv":
+                rows = csv.DictReader(file_pointer)
+            
+            else:
+                rows = (line for line in file_pointer if line.strip() != "")
+
+            for idx, row in enumerate(rows, start=1):
+                if not isinstance(row, dict):
+                    try:
+                        row = json.loads(row)
+                    
+                    except ValueError:
+                        row = None
+                
+                if not isinstance(row, dict): # Corrupted line, keep it so that it is reported with its name
+                    row = {}
+
+                names.append(row.get("name") or f"rectangle_{idx}")
+
+                if consolidated_file.suffix == ".csv":
+                    lengths.append(RectangleCalculator.__csv_number(row.get("length")))
+                    widths.append(RectangleCalculator.__csv_number(row.get("width")))
+                
+                else:
+                    lengths.append(row.get("length"))
+                    widths.append(row.get("width"))
+        
+        return names, lengths, widths
+
+
+    @staticmethod
+    def __csv_number(cell): # Internal use only, cannot call out when the module is being imported
+        '''
+        A CSV cell is always a string: give it back the type it had in JSON, so that it is validated as in the other layouts.
+        A JSON number (e.g. "12", "1e-05", "1e+20") becomes an int or a float, a JSON string (quoted by __csv_cell()) is unquoted,
+        anything else stays as it is.
+        '''
+        try:
+            value = json.loads(cell)
+        
+        except (TypeError, ValueError):
+            return cell
+        
+        if (isinstance(value, (int, float, str))) and (not isinstance(value, bool)) and (cell == cell.strip()):
+            return value
+        
+        return cell
+
+
+    @staticmethod
+    def __csv_cell(value): # Internal use only, cannot call out when the module is being imported
+        '''
+        Counterpart of __csv_number(): a string that would be read back as another JSON value (e.g. the string "1e-05")
+        is written JSON-quoted, so that it stays a string in the CSV layout.
+        '''
+        if not isinstance(value, str):
+            return value
+        
+        try:
+            json.loads(value)
+        
+        except ValueError:
+            return value
+        
+        return json.dumps(value)
+
+
+    @staticmethod
+    def _write_consolidated_file(consolidated_file, rows, columns=CONSOLIDATED_COLUMNS):
+        '''
+        Write the rows (tuples ordered as columns) in a consolidated file (newline-delimited JSON or CSV) in one sequential pass.
+        Return the number of written rows.
+        '''
+        consolidated_file = Path(consolidated_file)
+        row_count = 0
+
+        with open(consolidated_file, "w", newline="") as file_pointer:
+            if consolidated_file.suffix == ".csv":
+                writer = csv.writer(file_pointer)
+                writer.writerow(columns)
+            
+            for row in rows:
+                if consolidated_file.suffix == ".csv":
+                    writer.writerow(row)
+                
+                else:
+                    file_pointer.write(json.dumps(dict(zip(columns, row))) + "\n")
+                
+                row_count += 1
+        
+        return row_count
+
+
+    @staticmethod
+    def convert_json_directory(input_dir, consolidated_file):
+        '''
+        Convert the per-file layout (a directory of rectangle_N.json files) into a single consolidated input file,
+        newline-delimited JSON (.ndjson, .jsonl) or CSV (.csv) depending on the suffix of consolidated_file.
+
+        The raw length and width are copied as they are, corrupted values are only reported when being calculated,
+        and are validated the same way in every layout.
+        Return the number of converted JSON files.
+        '''
+        if Path(consolidated_file).suffix not in CONSOLIDATED_SUFFIXES:
+            raise ValueError(f"The consolidated file should end with one of {', '.join(CONSOLIDATED_SUFFIXES)}")
+        
+        def json_rows():
+            for json_file in RectangleCalculator._scan_json_files(input_dir): # Streamed, the directory is never listed as a whole
+                length, width = RectangleCalculator.__read_json_inputs(Path(input_dir).joinpath(json_file))
+
+                if Path(consolidated_file).suffix == ".csv": # Keep the JSON types through the CSV strings (see __csv_number())
+                    length, width = RectangleCalculator.__csv_cell(length), RectangleCalculator.__csv_cell(width)
+                
+                yield json_file, length, width
+        
+        Path(consolidated_file).parent.mkdir(exist_ok=True, parents=True)
+
+        return RectangleCalculator._write_consolidated_file(consolidated_file, json_rows(), columns=CONSOLIDATED_COLUMNS[:3])
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#-------------------------------- Define Manifest class (incremental mode) ---------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+class RectangleManifest:
+    '''
+    This class keeps track of the input JSON files of a batch run in a manifest saved next to the outputs.
+    
+    Each input file is recorded with its size, modification time, content hash and whether it produced an output,
+    so that the next run only recalculates the new or changed files (or those whose output has disappeared),
+    and deletes the outputs whose input files have disappeared.
+    '''
+
+    manifest_name = ".rectangle_manifest.json"
+
+
+    def __init__(self, input_dir, output_dir):
+        '''
+        input_dir: the directory containing the input JSON files
+        output_dir: the directory storing the output JSON files (and the manifest)
+        '''
+        self._input = Path(input_dir)
+        self._output = Path(output_dir)
+        self._manifest_path = self._output.joinpath(RectangleManifest.manifest_name)
+        self.__old_entries = self.__load_manifest()
+        self.__new_entries = {}
+        self.changed_count = 0
+        self.unchanged_count = 0
+
+
+    def __load_manifest(self): # Internal use only
+        try:
+            with open(self._manifest_path, "r") as json_pointer:
+                manifest = json.load(json_pointer)
+        
+        except (OSError, ValueError):
+            return {}
+        
+        if manifest.get("input") != str(self._input.resolve()): # The outputs were produced from another input directory
+            return {}
+        
+        return manifest.get("files", {})
+
+
+    @staticmethod
+    def _hash_file(file_path):
+        with open(file_path, "rb") as file_pointer:
+            return hashlib.blake2b(file_pointer.read(), digest_size=16).hexdigest()
+
+
+    @staticmethod
+    def _hash_files(input_dir, json_files):
+        '''
+        Hash a chunk of input JSON files (in a CPU core). Return a list of (json_file, manifest entry).
+        '''
+        entries = []
+
+        for json_file in json_files:
+            json_path = Path(input_dir).joinpath(json_file)
+            stat = json_path.stat()
+            entries.append((json_file, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": RectangleManifest._hash_file(json_path)}))
+        
+        return entries
+
+
+    def __is_unchanged(self, json_file, old_entry, new_entry=None): # Internal use only
+        '''
+        A file is unchanged if its size and modification time are the same as in the manifest (new_entry is None),
+        or else if its content hash is the same (new_entry), provided that its previous output still exists.
+        '''
+        if old_entry is None:
+            return False
+        
+        if new_entry is not None and old_entry["hash"] != new_entry["hash"]:
+            return False
+        
+        return (not old_entry.get("output", True)) or self._output.joinpath(json_file).exists() # Corrupted inputs have no output
+
+
+    def changed_json_files(self, json_files, chunk_size=256, map_chunks=map):
+        '''
+        Lazily filter the names of the input JSON files, only yielding the new or changed ones.
+
+        A file is unchanged if its size and modification time are the same as in the manifest.
+        If only its modification time differs (e.g. touched or copied), its content hash decides.
+        A file whose output has disappeared is recalculated as if it had changed.
+        The existing output of a changed (or new) file is deleted, so a file that became corrupted leaves no stale result,
+        even if the outputs were produced by a run without manifest.
+
+        The files to hash are grouped into chunks of chunk_size names, hashed by map_chunks(function, chunks),
+        an ordered map: map() hashes them in this process, RectangleCalculator._imap_bounded() in a process pool.
+        '''
+        def chunks_to_hash():
+            for chunk in RectangleCalculator._chunk_json_files(json_files, chunk_size):
+                to_hash = []
+
+                for json_file in chunk:
+                    stat = self._input.joinpath(json_file).stat()
+                    old_entry = self.__old_entries.get(json_file)
+
+                    if (old_entry is not None) and (old_entry["size"] == stat.st_size) and (old_entry["mtime_ns"] == stat.st_mtime_ns) and self.__is_unchanged(json_file, old_entry):
+                        self.__new_entries[json_file] = old_entry
+                        self.unchanged_count += 1
+                    
+                    else:
+                        to_hash.append(json_file)
+                
+                if to_hash:
+                    yield to_hash
+
+        for hashed_entries in map_chunks(partial(RectangleManifest._hash_files, self._input), chunks_to_hash()):
+            for json_file, new_entry in hashed_entries:
+                old_entry = self.__old_entries.get(json_file)
+
+                if self.__is_unchanged(json_file, old_entry, new_entry):
+                    self.__new_entries[json_file] = {**new_entry, "output": old_entry.get("output", True)}
+                    self.unchanged_count += 1
+                    continue
+                
+                self.__new_entries[json_file] = {**new_entry, "output": False} # Until record_output() is told otherwise
+                self._output.joinpath(json_file).unlink(missing_ok=True)
+                self.changed_count += 1
+                yield json_file
+
+
+    def record_output(self, json_file, produced):
+        '''
+        Record whether a changed file produced an output in this run (False for corrupted inputs).
+        '''
+        self.__new_entries[json_file]["output"] = produced
+
+
+    def save(self):
+        '''
+        Delete the outputs of the input files that have disappeared, then save the manifest (atomically).
+        Must be called once the changed files are calculated and their outputs recorded (see record_output()).
+        Return the number of deleted input files.
+        '''
+        removed_files = [json_file for json_file in self.__old_entries if json_file not in self.__new_entries]
+
+        for json_file in removed_files:
+            self._output.joinpath(json_file).unlink(missing_ok=True)
+        
+        manifest = {"input": str(self._input.resolve()), "files": self.__new_entries}
+        temporary_path = self._manifest_path.with_suffix(".tmp")
+
+        with open(temporary_path, "w") as json_pointer:
+            json.dump(manifest, json_pointer)
+        
+        os.replace(temporary_path, self._manifest_path)
+
+        return len(removed_files)
+
+
+#-----------------------------------------------------------------------------------------------------------#
+#-------------------------------- Define Service class (persistent mode) -----------------------------------#
+#-----------------------------------------------------------------------------------------------------------#
+
+class RectangleService:
+    '''
+    This class keeps a warm pool of CPU cores and answers JSON-lines requests, one JSON object per line,
+    read from stdin (answers on stdout) or from the connections of a local Unix socket.
+
+    Dimension requests {"length": ..., "width": ...} are calculated directly by the service (no inter-process round trip),
+    file requests {"path": ..., "output": ...} are sent to the warm CPU cores, so their I/O never blocks the other requests.
+    A request {"stats": true} returns the number of requests, the queue depth (pending file requests) and the latency percentiles.
+    The optional "id" of a request is copied into its answer, since file requests may be answered out of order.
+    '''
+
+    def __init__(self, cores=2, latency_window=10_000):
+        '''
+        cores: the number of warm CPU cores calculating the file requests
+        latency_window: the number of latest requests used for the latency percentiles
+        '''
+        self._cores = cores
+        self._pool = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window) # Seconds, from reading the request to writing its answer
+        self.request_count = 0
+        self.queue_depth = 0
+
+
+    def __enter__(self):
+        # The CPU cores ignore Ctrl+C, the service stops them itself once the pending requests are answered
+        self._pool = multiprocessing.Pool(processes=self._cores, initializer=signal.signal, initargs=(signal.SIGINT, signal.SIG_IGN))
+        return self
+    
+
+    def __exit__(self, *exc_info):
+        self._pool.close()
+        self._pool.join() # Answer the pending file requests before stopping
+        self._pool = None
+
+
+    def stats(self):
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            stats = {"requests": self.request_count, "queue_depth": self.queue_depth}
+        
+        if latencies.size > 0:
+            stats["latency_ms"] = dict(zip(("p50", "p90", "p99", "max"), np.percentile(latencies, [50, 90, 99, 100]).round(4).tolist()))
+        
+        return stats
+
+
+    def handle(self, line, respond):
+        '''
+        Handle a single request line, respond(answer) is called with the answer dictionary once it is ready
+        (from another thread for the file requests).
+        '''
+        start_time = time.perf_counter()
+
+        def answer(result, request_id=None):
+            if request_id is not None:
+                result = {"id": request_id, **result}
+            
+            respond(result)
+
+            with self._lock:
+                self._latencies.append(time.perf_counter() - start_time)
+                self.request_count += 1
+        
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request should be a JSON object")
+        
+        except ValueError as e:
+            return answer({"error": f"Invalid request: {e}"})
+        
+        request_id = request.get("id")
+
+        if request.get("stats"):
+            return answer(self.stats(), request_id)
+        
+        if "path" not in request:
+            return answer(RectangleCalculator._calculate_request(request), request_id)
+        
+        def file_answer(result):
+            with self._lock:
+                self.queue_depth -= 1
+            
+            answer(result, request_id)
+        
+        with self._lock:
+            self.queue_depth += 1
+        
+        self._pool.apply_async(
+            RectangleCalculator._calculate_request, (request,),
+            callback = file_answer,
+            error_callback = lambda e: file_answer({"error": str(e)})
+        )
+
+
+    def serve_stdin(self, stdin=sys.stdin, stdout=sys.stdout):
+        '''
+        Answer the requests read from stdin on stdout, until stdin is closed.
+        '''
+        write_lock = threading.Lock()
+
+        def respond(result):
+            with write_lock:
+                stdout.write(json.dumps(result) + "\n")
+                stdout.flush()
+        
+        for line in stdin:
+            if line.strip() != "":
+                self.handle(line, respond)
+
+
+    def serve_unix_socket(self, socket_path):
+        '''
+        Answer the requests of every connection to a local Unix socket (one thread per connection), until interrupted.
+        '''
+        service = self
+        socket_path = Path(socket_path)
+        socket_path.unlink(missing_ok=True) # Socket file left by a previous service
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                unanswered = threading.Condition() # The connection stays open until every request is answered
+                unanswered_count = 0
+
+                def respond(result):
+                    nonlocal unanswered_count
+
+                    with unanswered:
+                        try:
+                            self.wfile.write((json.dumps(result) + "\n").encode())
+                            self.wfile.flush()
+                        
+                        except OSError: # The client is gone, its answer is dropped
+                            pass
+
+                        unanswered_count -= 1
+                        unanswered.notify()
+                
+                for line in self.rfile:
+                    if line.strip() != b"":
+                        with unanswered:
+                            unanswered_count += 1
+                        
+                        service.handle(line, respond)
+                
+                with unanswered:
+                    unanswered.wait_for(lambda: unanswered_count == 0)
+        
+        with socketserver.ThreadingUnixStreamServer(str(socket_path), RequestHandler) as server:
+            try:
+                server.serve_forever()
+            
+            except KeyboardInterrupt:
+                pass
+            
+            finally:
+                socket_path.unlink(missing_ok=True)
+
+
+#------------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Define log_file() function --------------------------------------#
+#------------------------------------------------------------------------------------------------------------#
+
+def __plain_log_format(record): # Internal use only, cannot call out when the module is being imported
+    record["extra"]["plain_message"] = ANSI_ESCAPE_PATTERN.sub("", record["message"]) # Colors are only meaningful in a terminal
+    return "{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {extra[plain_message]}\n{exception}"
+
+
+def __config_log_file(project_dir): # Internal use only, cannot call out when the module is being imported
+    logger_path = Path(project_dir).joinpath("rectangle_logs.txt")
+    if logger_path.exists():
+        logger_path.unlink() # Delete the rectangle_logs.txt of the previous run if existed
+
+    logger.add(sink = logger_path, # The path to the .txt file that saves logs
+            format=__plain_log_format, # Strip the ANSI colors, the file is not a terminal
+            enqueue=True, # Log records go through a process-safe queue, written by a single background writer
+            rotation="1 MB",  # Rotate when file reaches 1MB
+            retention="10 days",  # Keep logs for 10 days
+            level="WARNING") # Only save the WARNING level and above
+
+
+#--------------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Define parse_args() function --------------------------------------#
+#--------------------------------------------------------------------------------------------------------------#
+
+def __parse_single_calculation_args(argv): # Internal use only, cannot call out when the module is being imported
+    '''
+    Parse the arguments of a single calculation ("-l 2 -w 3", "--length=2"...) without importing argparse.
+    Return None for anything else (other options, -h, values starting with "-"...), left to argparse.
+    '''
+    options = {"-l": "length", "--length": "length", "-w": "width", "--width": "width"}
+    values = {}
+    argv = list(argv)
+
+    while argv:
+        option, separator, value = argv.pop(0).partition("=")
+
+        if (option not in options) or (separator and not option.startswith("--")): # "-l=2" means "=2" for argparse
+            return None
+
+        if not separator:
+            if not argv:
+                return None
+            value = argv.pop(0)
+
+        if value.startswith("-"):
+            return None
+
+        values[options[option]] = value
+
+    return types.SimpleNamespace(**{**CLI_DEFAULTS, **values})
+
+
+def __parse_args():
+    args = __parse_single_calculation_args(sys.argv[1:])
+    if args is not None:
+        return args
+
+    formatter = lambda prog: HelpFormatter(prog, width=200, max_help_position=50)
+
+    parser = ArgumentParser(
+        prog = "Rectangle Calculator Program",
+        description = "Calculate the perimeter and area of a rectangle.",
+        add_help = True,
+        formatter_class = formatter
+    )
+    
+    parser.add_argument("-l", "--length", required=False, default=CLI_DEFAULTS["length"], metavar="\b", help="Length of the rectangle (expected to be a positive number).")
+    parser.add_argument("-w", "--width", required=False, default=CLI_DEFAULTS["width"], metavar="\b", help="Width of the rectangle (expected to be a positive number).")
+    parser.add_argument("-i", "--input", required=False, default=CLI_DEFAULTS["input"], metavar="\b", help="Input path leading to a JSON file containing the length and width of a rectangle, or to a directory having multiple JSON input files.")
+    parser.add_argument("-o", "--output", required=False, default=CLI_DEFAULTS["output"], metavar="\b", help="Output path leading to a JSON file to store the results, or to a directory to store multiple JSON output files.")
+    parser.add_argument("-c", "--cores", required=False, default=CLI_DEFAULTS["cores"], type=int, metavar="\b", help="The number of CPU cores to be used for parallel computing.")
+    parser.add_argument("-t", "--convert-to", required=False, default=CLI_DEFAULTS["convert_to"], metavar="\b", help="Convert the JSON files of the input directory into a single consolidated NDJSON (.ndjson, .jsonl) or CSV (.csv) file, then stop.")
+    parser.add_argument("-s", "--chunk-size", required=False, default=CLI_DEFAULTS["chunk_size"], type=int, metavar="\b", help="The number of JSON files read, validated and computed by a CPU core at once (batch mode).")
+    parser.add_argument("-r", "--incremental", required=False, action="store_true", help="Keep the output directory and only recalculate the new or changed input JSON files (tracked by a manifest next to the outputs).")
+    parser.add_argument("--read-threads", required=False, default=CLI_DEFAULTS["read_threads"], type=int, metavar="\b", help="The number of threads reading the input JSON files in each CPU core (batch mode).")
+    parser.add_argument("--write-threads", required=False, default=CLI_DEFAULTS["write_threads"], type=int, metavar="\b", help="The number of threads writing the output JSON files in each CPU core (batch mode).")
+    parser.add_argument("-f", "--in-flight", required=False, default=CLI_DEFAULTS["in_flight"], type=int, metavar="\b", help="The maximum number of chunks submitted to the CPU cores ahead of the saved results (default: 2 x cores).")
+    parser.add_argument("--serve", required=False, default=CLI_DEFAULTS["serve"], metavar="\b", help="Run as a persistent service answering JSON-lines requests, from stdin if \"-\" or from the connections of the given Unix socket path.")
+    parser.add_argument("--timings", required=False, default=CLI_DEFAULTS["timings"], metavar="\b", help="Save the stage timings (seconds) of a batch run with outputs in the given JSON file, e.g. for rectangle_benchmark.py.")
+
+    return parser.parse_args()
+
+
+#------------------------------------------------------------------------------------------------------------#
+#------------------------------------------ Define main() function ------------------------------------------#
+#------------------------------------------------------------------------------------------------------------#
+
+def main():
+    try:
+        # calculator = RectangleCalculator(
+        #     length = '2',
+        #     width = "3.5"
+        # )
+        # calculator._input = "02_Python_class_OOP/rectangle_project/data"
+        # calculator._output = ""
+        # calculator._cores = 2
+
+        args = __parse_args()
+
+        calculator = RectangleCalculator(
+            length = args.length,
+            width = args.width
+        )
+        calculator._input = args.input
+        calculator._output = args.output
+        calculator._cores = args.cores
+        calculator._chunk_size = args.chunk_size
+        calculator._in_flight = args.in_flight
+        calculator._incremental = args.incremental
+        calculator._read_threads = args.read_threads
+        calculator._write_threads = args.write_threads
+
+        if args.serve != "":
+            with RectangleService(cores=calculator._cores) as service:
+                if args.serve == "-":
+                    logger.info(f"Service ready on stdin with {calculator._cores} warm CPU cores\n")
+                    service.serve_stdin()
+                
+                else:
+                    socket_path = colored(args.serve, (139, 0, 0), attrs=["bold"])
+                    logger.info(f"Service ready on {socket_path} with {calculator._cores} warm CPU cores\n")
+                    service.serve_unix_socket(args.serve)
+            
+            logger.info(f"Service stopped after {service.request_count} requests\n")
+            return None
+
+        if args.convert_to != "":
+            converted_count = RectangleCalculator.convert_json_directory(calculator._input, args.convert_to)
+            consolidated_path = colored(str(args.convert_to), (139, 0, 0), attrs=["bold"])
+            logger.info(f"{converted_count} JSON files are converted into {consolidated_path}\n")
+            return None
+
+        if (calculator._input != "") and (Path(calculator._input).is_dir()):
+            calculator._input = Path(calculator._input)
+            
+            input_json_files = RectangleCalculator._scan_json_files(calculator._input)
+            first_json_files = list(islice(input_json_files, 2)) # Peek at 2 entries to choose the workflow, instead of listing the whole directory
+            input_json_files = chain(first_json_files, input_json_files)
+            calculator._json_count = len(first_json_files)
+            
+            if calculator._json_count > 1:
+                calculator._output = calculator._RectangleCalculator__validate_output_directory()
+
+                match str(calculator._output):
+                    case "":
+                        logger.warning(
+                            (   
+                                "\nYou are passing multiple input files but no valid ouput directory path was given!!!"
+                                "\nIf you procced, all results will be displayed here WITHOUT being saved!!!"
+                            )
+                        )
+                        
+                        answer = input(colored("Would you like to proceed? [y/n]: ", "blue", attrs=["bold"], stream=sys.stdout))
+
+                        if answer.lower() == "y":
+                            calculator._json_count = calculator._run_batch(input_json_files)
+                        
+                        else:
+                            return None # stop the program
+                        
+                    case _:
+                        __config_log_file(calculator._input.parent) # Only produce rectangle_logs.txt if the input and output directories or files are given           
+                        
+                        if calculator._incremental and (calculator._output.suffix not in CONSOLIDATED_SUFFIXES):
+                            calculator._json_count = calculator._run_incremental_batch(input_json_files)
+                        
+                        else:
+                            if calculator._incremental:
+                                logger.warning("The incremental mode only applies to an output directory, all inputs are recalculated into the consolidated file\n")
+                            
+                            calculator._json_count = calculator._run_batch(input_json_files)
+                        
+                        # for entry in calculator._input.glob("*.json"):
+                        #     calculator._single_workflow(entry.name)
+                        
+                        output_dir = colored(str(calculator._output), (139, 0, 0), attrs=["bold"])
+
+                        if calculator._output.suffix in CONSOLIDATED_SUFFIXES:
+                            logger.info(f"All results are saved in {output_dir}\n")
+                        
+                        else:
+                            logger.info(f"All result files are saved in {output_dir}\n")
+
+                        if args.timings != "":
+                            Path(args.timings).write_text(json.dumps(calculator._stage_timings))
+            
+            elif calculator._json_count == 1:
+                logger.debug("Only one input JSON file is detected in the given directory. If the output path is also given, it should be in a file format.\n")
+                calculator._input = calculator._input.joinpath(first_json_files[0])
+                calculator._single_workflow(calculator._input)
+                calculator._display_saving_single_output_message()
             
             else:
                 logger.warning("The given input directory has no JSON file! Use inputs from -l (--length) and -w (--width) for calculation\n")
                 calculator._single_workflow('') 
                 calculator._display_saving_single_output_message() 
 
+        elif Path(calculator._input).is_file() and (Path(calculator._input).suffix in CONSOLIDATED_SUFFIXES):
+            calculator._input = Path(calculator._input)
+
+            if str(calculator._output) == "":
+                logger.warning(
+                    (
+                        "\nYou are passing a consolidated input file but no valid output path was given!!!"
+                        "\nIf you procced, all results will be displayed here WITHOUT being saved!!!"
+                    )
+                )
+
+                answer = input(colored("Would you like to proceed? [y/n]: ", "blue", attrs=["bold"], stream=sys.stdout))
+
+                if answer.lower() != "y":
+                    return None # stop the program
+            
+            else:
+                calculator._output = Path(calculator._output)
+
+                if calculator._output.suffix not in CONSOLIDATED_SUFFIXES:
+                    calculator._output = calculator._output.parent.joinpath(calculator._output.stem + calculator._input.suffix)
+                    output_path = colored(str(calculator._output), (139, 0, 0), attrs=["bold"])
+                    logger.warning(f"The output of a consolidated input file should also be a consolidated file, automatically set as {output_path}\n")
+                
+                calculator._output.parent.mkdir(exist_ok=True, parents=True)
+                __config_log_file(calculator._input.parent)
+            
+            calculator._consolidated_workflow()
+
+            if str(calculator._output) != "":
+                output_path = colored(str(calculator._output), (139, 0, 0), attrs=["bold"])
+                logger.info(f"All results are saved in {output_path}\n")
+
         elif Path(calculator._input).is_file():
             calculator._input = Path(calculator._input)
             
@@ -0,0 +1,253 @@
+# Regression tests of rectangle_module, run them from this directory:
+#     python -m unittest test_rectangle_module
+
+from rectangle_module import RectangleCalculator, RectangleManifest, colored
+from rectangle_benchmark import LAZY_MODULES, PROJECT_DIR
+from unittest.mock import patch
+from pathlib import Path
+import io, json, os, shutil, subprocess, sys, tempfile, unittest
+
+
+class BatchValidationTest(unittest.TestCase):
+    '''
+    The batch path (-i dir) must accept and reject exactly the same inputs as the single-file path.
+    '''
+
+    def setUp(self):
+        self.input_dir = Path(tempfile.mkdtemp(prefix="rectangle_test_"))
+        self.addCleanup(shutil.rmtree, self.input_dir)
+
+
+    def write_inputs(self, json_file, length, width):
+        with open(self.input_dir.joinpath(json_file), "w") as json_pointer:
+            json.dump({"length": length, "width": width}, json_pointer)
+
+
+    def test_scientific_notation_in_batch_file(self):
+        self.write_inputs("rectangle_1.json", 0.00001, 3) # Saved by json as 1e-05
+        self.write_inputs("rectangle_2.json", 1e20, "2.5")
+        self.write_inputs("rectangle_3.json", -1, 3)
+
+        results = RectangleCalculator._batch_workflow(self.input_dir, "", ["rectangle_1.json", "rectangle_2.json", "rectangle_3.json"])
+
+        self.assertEqual(results[0], ("rectangle_1.json", 1e-05, 3.0, 2 * (1e-05 + 3), 1e-05 * 3))
+        self.assertEqual(results[1], ("rectangle_2.json", 1e20, 2.5, 2 * (1e20 + 2.5), 1e20 * 2.5))
+        self.assertEqual(results[2], ("rectangle_3.json", None, None, None, None))
+
+
+    def test_same_outcome_in_every_layout(self):
+        inputs = [0.00001, 1e20, -1, "abc", "2.5", "1e-05", None, 7, float("nan"), "", "1_000", '"4"', " 5"]
+
+        for idx, length in enumerate(inputs):
+            self.write_inputs(f"rectangle_{idx}.json", length, 3)
+        
+        json_files = [f"rectangle_{idx}.json" for idx in range(len(inputs))]
+        per_file = {name: (length, width) for name, length, width, _, _ in RectangleCalculator._batch_workflow(self.input_dir, "", json_files)}
+        output_dir = Path(tempfile.mkdtemp(prefix="rectangle_test_"))
+        self.addCleanup(shutil.rmtree, output_dir)
+
+        for consolidated_file in [output_dir.joinpath("rectangles.ndjson"), output_dir.joinpath("rectangles.csv")]:
+            RectangleCalculator.convert_json_directory(self.input_dir, consolidated_file)
+            names, lengths, widths = RectangleCalculator._read_consolidated_file(consolidated_file)
+            consolidated = {name: (length, width) for name, length, width, _, _ in RectangleCalculator._calculate_results(names, lengths, widths)}
+
+            self.assertEqual(consolidated, per_file, consolidated_file.suffix)
+        
+        self.assertEqual(sum(length is not None for length, _ in per_file.values()), 4) # 1e-05, 1e20, "2.5" and 7
+
+
+    def test_same_rule_as_single_validation(self):
+        validate = RectangleCalculator._RectangleCalculator__valiate_input_number
+        inputs = [1e-05, 1e20, 3, "3", "+2.5", "7.", "1e-05", "abc", "", None, True, -1, float("inf"), float("nan"), "1" * 400, 10 ** 400]
+
+        results = RectangleCalculator.calculate_many(inputs, [1] * len(inputs))
+
+        for number, length, valid in zip(inputs, results["length"].tolist(), results["valid"].tolist()):
+            expected = validate(number)[0]
+            self.assertEqual(valid, expected is not None, number)
+
+            if valid:
+                self.assertEqual(length, expected, number)
+
+
+    def test_overflowing_string_is_rejected(self):
+        validate = RectangleCalculator._RectangleCalculator__valiate_input_number
+
+        self.assertEqual(validate("1" * 400, "1" * 310 + ".5"), [None, None])
+        self.assertEqual(validate("1" * 300, 7)[1], 7.0)
+        self.assertFalse(RectangleCalculator.calculate_many(["1" * 400], ["2"])["valid"][0])
+
+
+class ManifestTest(unittest.TestCase):
+    '''
+    An incremental run recalculates the new or changed inputs, and those whose output has disappeared.
+    '''
+
+    def setUp(self):
+        self.input_dir = Path(tempfile.mkdtemp(prefix="rectangle_test_"))
+        self.output_dir = Path(tempfile.mkdtemp(prefix="rectangle_test_"))
+        self.addCleanup(shutil.rmtree, self.input_dir)
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+        for json_file in ["valid.json", "corrupted.json"]:
+            self.input_dir.joinpath(json_file).write_text("{}")
+
+
+    def changed_json_files(self):
+        manifest = RectangleManifest(self.input_dir, self.output_dir)
+        changed_json_files = list(manifest.changed_json_files(["valid.json", "corrupted.json"], chunk_size=1))
+
+        for json_file in changed_json_files:
+            if json_file == "valid.json": # Corrupted inputs produce no output
+                self.output_dir.joinpath(json_file).write_text("{}")
+            
+            manifest.record_output(json_file, json_file == "valid.json")
+        
+        manifest.save()
+        return changed_json_files
+
+
+    def test_missing_output_is_recalculated(self):
+        self.assertEqual(self.changed_json_files(), ["valid.json", "corrupted.json"])
+        self.assertEqual(self.changed_json_files(), [])
+
+        self.output_dir.joinpath("valid.json").unlink()
+        self.assertEqual(self.changed_json_files(), ["valid.json"])
+        self.assertEqual(self.changed_json_files(), [])
+
+
+    def calculator(self):
+        calculator = RectangleCalculator()
+        calculator._input, calculator._output = self.input_dir, self.output_dir
+        calculator._cores, calculator._chunk_size, calculator._in_flight = 1, 1, None
+        calculator._read_threads, calculator._write_threads = 1, 1
+        return calculator
+
+
+    def test_first_incremental_run_after_plain_run(self):
+        for json_file in ["r1.json", "r2.json", "r3.json"]:
+            self.input_dir.joinpath(json_file).write_text('{"length": 2, "width": 3}')
+
+        self.calculator()._run_batch(["r1.json", "r2.json", "r3.json"]) # Plain run, no manifest
+        self.assertTrue(self.output_dir.joinpath("r2.json").exists())
+
+        self.input_dir.joinpath("r2.json").write_text('{"length": "abc", "width": 3}')
+        self.calculator()._run_incremental_batch(["r1.json", "r2.json", "r3.json"])
+        self.assertFalse(self.output_dir.joinpath("r2.json").exists()) # No stale result of the corrupted input
+
+        with open(self.output_dir.joinpath(RectangleManifest.manifest_name)) as json_pointer:
+            entries = json.load(json_pointer)["files"]
+        
+        self.assertEqual({json_file: entry["output"] for json_file, entry in entries.items()}, {"r1.json": True, "r2.json": False, "r3.json": True})
+
+
+class PendingWritesTest(unittest.TestCase):
+    '''
+    With writer threads, the workers keep writes pending across chunks: every result must still be reported once, after its output is saved.
+    '''
+
+    def setUp(self):
+        self.input_dir = Path(tempfile.mkdtemp(prefix="rectangle_test_"))
+        self.output_dir = Path(tempfile.mkdtemp(prefix="rectangle_test_"))
+        self.addCleanup(shutil.rmtree, self.input_dir)
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+
+    def test_every_result_reported_after_its_write(self):
+        json_files = [f"rectangle_{idx}.json" for idx in range(40)]
+
+        for idx, json_file in enumerate(json_files):
+            self.input_dir.joinpath(json_file).write_text(json.dumps({"length": "abc" if idx % 7 == 0 else idx + 1, "width": 3}))
+
+        for limit in [0, 4, 1024]: # Wait for every chunk, for the oldest ones only, or at the end of the run
+            reported = {}
+
+            def on_result(json_file, valid):
+                reported[json_file] = valid
+                self.assertEqual(self.output_dir.joinpath(json_file).exists(), valid)
+
+            calculator = RectangleCalculator()
+            calculator._input, calculator._output = self.input_dir, self.output_dir
+            calculator._cores, calculator._chunk_size, calculator._in_flight = 2, 3, None
+            calculator._read_threads, calculator._write_threads = 2, 4
+
+            with patch("rectangle_module.PENDING_WRITES_LIMIT", limit):
+                self.assertEqual(calculator._run_batch(json_files, on_result=on_result), len(json_files))
+
+            self.assertEqual(reported, {json_file: idx % 7 != 0 for idx, json_file in enumerate(json_files)})
+
+            for json_file in self.output_dir.iterdir():
+                json_file.unlink()
+
+
+class ServiceRequestTest(unittest.TestCase):
+    '''
+    The service mode tells a missing input file apart from a corrupted one.
+    '''
+
+    def test_missing_and_corrupted_paths(self):
+        input_dir = Path(tempfile.mkdtemp(prefix="rectangle_test_"))
+        self.addCleanup(shutil.rmtree, input_dir)
+        input_dir.joinpath("corrupted.json").write_text('{"length": "abc", "width": 2}')
+
+        missing = RectangleCalculator._calculate_request({"path": str(input_dir.joinpath("missing.json"))})
+        corrupted = RectangleCalculator._calculate_request({"path": str(input_dir.joinpath("corrupted.json"))})
+
+        self.assertTrue(missing["error"].startswith("MISSING input"))
+        self.assertTrue(corrupted["error"].startswith("CORRUPTED inputs"))
+        self.assertTrue(RectangleCalculator._calculate_request({"path": str(input_dir)})["error"].startswith("MISSING input"))
+
+
+class ImportTimeTest(unittest.TestCase):
+    '''
+    Importing rectangle_module must stay within the import-time budget, without importing any heavy module (see rectangle_benchmark.py).
+    '''
+
+    BUDGET_MS = 100
+
+    def import_times(self): # {module: cumulative import time (microseconds)} of "import rectangle_module" in a fresh process
+        stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import rectangle_module"], cwd=PROJECT_DIR, capture_output=True, text=True, check=True).stderr
+        cumulative_times = {}
+
+        for line in stderr.splitlines():
+            _, cumulative_time, module = line.split("|")
+
+            if cumulative_time.strip().isdecimal(): # Skip the header line
+                cumulative_times[module.strip()] = int(cumulative_time)
+        
+        return cumulative_times
+
+
+    def test_import_within_budget(self):
+        measures = [self.import_times() for _ in range(3)] # The best of 3, against the noise of a busy machine
+
+        self.assertLessEqual(min(cumulative_times["rectangle_module"] for cumulative_times in measures) / 1000, self.BUDGET_MS)
+        self.assertEqual([module for module in LAZY_MODULES if module in measures[0]], [])
+
+
+class ColoredTest(unittest.TestCase):
+    '''
+    colored() must only color the text when the stream it is written to (stderr by default) is a terminal.
+    '''
+
+    class Terminal(io.StringIO):
+        def isatty(self):
+            return True
+
+
+    def setUp(self):
+        environ = patch.dict(os.environ)
+        environ.start()
+        self.addCleanup(environ.stop) # Restore the color variables removed below
+
+        for variable in ["NO_COLOR", "ANSI_COLORS_DISABLED", "FORCE_COLOR"]:
+            os.environ.pop(variable, None)
+
+
+    def test_stream_is_checked(self):
+        self.assertEqual(colored("text", "red", stream=io.StringIO()), "text")
+        self.assertNotEqual(colored("text", "red", stream=self.Terminal()), "text") # Even when stdout is not a terminal
+
+
+if __name__ == "__main__":
+    unittest.main()
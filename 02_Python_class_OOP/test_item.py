@@ -0,0 +1,177 @@
+# Regression tests of item.py, run them from this directory:
+#     python -m unittest test_item
+
+from item import Item, ItemStore, ItemInventory, CSVLoadReport, read_csv_chunks
+from pathlib import Path
+import shutil, tempfile, unittest
+
+
+class Phone(Item): # Subclass without __slots__ (it has a __dict__ for broken_phone)
+    def __init__(self, name: str, price: float, quantity: int, broken_phone: bool = False):
+        super().__init__(name, price, quantity)
+        self.broken_phone = broken_phone
+
+
+class Charger(Item): # Subclass with __slots__ (no __dict__ at all)
+    __slots__ = ("watts",)
+    default_discount_rate = 0.1
+
+    def __init__(self, name: str, price: float, quantity: int, watts: int = 20):
+        super().__init__(name, price, quantity)
+        self.watts = watts
+
+
+class DiscountRateTest(unittest.TestCase):
+    '''
+    Item uses __slots__, the per-item discount rate must still be assignable, on Item and on its subclasses.
+    '''
+
+    def test_item_discount_rate(self):
+        item = Item("Laptop", 1000, 1)
+        self.assertEqual(item.discount_rate, Item.default_discount_rate)
+
+        item.discount_rate = 0.5
+        self.assertEqual(item.apply_discount(), 500)
+        self.assertFalse(hasattr(item, "__dict__"))
+
+        del item.discount_rate
+        self.assertEqual(item.discount_rate, Item.default_discount_rate)
+
+        with self.assertRaises(AssertionError):
+            item.discount_rate = 1.5
+
+
+    def test_subclass_discount_rate(self):
+        phone = Phone("iPhone 14", 1200, 5, broken_phone=True)
+        charger = Charger("USB-C", 20, 3)
+        self.assertEqual(charger.discount_rate, 0.1)
+
+        phone.discount_rate = 0.25
+        charger.discount_rate = 0.5
+        self.assertEqual(phone.apply_discount(), 900)
+        self.assertEqual(charger.apply_discount(), 10)
+        self.assertNotIn("discount_rate", phone.__dict__) # Stored in the slot of Item, not in the __dict__ of Phone
+
+        store = ItemStore.from_items([phone, charger, Charger("Cable", 10, 1)])
+        self.assertEqual(store.effective_discount_rates().tolist(), [0.25, 0.5, 0.1])
+
+
+class CSVLoadTest(unittest.TestCase):
+    '''
+    A streaming CSV load must yield chunks of typed rows, skip the invalid rows and report them with their line numbers.
+    '''
+
+    def setUp(self):
+        self.csv_dir = Path(tempfile.mkdtemp(prefix="item_test_"))
+        self.addCleanup(shutil.rmtree, self.csv_dir)
+
+
+    def write_csv(self, text):
+        csv_path = self.csv_dir.joinpath("items.csv")
+        csv_path.write_text(text)
+        return csv_path
+
+
+    def test_chunks_and_error_rows(self):
+        csv_path = self.write_csv(
+            "name,price,quantity\n"
+            "Phone,100,1\n"
+            "Laptop,abc,3\n"       # Line 3: not a float
+            "Cable,10,2\n"
+            "Mouse,50\n"           # Line 5: missing quantity
+            "Keyboard,-75,5\n"     # Line 6: negative price
+            "Charger,25,4\n"
+            "Screen,300,1\n"
+        )
+        report = CSVLoadReport()
+        chunks = list(Item.from_csv(csv_path, chunk_size=2, report=report))
+
+        self.assertEqual([[(item.name, item.price, item.quantity) for item in chunk] for chunk in chunks], [
+            [("Phone", 100.0, 1), ("Cable", 10.0, 2)],
+            [("Charger", 25.0, 4), ("Screen", 300.0, 1)]
+        ])
+        self.assertEqual((report.rows, report.error_count), (4, 3))
+        self.assertEqual([line_number for line_number, _ in report.errors], [3, 5, 6])
+        self.assertTrue(report.errors[0][1].startswith("ValueError"))
+        self.assertTrue(report.errors[2][1].startswith("AssertionError"))
+
+
+    def test_quoted_and_multiline_fields(self):
+        csv_path = self.write_csv(
+            "name,price,quantity\n"
+            '"Cable, USB-C",10,2\n'
+            '"Phone\n""14"" Pro",1200,1\n' # Lines 3-4: a quoted field with a newline and quotes
+            "Laptop,abc,3\n"                 # Line 5
+        )
+        report = CSVLoadReport(max_errors=0)
+        rows = [row for chunk in read_csv_chunks(csv_path, Item.csv_schema, chunk_size=10, report=report) for row in chunk]
+
+        self.assertEqual(rows, [("Cable, USB-C", 10.0, 2), ('Phone\n"14" Pro', 1200.0, 1)])
+        self.assertEqual((report.error_count, report.errors), (1, [])) # Counted, but not kept above max_errors
+
+
+    def test_missing_column(self):
+        csv_path = self.write_csv("name,price\nPhone,100\n")
+
+        with self.assertRaises(ValueError):
+            list(read_csv_chunks(csv_path, Item.csv_schema))
+
+
+class InventoryTest(unittest.TestCase):
+    '''
+    The indexes and grouped aggregates of an ItemInventory must follow every change of its items.
+    '''
+
+    def setUp(self):
+        self.phone = Phone("iPhone 14", 1000, 2)
+        self.charger = Charger("USB-C", 20, 5)
+        self.cable = Item("Cable", 10, 3)
+        self.inventory = ItemInventory([self.phone, self.charger, self.cable])
+
+
+    def test_index_upkeep_after_changes(self):
+        self.cable.price = 500
+        self.charger.quantity = 1
+        self.phone.name = "iPhone 15"
+
+        self.assertEqual(self.inventory.price_range(), [self.charger, self.cable, self.phone])
+        self.assertEqual(self.inventory.quantity_range(), [self.charger, self.phone, self.cable])
+        self.assertEqual(self.inventory.find_by_name("iPhone 14"), [])
+        self.assertEqual(self.inventory.find_by_name("iPhone 15"), [self.phone])
+        self.assertEqual(self.inventory.total_value(), 1000 * 2 + 20 * 1 + 500 * 3)
+
+
+    def test_remove(self):
+        self.inventory.remove(self.charger)
+
+        self.assertEqual(len(self.inventory), 2)
+        self.assertEqual(self.inventory.find_by_name("USB-C"), [])
+        self.assertEqual(self.inventory.price_range(), [self.cable, self.phone])
+        self.assertEqual(self.inventory.value_by_class_name()["Charger"], (0, 0))
+
+        self.charger.price = 30 # No longer indexed, the inventory is not notified
+        self.assertEqual(self.inventory.total_value(), 1000 * 2 + 10 * 3)
+
+        with self.assertRaises(AssertionError):
+            self.inventory.remove(self.charger)
+
+
+    def test_price_range_bounds(self):
+        same_price = Item("Adapter", 20, 1)
+        self.inventory.add(same_price)
+
+        self.assertEqual(self.inventory.price_range(20, 20), [self.charger, same_price]) # Both bounds included
+        self.assertEqual(self.inventory.price_range(low=20), [self.charger, same_price, self.phone])
+        self.assertEqual(self.inventory.price_range(high=19.99), [self.cable])
+        self.assertEqual(self.inventory.price_range(1001), [])
+
+
+    def test_value_by_class_name(self):
+        self.inventory.add(Item("Adapter", 5, 4))
+        self.cable.quantity = 1
+
+        self.assertEqual(self.inventory.value_by_class_name(), {"Phone": (1, 2000), "Charger": (1, 100), "Item": (2, 30)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -185,6 +185,16 @@ for subject, scores in dict_subjects_score.items():
 # Physics: [nan, nan, nan, nan, nan] ... [nan, 6.8, 5.6, 7.4, 4.2]
 # Chemistry: [nan, nan, nan, nan, nan] ... [4.8, 4.6, nan, 4.8, 4.4]
 
+# The loop above scans the SCORE column once per subject (8 times).
+# regex_scan.py (01_Python_Basic) extracts all the subjects in ONE scan, with the single pattern
+# "(Math|Literature|...):\s*(\d+\.\d+)", and can split the column into chunks processed in parallel (workers=4)
+import sys
+sys.path.append("01_Python_Basic")
+from regex_scan import KeyValuePattern, extract_series
+
+df_scores = extract_series(df_bac['SCORE'], KeyValuePattern(dict_subjects.values(), r':\s*(\d+\.\d+)'), dtype=float)
+print(df_scores.equals(pd.DataFrame(dict_subjects_score, index=df_bac.index))) # True (same scores as the loop)
+
 df_subjects_score = (
     df_bac.copy() # Create a copy of df_bac
     .assign(**dict_subjects_score) # Add new subject score columns